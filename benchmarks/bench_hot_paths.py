@@ -0,0 +1,222 @@
+"""핫패스 벤치마크: 지표 계산 / 연봉 집계 / 봉 정리(Bars) / 라벨·호버 포맷 / 네이버 시세 파싱.
+
+    python benchmarks/bench_hot_paths.py                  # 측정 + baseline.json과 비교 (회귀 시 exit 1)
+    python benchmarks/bench_hot_paths.py --save-baseline  # 현재 결과를 기준값으로 저장
+    python benchmarks/bench_hot_paths.py --record         # 실제 야후 chart JSON을 fixtures/에 녹화
+    python benchmarks/bench_hot_paths.py --record-naver   # 실제 네이버 sise 페이지(EUC-KR 원본 바이트)를 tests/fixtures/naver/captured/에 녹화
+
+fixtures/에 녹화 파일이 없으면 같은 크기·모양(결측 봉 포함)의 합성 JSON을 시드 고정으로 만든다.
+네이버 파싱은 녹화된 실제 페이지(tests/fixtures/naver/captured/)가 있으면 그대로, 없으면 손으로 쓴 시세 표를
+실제 페이지 크기(약 270KB)로 채워 바이트 스캐너와 기존 BeautifulSoup 경로(naver_parse_soup = 폴백 경로)를 함께 잰다.
+
+baseline.json은 커밋돼 있어 기본 실행이 곧 회귀 검사다. 기준값은 기계마다 다르므로 CI에서는
+같은 러너에서 main 브랜치로 --save-baseline 을 먼저 돌린 뒤 PR 브랜치를 비교하고,
+핫패스를 의도적으로 바꾼 커밋은 baseline.json도 같이 갱신한다.
+web_stock.py는 스크립트라 UI 구간 앞까지만 실행해 엔진 함수만 가져온다.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+FIXTURE_DIR = os.path.join(HERE, "fixtures")
+BASELINE_FILE = os.path.join(HERE, "baseline.json")
+UI_MARKER = "# 🖥️ UI 및 메인 실행부"
+
+# (이름, range, interval, 봉 간격(초), 봉 개수) - 실제 야후 응답 크기 기준
+FIXTURES = [
+    ("30d_5m", "30d", "5m", 300, 22 * 78),
+    ("5y_1d", "5y", "1d", 86400, 1250),
+    ("max_1mo", "max", "1mo", 31 * 86400, 480),
+]
+RECORD_SYMBOL = "005930.KS"
+NAVER_FIXTURE = os.path.join(ROOT, "tests", "fixtures", "naver", "sise_005930_up.html")
+NAVER_CAPTURE_DIR = os.path.join(ROOT, "tests", "fixtures", "naver", "captured")
+# 대형주 / 코스닥 / ETF / 보합이 잦은 종목
+NAVER_RECORD_CODES = ("005930", "247540", "069500", "035420")
+NAVER_PAGE_BYTES = 270_000
+
+
+def load_engine():
+    with open(os.path.join(ROOT, "web_stock.py"), encoding="utf-8") as f:
+        source = f.read()
+    module = types.ModuleType("web_stock_engine")
+    module.__file__ = os.path.join(ROOT, "web_stock.py")
+    exec(compile(source[:source.index(UI_MARKER)], module.__file__, "exec"), module.__dict__)
+    return module
+
+
+def synthetic_chart(interval_seconds, n, seed):
+    rng = random.Random(seed)
+    start = 1_400_000_000
+    price = 50_000.0
+    ts, quote = [], {f: [] for f in ("open", "high", "low", "close", "volume")}
+    for i in range(n):
+        ts.append(start + i * interval_seconds)
+        open_ = price
+        price = max(1.0, price * (1 + rng.gauss(0, 0.01)))
+        missing = rng.random() < 0.005  # 야후처럼 가끔 빈 봉
+        quote["open"].append(None if missing else open_)
+        quote["high"].append(None if missing else max(open_, price) * (1 + abs(rng.gauss(0, 0.003))))
+        quote["low"].append(None if missing else min(open_, price) * (1 - abs(rng.gauss(0, 0.003))))
+        quote["close"].append(None if missing else price)
+        quote["volume"].append(None if missing else rng.randint(10_000, 5_000_000))
+    meta = {"currency": "KRW", "symbol": RECORD_SYMBOL, "gmtoffset": 32400, "regularMarketPrice": price}
+    return {"chart": {"result": [{"meta": meta, "timestamp": ts, "indicators": {"quote": [quote]}}], "error": None}}
+
+
+def load_fixture(name, interval_seconds, n):
+    path = os.path.join(FIXTURE_DIR, f"{name}.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return synthetic_chart(interval_seconds, n, seed=name)
+
+
+def record_fixtures():
+    import requests
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name, rng, interval, _, _ in FIXTURES:
+        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{RECORD_SYMBOL}?range={rng}&interval={interval}"
+        res = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+        res.raise_for_status()
+        with open(os.path.join(FIXTURE_DIR, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(res.json(), f)
+        print(f"recorded {name}: {len(res.json()['chart']['result'][0].get('timestamp') or [])} bars")
+
+
+def record_naver_pages():
+    import requests
+    os.makedirs(NAVER_CAPTURE_DIR, exist_ok=True)
+    for code in NAVER_RECORD_CODES:
+        res = requests.get(f"https://finance.naver.com/item/sise.naver?code={code}", headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+        res.raise_for_status()
+        # 디코드/정리 없이 응답 바이트 그대로 (파서는 EUC-KR 원본을 받는다)
+        with open(os.path.join(NAVER_CAPTURE_DIR, f"sise_{code}.html"), "wb") as f:
+            f.write(res.content)
+        print(f"recorded sise_{code}: {len(res.content) / 1024:.0f}KB")
+
+
+def stages(ws, payload):
+    result = payload["chart"]["result"][0]
+    bars = ws.Bars.from_chart(result)
+    closes = bars.close.tolist()
+    tvalues = (bars.close * bars.volume).tolist()
+    return {
+        "bars_from_chart": lambda: ws.Bars.from_chart(result),
+        "calc_ma": lambda: ws.calc_ma_multi(closes, ws.MA_WINDOWS),
+        "calc_ema": lambda: ws.calc_ema(closes, 26),
+        "calc_macd": lambda: ws.calc_macd(closes),
+        "calc_rsi": lambda: ws.calc_rsi(closes, ws.RSI_PERIOD),
+        "calc_bb": lambda: ws.calc_bb(closes, ws.BB_WINDOW, ws.BB_STD),
+        "aggregate_to_yearly": lambda: ws.aggregate_to_yearly(bars),
+        "format_abbrev": lambda: [ws.format_abbrev(v, "₩") for v in tvalues],
+        "abbrev_parts": lambda: ws.abbrev_parts(tvalues),
+    }
+
+
+def naver_page():
+    captured = os.path.join(NAVER_CAPTURE_DIR, "sise_005930.html")
+    if os.path.exists(captured):
+        with open(captured, "rb") as f:
+            return f.read()
+    # 녹화본이 없으면 시세 표 앞뒤를 네이버 페이지의 다른 표/스크립트 같은 마크업으로 채워 실제 응답 크기로 만든다
+    with open(NAVER_FIXTURE, "rb") as f:
+        page = f.read()
+    row = (b'<tr><td class="date"><span class="tah p10 gray03">2024.05.17</span></td>'
+           b'<td class="num"><span class="tah p11">77,400</span></td>'
+           b'<td class="num"><img src="https://ssl.pstatic.net/imgstock/images/images4/ico_down.gif" alt="\xc7\xcf\xb6\xf4">'
+           b'<span class="tah p11 nv01">800</span></td></tr>\n')
+    filler = b'<div class="section"><table class="type2">' + row * ((NAVER_PAGE_BYTES - len(page)) // len(row) // 2) + b'</table></div>\n'
+    anchor = page.index(b'<div class="section inner_sub">')
+    body_end = page.index(b'</body>')
+    return page[:anchor] + filler + page[anchor:body_end] + filler + page[body_end:]
+
+
+def naver_stages(ws):
+    page = naver_page()
+    return {
+        "naver_parse": lambda: ws.parse_naver_quote(page),
+        "naver_parse_soup": lambda: ws._soup_naver_fields(page),
+    }
+
+
+def measure(fn, repeat, min_time):
+    fn()  # 워밍업
+    samples = []
+    for _ in range(repeat):
+        loops, elapsed = 0, 0.0
+        start = time.perf_counter()
+        while elapsed < min_time:
+            fn()
+            loops += 1
+            elapsed = time.perf_counter() - start
+        samples.append(elapsed / loops)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(samples), peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--record", action="store_true", help="야후 chart JSON을 fixtures/에 녹화하고 종료")
+    parser.add_argument("--record-naver", action="store_true", help="네이버 sise 페이지를 tests/fixtures/naver/captured/에 녹화하고 종료")
+    parser.add_argument("--save-baseline", action="store_true", help="측정 결과를 baseline.json으로 저장")
+    parser.add_argument("--threshold", type=float, default=0.25, help="기준 대비 허용 시간 증가율 (기본 25%%)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="반복 1회의 최소 측정 시간(초)")
+    parser.add_argument("-k", dest="only", help="이름에 이 문자열이 들어간 단계만 실행")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record_fixtures()
+        return 0
+    if args.record_naver:
+        record_naver_pages()
+        return 0
+
+    ws = load_engine()
+    results = {}
+    print(f"{'stage':<34}{'median':>12}{'peak mem':>12}")
+    cases = [(name, stages(ws, load_fixture(name, interval_seconds, n))) for name, _, _, interval_seconds, n in FIXTURES]
+    cases.append(("sise_page", naver_stages(ws)))
+    for name, fns in cases:
+        for stage, fn in fns.items():
+            key = f"{stage}[{name}]"
+            if args.only and args.only not in key: continue
+            seconds, peak = measure(fn, args.repeat, args.min_time)
+            results[key] = {"seconds": seconds, "peak_bytes": peak}
+            print(f"{key:<34}{seconds * 1e3:>10.3f}ms{peak / 1024:>10.1f}KB")
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"baseline saved: {BASELINE_FILE}")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE):
+        print("baseline.json 없음 - 비교 생략 (--save-baseline 으로 생성)")
+        return 0
+    with open(BASELINE_FILE, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    for key, row in results.items():
+        base = baseline.get(key)
+        if base and row["seconds"] > base["seconds"] * (1 + args.threshold):
+            regressions.append(f"{key}: {base['seconds'] * 1e3:.3f}ms → {row['seconds'] * 1e3:.3f}ms")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""동시 세션 부하 생성기: N개 세션이 검색 / 기간 전환 / 라이브 모드를 돌며 렌더 지연을 잰다.
+
+    HTTP_CASSETTE=record python benchmarks/load_sessions.py --sessions 1 --steps 20   # 실제 응답 녹화
+    HTTP_CASSETTE=replay HTTP_REPLAY_LATENCY_MS=30-150 \\
+        python benchmarks/load_sessions.py --sessions 20 --steps 30                   # 오프라인 재생 부하
+
+각 세션은 streamlit.testing의 AppTest로 web_stock.py를 실제로 실행하므로 같은 프로세스의
+st.cache_resource(HTTP 풀, 시세 버스, SWR 캐시)를 공유한다 = 서버 1대에 붙은 세션들과 같은 조건.
+업스트림 호출 수는 앱이 METRICS_FILE로 쓰는 계측값에서 읽는다.
+
+세션 스레드를 띄우기 전에 메인 스레드에서 1회 예열 렌더를 돌린다 (pandas/plotly 등의 첫 import가
+여러 스레드에서 동시에 일어나면 "partially initialized module" 오류가 난다). 예열 뒤 캐시는 비운다.
+같은 이유로 세션별 스크립트 파싱(ast.parse)도 잠금으로 직렬화한다.
+AppTest는 run_every 프래그먼트를 실행하지 않으므로 "live"는 토글 재렌더만 잰다 (시세 버스 틱 경로는 측정 밖).
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(os.path.dirname(HERE), "web_stock.py")
+
+SEARCH_TERMS = ["삼성전자", "현대자동차", "네이버", "엔비디아", "테슬라", "애플", "토요타 (일본)", "TSMC (대만)", "SK하이닉스", "AAPL"]
+TIMEFRAMES = ["분봉", "일봉", "월봉", "연봉"]
+ACTIONS = ("search", "timeframe", "live")
+UPSTREAM_RE = re.compile(r'^stock_upstream_requests_total\{host="([^"]+)",status="([^"]+)"\} (\d+)$')
+
+
+def percentile(values, pct):
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_session(seed, steps, timeout, latencies, errors):
+    from streamlit.testing.v1 import AppTest
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    live = False
+    for step in range(steps):
+        action = "initial" if step == 0 else rng.choice(ACTIONS)
+        try:
+            if action == "search":
+                at.text_input(key="search_input").input(rng.choice(SEARCH_TERMS))
+            elif action == "timeframe":
+                next(r for r in at.radio if "조회 기간" in r.label).set_value(rng.choice(TIMEFRAMES))
+            elif action == "live":
+                live = not live
+                next(t for t in at.toggle if "라이브" in t.label).set_value(live)
+            start = time.perf_counter()
+            at.run()
+            latencies[action].append(time.perf_counter() - start)
+            if at.exception: errors.append(f"{action}: {at.exception[0].message}")
+        except Exception as e:
+            errors.append(f"{action}: {e!r}")
+
+
+def serialize_script_parse():
+    # AppTest마다 스크립트를 따로 파싱하는데, 여러 스레드의 동시 ast.parse는 CPython 3.11에서
+    # "AST constructor recursion depth mismatch"로 깨질 수 있다 → 파싱 단계만 직렬화 (수 ms)
+    from streamlit.runtime.scriptrunner import magic
+    add_magic, lock = magic.add_magic, threading.Lock()
+
+    def locked(*args, **kwargs):
+        with lock:
+            return add_magic(*args, **kwargs)
+    magic.add_magic = locked
+
+
+def warm_up(timeout):
+    # 첫 import를 메인 스레드에서 끝내고, 측정이 차가운 캐시에서 시작하도록 예열 결과는 버린다
+    import pandas, plotly.graph_objects, plotly.subplots  # noqa: F401 - Streamlit이 렌더 중 지연 import
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    at.run()
+    if not at.exception:
+        # 빈 검색창은 차트 전에 멈추므로 차트 경로까지 한 번 그린다
+        at.text_input(key="search_input").input(SEARCH_TERMS[0])
+        at.run()
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    return [f"warm-up: {e.message}" for e in at.exception]
+
+
+def upstream_counts(path):
+    counts = defaultdict(int)
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                m = UPSTREAM_RE.match(line.strip())
+                if m: counts[m.group(1)] += int(m.group(3))
+    except OSError:
+        pass
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--steps", type=int, default=20, help="세션당 동작 수 (첫 렌더 포함)")
+    parser.add_argument("--timeout", type=float, default=60, help="렌더 1회 제한 시간(초)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    metrics_file = os.path.join(tempfile.mkdtemp(prefix="stock-load-"), "metrics.prom")
+    os.environ["METRICS_FILE"] = metrics_file
+    os.environ["METRICS_FLUSH_SECONDS"] = "0"
+    # 부하 측정 중엔 백그라운드 갱신기가 세션 수와 무관한 호출을 섞지 않게 끈다
+    os.environ.setdefault("MARKET_REFRESHER", "0")
+
+    serialize_script_parse()
+    latencies, errors = defaultdict(list), warm_up(args.timeout)
+    threads = [threading.Thread(target=run_session, args=(args.seed + i, args.steps, args.timeout, latencies, errors))
+               for i in range(args.sessions)]
+    started = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    wall = time.perf_counter() - started
+
+    renders = sum(len(v) for v in latencies.values())
+    print(f"sessions={args.sessions} renders={renders} wall={wall:.1f}s mode={os.environ.get('HTTP_CASSETTE') or 'live'}")
+    print(f"{'action':<10}{'n':>6}{'p50':>10}{'p99':>10}{'mean':>10}")
+    for action in ("initial",) + ACTIONS + ("all",):
+        values = [x for v in latencies.values() for x in v] if action == "all" else latencies.get(action, [])
+        if not values: continue
+        print(f"{action:<10}{len(values):>6}{percentile(values, 50) * 1e3:>8.0f}ms{percentile(values, 99) * 1e3:>8.0f}ms"
+              f"{statistics.mean(values) * 1e3:>8.0f}ms")
+    counts = upstream_counts(metrics_file)
+    print(f"upstream calls: {sum(counts.values())} ({sum(counts.values()) / max(renders, 1):.2f}/render)")
+    for host, count in sorted(counts.items()):
+        print(f"  {host:<32}{count:>8}")
+    print("note: AppTest does not run run_every fragments - 'live' times the toggle rerender only, not quote-bus ticks")
+    for line in errors[:10]:
+        print(f"ERROR {line}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
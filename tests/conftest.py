@@ -0,0 +1,22 @@
+"""web_stock.py는 Streamlit 스크립트라 UI 구간 앞까지만 실행해 엔진 함수만 가져온다 (benchmarks와 같은 방식)."""
+import os
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UI_MARKER = "# 🖥️ UI 및 메인 실행부"
+
+
+def load_engine():
+    with open(os.path.join(ROOT, "web_stock.py"), encoding="utf-8") as f:
+        source = f.read()
+    module = types.ModuleType("web_stock_engine")
+    module.__file__ = os.path.join(ROOT, "web_stock.py")
+    exec(compile(source[:source.index(UI_MARKER)], module.__file__, "exec"), module.__dict__)
+    return module
+
+
+@pytest.fixture(scope="session")
+def ws():
+    return load_engine()
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+DAY = 86400
+MONEY = ("₩", "KRW", 1.0)
+
+
+def daily_bars(ws, n, seed=0):
+    rng = np.random.default_rng(seed)
+    end = int(ws.time.time()) // DAY * DAY
+    ts = end - DAY * np.arange(n - 1, -1, -1, dtype=np.int64)
+    close = 50_000 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    volume = rng.integers(10_000, 1_000_000, n).astype(np.float64)
+    return ws.Bars(ts, close * 0.99, close * 1.01, close * 0.98, close, volume)
+
+
+def view_of(ws, bars, symbol):
+    return ws.chart_view(symbol, bars, "일봉", False)
+
+
+def bar_trace(fig, name):
+    return next(tr for tr in fig.data if tr.name == name)
+
+
+@pytest.mark.parametrize("money_after", [MONEY, ("$", "USD", 1350.0)])
+def test_tail_patch_matches_full_rebuild(ws, monkeypatch, money_after):
+    bars = daily_bars(ws, 300)
+    symbol = f"PATCH-{money_after[1]}.KS"
+    first = ws.chart_figure(symbol, view_of(ws, bars, symbol), "일봉", True, False, "MACD", False, MONEY)
+    assert first.fig is not None
+
+    # 마지막 봉 수정 + 새 봉 1개
+    close = bars.close.copy()
+    close[-1] *= 1.02
+    tail = ws.Bars(np.append(bars.ts, bars.ts[-1] + DAY), np.append(bars.open, close[-1]), np.append(bars.high, close[-1] * 1.01),
+                   np.append(bars.low, close[-1] * 0.99), np.append(close, close[-1] * 0.97), np.append(bars.volume, 5_000.0))
+    view = view_of(ws, tail, symbol)
+
+    labelled = []
+    chart_labels = ws.chart_labels
+    monkeypatch.setattr(ws, "chart_labels", lambda ts, timeframe: labelled.append(len(ts)) or chart_labels(ts, timeframe))
+    patched = ws.chart_figure(symbol, view, "일봉", True, False, "MACD", False, money_after)
+    assert labelled == [2]  # 바뀐 꼬리 2봉만
+
+    fresh = ws.ChartFigure()
+    fresh.update_parts(view, money_after, "일봉", 0, 0)
+    rebuilt = ws.build_chart_figure(fresh, view, ("일봉", True, False, "MACD", False, '#ff4b4b', '#00b4d8'))
+    for name in ("캔들", "거래대금", "Histogram", "3선"):
+        a, b = bar_trace(patched.fig, name), bar_trace(rebuilt, name)
+        assert list(a.x) == list(b.x)
+    a, b = bar_trace(patched.fig, "거래대금"), bar_trace(rebuilt, "거래대금")
+    assert [tuple(c) for c in a.customdata] == [tuple(c) for c in b.customdata]
+    assert a.hovertemplate == b.hovertemplate
+    assert list(a.marker.color) == list(b.marker.color)
@@ -0,0 +1,18 @@
+def test_missing_annual_table_is_persisted_and_not_refetched(ws, tmp_path):
+    calls = []
+    store = ws.FundamentalsStore(str(tmp_path / "fundamentals.sqlite3"))
+    service = ws.FundamentalsService(store)
+    service._fetch_integration = lambda code: calls.append(("integration", code)) or {"시가총액": "1조"}
+    service._fetch_annual = lambda code: calls.append(("annual", code))  # ETF: 연간표 없음 → None
+
+    for _ in range(3):
+        assert service.get("069500") is None
+    assert calls == [("integration", "069500"), ("annual", "069500")]
+
+    # 재시작해도 저장된 부재 기록을 따른다
+    restarted = ws.FundamentalsService(store)
+    restarted._fetch_annual = lambda code: calls.append(("annual", code))
+    assert restarted.get("069500") is None
+    assert len(calls) == 2
+    assert not any(restarted._due(restarted._record("069500"), ws.time.time()))
+    assert all(restarted._due(restarted._record("069500"), ws.time.time() + ws.FIN_MISS_SECONDS))
@@ -0,0 +1,22 @@
+import pytest
+
+
+def spark(**closes):
+    return {pair: {"close": values, "chartPreviousClose": values[0]} for pair, values in closes.items()}
+
+
+def test_failed_spark_keeps_previous_fx_table(ws, monkeypatch):
+    responses = [spark(**{"USDKRW=X": [1300.0, 1350.0], "EURUSD=X": [1.10, 1.08]})]
+    monkeypatch.setattr(ws, "get_cached_json", lambda url: responses[-1])
+    good = ws.get_fx_table()
+    assert good["KRW"] == (1 / 1350.0, 1 / 1300.0)
+
+    for failure in (None, spark(**{"EURUSD=X": [1.10, 1.09]})):  # 요청 실패 / 필수 쌍(USDKRW) 누락
+        responses.append(failure)
+        assert ws.get_fx_table.__wrapped__() is None
+        with ws.swr_bypass():
+            ws.get_fx_table()
+        assert ws.get_fx_table() == good
+
+    monkeypatch.setattr(ws, "_fx_direct", lambda currency: None)
+    assert ws.fx_rate("EUR") == pytest.approx(1.08 * 1350.0)
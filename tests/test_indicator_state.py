@@ -0,0 +1,70 @@
+"""IndicatorState: 증분 갱신(_append/_revise)이 전체 재계산과 같은지, 스냅샷이 이후 갱신에 오염되지 않는지."""
+import math
+import random
+
+import numpy as np
+import pytest
+
+
+def test_snapshot_is_not_mutated_by_later_sync(ws):
+    ts = list(range(100))
+    closes = [100.0 + (i % 7) for i in ts]
+    state = ws.IndicatorState(ts, closes)
+    snap = state.sync(ts, closes)
+
+    state.sync(ts + [100], closes + [110.0])  # 다른 세션의 새 봉
+    state.sync(ts + [100], closes + [111.0])  # 같은 봉 라이브 틱
+
+    assert len(snap["rsi"]) == 100
+    assert all(len(series) == 100 for series in snap["ma"].values())
+    assert all(len(snap[k]) == 100 for k in ("macd", "signal", "bb_upper", "bb_mid", "bb_lower"))
+
+
+def assert_same_state(ws, inc, ref, tolerance=1e-9):
+    pairs = [(inc.ma[w], ref.ma[w]) for w in ws.MA_WINDOWS] + [(inc.ema[d], ref.ema[d]) for d in (12, 26)]
+    pairs += [(getattr(inc, k), getattr(ref, k)) for k in ("macd", "signal", "rsi", "bb_upper", "bb_mid", "bb_lower")]
+    for a, b in pairs:
+        assert len(a) == len(b)
+        for i, (x, y) in enumerate(zip(a, b)):
+            if y is None or (isinstance(y, float) and math.isnan(y)):
+                assert x is None or math.isnan(x), i
+            else:
+                assert x == pytest.approx(y, rel=tolerance, abs=tolerance), i
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_incremental_matches_rebuild(ws, seed):
+    # 빈 상태에서 봉을 하나씩 붙이고(_append) 마지막 봉을 틱으로 고치며(_revise) n < 26 구간부터 지표가 다 찰 때까지 비교
+    rng = random.Random(seed)
+    ts, closes = [], []
+    state = ws.IndicatorState([], [])
+    price = 100.0
+    for i in range(140):
+        price *= 1 + rng.gauss(0, 0.02)
+        ts.append(1_700_000_000 + i * 60)
+        closes.append(price)
+        state.sync(np.asarray(ts), np.asarray(closes))
+        for _ in range(rng.randrange(3)):
+            closes[-1] *= 1 + rng.gauss(0, 0.005)
+            state.sync(np.asarray(ts), np.asarray(closes))
+        assert_same_state(ws, state, ws.IndicatorState(ts, closes))
+
+
+def test_append_with_revised_previous_close(ws):
+    # 새 봉이 붙을 때 직전 봉 종가도 확정값으로 바뀌어 들어오는 경우
+    ts = list(range(40))
+    closes = [100.0 + (i % 5) for i in ts]
+    state = ws.IndicatorState(ts, closes)
+    closes = closes[:-1] + [97.5, 101.0]
+    state.sync(ts + [40], closes)
+    assert_same_state(ws, state, ws.IndicatorState(ts + [40], closes))
+
+
+def test_snapshot_from_start_is_the_visible_tail(ws):
+    ts = list(range(300))
+    closes = [100.0 + (i % 11) for i in ts]
+    state = ws.IndicatorState(ts, closes)
+    full, tail = state.sync(ts, closes), state.sync(ts, closes, start=250)
+    assert len(tail["rsi"]) == 50 and all(len(v) == 50 for v in tail["ma"].values())
+    np.testing.assert_array_equal(tail["bb_mid"], full["bb_mid"][250:])
+    np.testing.assert_array_equal(tail["ma"][20], full["ma"][20][250:])
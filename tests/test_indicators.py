@@ -0,0 +1,101 @@
+"""calc_ma / calc_ma_multi / calc_bb NumPy 구현과 기존 루프 구현의 동등성.
+
+누적합·벡터 평균은 덧셈 순서가 달라 비트 단위로 같지 않다 (가격 1e5 규모에서 1e-13 안팎 차이).
+그래서 가격 규모에 비례한 허용오차 TOLERANCE(상대 1e-9)로 비교하고, None 위치와 NaN 위치는 정확히 같아야 한다.
+"""
+import math
+import random
+
+import pytest
+
+TOLERANCE = 1e-9
+
+
+# 기존(baseline) 구현 그대로
+def legacy_calc_ma(prices, window):
+    ma = []
+    for i in range(len(prices)):
+        if i < window - 1: ma.append(None)
+        else: ma.append(sum(prices[i-window+1:i+1]) / window)
+    return ma
+
+
+def legacy_calc_bb(prices, window=20, num_std=2):
+    upper, mid, lower = [], [], []
+    for i in range(len(prices)):
+        if i < window - 1:
+            upper.append(None); mid.append(None); lower.append(None)
+        else:
+            subset = prices[i-window+1:i+1]
+            m = sum(subset) / window
+            std = (sum((x - m) ** 2 for x in subset) / window) ** 0.5
+            mid.append(m)
+            upper.append(m + num_std * std)
+            lower.append(m - num_std * std)
+    return upper, mid, lower
+
+
+def random_walk(n, seed, start=50_000.0, step=0.01):
+    rng = random.Random(seed)
+    prices, price = [], start
+    for _ in range(n):
+        price = max(1.0, price * (1 + rng.gauss(0, step)))
+        prices.append(price)
+    return prices
+
+
+def with_gaps(prices, seed, rate=0.02):
+    rng = random.Random(seed)
+    return [math.nan if rng.random() < rate else p for p in prices]
+
+
+SERIES = {
+    "empty": [],
+    "single": [100.0],
+    "short": [100.0, 101.5, 99.0],
+    "constant": [70_000.0] * 60,
+    "random_5y_1d": random_walk(1250, seed=1),
+    "random_30d_5m": random_walk(22 * 78, seed=2, step=0.002),
+    "penny": random_walk(500, seed=3, start=0.05),
+    "large_trend": [1e6 + 37.5 * i for i in range(5000)],
+    "nan_gaps": with_gaps(random_walk(800, seed=4), seed=5),
+    "nan_leading": [math.nan] * 5 + random_walk(100, seed=6),
+}
+
+
+def assert_series_close(new, old):
+    assert len(new) == len(old)
+    finite = [abs(v) for v in old if v is not None and not math.isnan(v)]
+    scale = max(finite, default=1.0)
+    for i, (a, b) in enumerate(zip(new, old)):
+        if b is None:
+            assert a is None, i
+        elif math.isnan(b):
+            assert a is not None and math.isnan(a), i
+        else:
+            assert a == pytest.approx(b, rel=TOLERANCE, abs=TOLERANCE * scale), i
+
+
+@pytest.mark.parametrize("name", SERIES)
+@pytest.mark.parametrize("window", [1, 3, 20, 120, 480, 2000])
+def test_calc_ma_matches_loop(ws, name, window):
+    prices = SERIES[name]
+    assert_series_close(ws.calc_ma(prices, window), legacy_calc_ma(prices, window))
+
+
+@pytest.mark.parametrize("name", SERIES)
+def test_calc_ma_multi_matches_loop(ws, name):
+    prices = SERIES[name]
+    result = ws.calc_ma_multi(prices, ws.MA_WINDOWS)
+    for window in ws.MA_WINDOWS:
+        assert_series_close(result[window], legacy_calc_ma(prices, window))
+
+
+@pytest.mark.parametrize("name", SERIES)
+@pytest.mark.parametrize("window, num_std", [(20, 2), (5, 1.5), (1, 2), (1000, 2)])
+def test_calc_bb_matches_loop(ws, name, window, num_std):
+    prices = SERIES[name]
+    new = ws.calc_bb(prices, window, num_std)
+    old = legacy_calc_bb(prices, window, num_std)
+    for new_band, old_band in zip(new, old):
+        assert_series_close(new_band, old_band)
@@ -0,0 +1,88 @@
+"""거래소 달력: 규칙 기반 휴장일과 차트 meta(currentTradingPeriod / 마지막 체결)로 판단하는 당일 휴장."""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+
+def ts(ws, exchange, y, m, d, hh, mm):
+    return datetime(y, m, d, hh, mm, tzinfo=ws._exchange_tz(exchange)).timestamp()
+
+
+@pytest.fixture
+def freshness(ws):
+    state = ws.get_freshness_state()
+    state.closed_days.clear()
+    yield state
+    state.closed_days.clear()
+
+
+@pytest.mark.parametrize("day", [
+    date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18), date(2025, 5, 26), date(2025, 9, 1), date(2025, 11, 27),
+    date(2026, 1, 19), date(2026, 2, 16), date(2026, 4, 3), date(2026, 5, 25), date(2026, 9, 7), date(2026, 11, 26),
+    date(2026, 7, 3),    # 7/4 토요일 → 금요일 대체
+    date(2027, 12, 24),  # 12/25 토요일 → 금요일 대체
+    date(2023, 1, 2),    # 1/1 일요일 → 월요일 대체
+])
+def test_us_floating_holidays(ws, day):
+    assert ws.is_holiday("US", day)
+
+
+@pytest.mark.parametrize("day", [date(2021, 12, 31), date(2025, 11, 26), date(2025, 4, 21), date(2026, 7, 6)])
+def test_us_regular_days(ws, day):
+    # 1/1이 토요일이어도 NYSE는 전년 12/31을 쉬지 않는다
+    assert not ws.is_holiday("US", day)
+
+
+def test_easter_holidays(ws):
+    assert ws._easter(2024) == date(2024, 3, 31)
+    assert ws._easter(2025) == date(2025, 4, 20)
+    assert ws.is_holiday("EURONEXT", date(2025, 4, 21))
+    assert ws.is_holiday("HKEX", date(2026, 4, 3))
+
+
+def test_krx_labour_day(ws):
+    assert ws.is_holiday("KRX", date(2026, 5, 1))
+    assert not ws.session_state("005930.KS", ts(ws, "KRX", 2026, 5, 1, 10, 0), use_observed=False)[0]
+
+
+def test_thanksgiving_skips_to_next_session(ws):
+    is_open, remaining = ws.session_state("AAPL", ts(ws, "US", 2025, 11, 27, 10, 0), use_observed=False)
+    assert not is_open
+    assert remaining == pytest.approx(timedelta(hours=23, minutes=30).total_seconds())
+
+
+def krx_meta(ws, period_day, last_trade):
+    start = ts(ws, "KRX", period_day.year, period_day.month, period_day.day, 9, 0)
+    return {"currentTradingPeriod": {"regular": {"start": start, "end": start + 6.5 * 3600}}, "regularMarketTime": last_trade}
+
+
+def test_trading_period_on_another_day_closes_exchange(ws, freshness):
+    # 설날처럼 달력에 없는 휴장일: meta의 정규장이 직전 거래일을 가리킨다
+    now = ts(ws, "KRX", 2026, 2, 17, 9, 5)
+    meta = krx_meta(ws, date(2026, 2, 13), ts(ws, "KRX", 2026, 2, 13, 15, 30))
+    assert ws.closed_today("005930.KS", meta, meta["regularMarketTime"], now) == ("KRX", date(2026, 2, 17))
+    freshness.closed_days["KRX"] = date(2026, 2, 17)
+    assert not ws.session_state("000660.KS", now)[0]
+
+
+def test_trading_period_today_keeps_open(ws):
+    now = ts(ws, "KRX", 2026, 2, 18, 9, 5)
+    meta = krx_meta(ws, date(2026, 2, 18), ts(ws, "KRX", 2026, 2, 17, 15, 30))
+    assert ws.closed_today("005930.KS", meta, meta["regularMarketTime"], now) is None
+
+
+def test_stale_last_trade_closes_only_that_symbol(ws, freshness):
+    # currentTradingPeriod가 없으면 개장 후 HOLIDAY_PROBE_MINUTES 지나도 체결 없는 종목만 닫는다
+    last = ts(ws, "KRX", 2026, 2, 13, 15, 30)
+    early = ts(ws, "KRX", 2026, 2, 17, 9, ws.HOLIDAY_PROBE_MINUTES - 1)
+    late = ts(ws, "KRX", 2026, 2, 17, 9, ws.HOLIDAY_PROBE_MINUTES + 1)
+    assert ws.closed_today("005930.KS", {}, last, early) is None
+    assert ws.closed_today("005930.KS", {}, last, late) == ("005930.KS", date(2026, 2, 17))
+    freshness.closed_days["005930.KS"] = date(2026, 2, 17)
+    assert not ws.session_state("005930.KS", late)[0]
+    assert ws.session_state("000660.KS", late)[0]
+
+
+def test_closed_today_ignores_off_hours(ws):
+    now = ts(ws, "KRX", 2026, 2, 17, 20, 0)
+    assert ws.closed_today("005930.KS", {"marketState": "CLOSED"}, 0, now) is None
@@ -0,0 +1,24 @@
+def test_prometheus_mixes_status_codes_and_exception_names(ws):
+    metrics = ws.Metrics()
+    host = "query1.finance.yahoo.com"
+    metrics.upstream_event(host, 200, 0.1, 1024)
+    metrics.upstream_event(host, "ReadTimeout", 5.0, 0)
+    metrics.upstream_event(host, 304, 0.05, 0)
+
+    text = metrics.prometheus()
+
+    assert f'stock_upstream_requests_total{{host="{host}",status="200"}} 1' in text
+    assert f'stock_upstream_requests_total{{host="{host}",status="ReadTimeout"}} 1' in text
+    assert f'stock_upstream_requests_total{{host="{host}",status="304"}} 1' in text
+
+
+def test_flush_never_raises(ws, tmp_path, monkeypatch):
+    metrics = ws.Metrics()
+    monkeypatch.setattr(metrics, "prometheus", lambda: 1 / 0)
+    metrics.flush(str(tmp_path / "metrics.prom"))  # 예외가 새면 렌더가 깨진다
+
+    metrics = ws.Metrics()
+    metrics.upstream_event("example.com", "ConnectionError", 0.2, 0)
+    path = tmp_path / "metrics.prom"
+    metrics.flush(str(path))
+    assert 'status="ConnectionError"' in path.read_text(encoding="utf-8")
@@ -0,0 +1,60 @@
+"""parse_naver_quote(바이트 스캐너)와 기존 BeautifulSoup 구현의 동등성.
+
+fixtures/naver/*.html은 손으로 쓴 sise.naver 모양 페이지(시세 표만), fixtures/naver/captured/는 실제 응답 원본
+(python benchmarks/bench_hot_paths.py --record-naver 로 녹화). 실제 페이지에서의 동등성은 녹화본이 있을 때만 검사된다.
+"""
+import glob
+import os
+import re
+
+import pytest
+from bs4 import BeautifulSoup
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "naver", "*.html")))
+CAPTURED = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "naver", "captured", "*.html")))
+
+
+# 기존(baseline) get_naver_stock_data 본문 그대로 (res.text = EUC-KR 디코드본)
+def legacy_parse(text):
+    soup = BeautifulSoup(text, 'html.parser')
+    price_str = re.sub(r'[^\d]', '', soup.select_one('#_nowVal').text)
+    rate_str = re.sub(r'[^\d\.\-]', '', soup.select_one('#_rate').text)
+    vol_str = re.sub(r'[^\d]', '', soup.select_one('#_quant').text)
+    amount_str = re.sub(r'[^\d]', '', soup.select_one('#_amount').text)
+    return {
+        "price": float(price_str),
+        "rate": float(rate_str),
+        "volume": int(vol_str),
+        "amount": int(amount_str) * 1000000
+    }
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_matches_beautifulsoup_parser(ws, path):
+    content = read(path)
+    assert ws.parse_naver_quote(content) == legacy_parse(content.decode("euc-kr"))
+
+
+def test_byte_scanner_finds_all_fields_without_fallback(ws):
+    for path in FIXTURES:
+        if "layout_changed" in path: continue
+        assert set(ws.scan_naver_fields(read(path))) == set(ws.NAVER_FIELDS)
+
+
+def test_layout_change_falls_back_to_dom_parser(ws):
+    content = read(next(p for p in FIXTURES if "layout_changed" in p))
+    assert "_nowVal" not in ws.scan_naver_fields(content)
+    assert ws.parse_naver_quote(content)["price"] == 71500.0
+
+
+@pytest.mark.skipif(not CAPTURED, reason="녹화된 실제 sise.naver 페이지 없음 (bench_hot_paths.py --record-naver)")
+@pytest.mark.parametrize("path", CAPTURED, ids=os.path.basename)
+def test_captured_page_matches_beautifulsoup_parser(ws, path):
+    content = read(path)
+    assert set(ws.scan_naver_fields(content)) == set(ws.NAVER_FIELDS)
+    assert ws.parse_naver_quote(content) == legacy_parse(content.decode("euc-kr", errors="replace"))
@@ -0,0 +1,59 @@
+import json
+
+import numpy as np
+import pytest
+
+KST = 9 * 3600
+OPEN = 1_700_006_400  # 2023-11-15 09:00 KST
+
+
+def five_minute_bars(n):
+    ts = OPEN + 300 * np.arange(n, dtype=np.int64)
+    close = 100.0 + np.arange(n, dtype=np.float64)
+    return close, ts
+
+
+@pytest.fixture
+def bus(ws, tmp_path):
+    ticks = [
+        {"symbol": "005930.KS", "ts": OPEN + 2 * 300 + 120, "price": 105.0, "rate": 1.0, "volume": 10},   # 마지막 봉 안
+        {"symbol": "005930.KS", "ts": OPEN + 2 * 300 + 200, "price": 105.0, "rate": 1.0, "volume": 10},   # 값 동일 → 발행 안 함
+        {"symbol": "005930.KS", "ts": OPEN + 3 * 300 + 40, "price": 98.0, "rate": -1.0, "volume": 12},    # 다음 5분 버킷
+    ]
+    path = tmp_path / "ticks.jsonl"
+    path.write_text("\n".join(json.dumps(t) for t in ticks), encoding="utf-8")
+    bus = ws.QuoteBus(ws.ReplayQuoteFeed(str(path)), poll_every=3600)
+    bus.subscribe("005930.KS")
+    return bus
+
+
+def test_replayed_ticks_revise_then_append_bars(ws, bus):
+    close, ts = five_minute_bars(3)
+    bars = ws.Bars(ts, close.copy(), close + 1, close - 1, close.copy(), np.full(3, 5.0))
+
+    bus._poll("005930.KS")
+    tick = bus.latest("005930.KS")
+    assert tick["seq"] == 1
+    revised = ws.apply_quote_tick(bars, tick, "분봉", KST)
+    assert len(revised) == 3
+    assert revised.close[-1] == 105.0 and revised.high[-1] == 105.0
+    assert revised.close[:-1].tolist() == bars.close[:-1].tolist()
+    assert bars.close[-1] == 102.0  # 원본은 그대로
+
+    bus._poll("005930.KS")  # 같은 값 → seq 유지
+    assert bus.latest("005930.KS")["seq"] == 1
+
+    bus._poll("005930.KS")
+    tick = bus.latest("005930.KS")
+    assert tick["seq"] == 2
+    appended = ws.apply_quote_tick(revised, tick, "분봉", KST)
+    assert len(appended) == 4
+    assert appended.ts[-1] == OPEN + 3 * 300  # 버킷 시작으로 맞춤
+    assert (appended.open[-1], appended.high[-1], appended.low[-1], appended.close[-1]) == (98.0,) * 4
+    assert appended.close[-2] == 105.0
+
+
+def test_stale_tick_is_ignored(ws):
+    close, ts = five_minute_bars(3)
+    bars = ws.Bars(ts, close, close, close, close, np.ones(3))
+    assert ws.apply_quote_tick(bars, {"ts": OPEN, "price": 1.0}, "분봉", KST) is bars
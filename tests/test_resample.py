@@ -0,0 +1,64 @@
+"""분봉 로컬 리샘플링: 버킷 경계는 첫 봉이 아니라 거래소 시간표의 개장 시각(점심 휴장 뒤 오후장 포함)에 맞춘다."""
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+
+def local_ts(ws, exchange, hh, mm, day=(2026, 3, 10)):
+    return int(datetime(*day, hh, mm, tzinfo=ws._exchange_tz(exchange)).timestamp())
+
+
+def five_minute_bars(ws, exchange, spans, day=(2026, 3, 10)):
+    # spans = [((시, 분), (시, 분))] 구간마다 끝을 빼고 5분 간격 봉
+    ts = []
+    for (sh, sm), (eh, em) in spans:
+        ts.extend(range(local_ts(ws, exchange, sh, sm, day), local_ts(ws, exchange, eh, em, day), 300))
+    ts = np.asarray(ts, dtype=np.int64)
+    close = np.arange(1, len(ts) + 1, dtype=float)
+    return ws.Bars(ts, close, close + 0.5, close - 0.5, close, np.ones(len(ts), dtype=np.int64))
+
+
+def labels(ws, exchange, bars):
+    tz = ws._exchange_tz(exchange)
+    return [datetime.fromtimestamp(int(t), tz).strftime("%H:%M") for t in bars.ts]
+
+
+def test_late_first_bar_keeps_open_aligned_buckets(ws):
+    # 첫 체결이 09:10에 찍혀도 30분봉은 09:00 / 09:30 / 10:00 경계
+    bars = five_minute_bars(ws, "KRX", [((9, 10), (10, 30))])
+    out = ws.resample_intraday(bars, 30, "KRX")
+    assert labels(ws, "KRX", out) == ["09:00", "09:30", "10:00"]
+    assert out.volume.tolist() == [4, 6, 6]
+    assert out.open[0] == bars.open[0] and out.close[-1] == bars.close[-1]
+
+
+def test_without_exchange_anchors_to_first_bar(ws):
+    bars = five_minute_bars(ws, "KRX", [((9, 10), (10, 30))])
+    assert labels(ws, "KRX", ws.resample_intraday(bars, 30)) == ["09:10", "09:40", "10:10"]
+
+
+def test_tse_lunch_break_restarts_at_afternoon_open(ws):
+    bars = five_minute_bars(ws, "TSE", [((9, 0), (11, 30)), ((12, 30), (15, 30))])
+    out = ws.resample_intraday(bars, 60, "TSE")
+    assert labels(ws, "TSE", out) == ["09:00", "10:00", "11:00", "12:30", "13:30", "14:30"]
+    assert out.volume.tolist() == [12, 12, 6, 12, 12, 12]
+
+
+def test_hkex_lunch_break_restarts_at_afternoon_open(ws):
+    bars = five_minute_bars(ws, "HKEX", [((9, 30), (12, 0)), ((13, 0), (16, 0))])
+    out = ws.resample_intraday(bars, 60, "HKEX")
+    assert labels(ws, "HKEX", out) == ["09:30", "10:30", "11:30", "13:00", "14:00", "15:00"]
+    assert out.high.tolist() == pytest.approx([bars.high[11], bars.high[23], bars.high[29],
+                                               bars.high[41], bars.high[53], bars.high[65]])
+
+
+def test_multiple_days_each_anchor_to_their_open(ws):
+    day1 = five_minute_bars(ws, "US", [((9, 45), (10, 30))], day=(2026, 3, 9))
+    day2 = five_minute_bars(ws, "US", [((9, 35), (10, 30))], day=(2026, 3, 10))
+    bars = ws.Bars(*(np.concatenate([a, b]) for a, b in zip(
+        (day1.ts, day1.open, day1.high, day1.low, day1.close, day1.volume),
+        (day2.ts, day2.open, day2.high, day2.low, day2.close, day2.volume))))
+    out = ws.resample_intraday(bars, 30, "US")
+    assert labels(ws, "US", out) == ["09:30", "10:00", "09:30", "10:00"]
+    assert out.volume.tolist() == [3, 6, 5, 6]
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+DAY = 86400
+
+
+class FakeBarStore:
+    def __init__(self):
+        self.appends = []
+
+    def read_meta(self, symbol, interval):
+        return None
+
+    def append(self, symbol, interval, rows, **kwargs):
+        self.appends.append((symbol, interval, rows, kwargs))
+
+
+@pytest.fixture
+def bar_store(ws, monkeypatch):
+    store = FakeBarStore()
+    monkeypatch.setattr(ws, "get_bar_store", lambda: store)
+    return store
+
+
+def chart_data(ws, stamps, closes, gmtoffset=32400):
+    n = len(stamps)
+    close = np.asarray(closes, dtype=np.float64)
+    columns = {"timestamp": np.asarray(stamps, dtype=np.int64), "open": close.copy(), "high": close + 1,
+               "low": close - 1, "close": close, "volume": np.full(n, 1000.0)}
+    return ws.ChartData({"gmtoffset": gmtoffset, "currency": "KRW"}, {}, columns)
+
+
+def daily_stamps(ws, n, end=None):
+    # 최근 n 거래일의 09:00 KST (UTC 00:00)
+    end = end if end is not None else int(ws.time.time()) // DAY * DAY
+    return [end - (n - 1 - i) * DAY for i in range(n)]
+
+
+def test_cache_hit_does_not_remerge_or_persist(ws, bar_store, monkeypatch):
+    chart = chart_data(ws, daily_stamps(ws, 30), np.arange(30) + 100.0)
+    monkeypatch.setattr(ws, "get_chart_bars", lambda symbol, rng, interval: chart)
+
+    first = ws.get_series_chart("TEST-HIT.KS", "1y", "1d")
+    for _ in range(5):
+        assert ws.get_series_chart("TEST-HIT.KS", "1y", "1d") is not None
+    assert len(bar_store.appends) == 1
+    assert len(first.columns["timestamp"]) == 30
+
+
+def merged_entry(ws, interval, stamps, closes, rng="1y"):
+    entry = ws.SeriesEntry(interval, f"TEST-{interval}.KS")
+    entry.merge(chart_data(ws, stamps, closes), rng)
+    return entry
+
+
+def test_in_progress_bar_is_replaced_not_duplicated(ws, bar_store):
+    # 야후는 진행 중인 일봉을 마지막 체결 시각(오늘 10:23, 14:41 KST)으로 찍는다
+    stamps = daily_stamps(ws, 10)
+    entry = merged_entry(ws, "1d", stamps[:-1] + [stamps[-1] + 83 * 60], np.arange(10) + 100.0)
+
+    entry.merge(chart_data(ws, [stamps[-1] + 341 * 60], [120.0]), "1d")
+    assert len(entry.bars["timestamp"]) == 10
+    assert entry.bars["timestamp"][-1] == stamps[-1] + 341 * 60
+    assert entry.bars["close"][-1] == 120.0
+
+    # 다음 날 꼬리는 확정된 어제 봉(09:00 KST) + 새 진행 봉으로 온다
+    next_day = stamps[-1] + DAY
+    entry.merge(chart_data(ws, [stamps[-1], next_day + 60], [121.0, 122.0]), "5d")
+    assert entry.bars["timestamp"][-2:].tolist() == [stamps[-1], next_day + 60]
+    assert entry.bars["close"][-3:].tolist() == [108.0, 121.0, 122.0]
+
+
+def test_tail_overlapping_several_bars_replaces_them(ws, bar_store):
+    stamps = daily_stamps(ws, 30)
+    entry = merged_entry(ws, "1d", stamps, np.arange(30) + 100.0)
+
+    entry.merge(chart_data(ws, stamps[-5:], [200.0, 201.0, 202.0, 203.0, 204.0]), "5d")
+    assert entry.bars["timestamp"].tolist() == stamps
+    assert entry.bars["close"][:25].tolist() == (np.arange(25) + 100.0).tolist()
+    assert entry.bars["close"][-5:].tolist() == [200.0, 201.0, 202.0, 203.0, 204.0]
+    # 디스크에도 겹친 첫 봉부터 교체를 요청
+    _, _, rows, kwargs = bar_store.appends[-1]
+    assert kwargs["replace_from"] == stamps[-5] and len(rows) == 5
+
+
+def month_stamp(ws, year, month, day=1, hour=0):
+    return int(ws.datetime(year, month, day, hour, tzinfo=ws.KST).timestamp())
+
+
+def test_monthly_bucket_merge(ws, bar_store):
+    months = [(2026, m) for m in range(1, 11)]
+    stamps = [month_stamp(ws, y, m) for y, m in months[:-1]] + [month_stamp(ws, 2026, 10, 14, 15)]
+    entry = merged_entry(ws, "1mo", stamps, np.arange(10) + 100.0, rng="max")
+
+    # 진행 중인 10월 봉(10/14 체결 시각)은 같은 달 새 값으로, 9월은 확정값으로 교체
+    tail = [month_stamp(ws, 2026, 9), month_stamp(ws, 2026, 10, 16, 15)]
+    entry.merge(chart_data(ws, tail, [150.0, 151.0]), "3mo")
+    assert len(entry.bars["timestamp"]) == 10
+    assert entry.bars["timestamp"][-2:].tolist() == tail
+    assert entry.bars["close"][-3:].tolist() == [107.0, 150.0, 151.0]
+
+
+@pytest.mark.parametrize("days_behind, rng, expected", [
+    (0, "1y", "5d"), (3, "1y", "5d"), (20, "1y", "1mo"), (45, "1y", "3mo"), (400, "1y", "1y"), (3, "5d", "5d"),
+])
+def test_tail_range_covers_the_gap(ws, bar_store, days_behind, rng, expected):
+    end = int(ws.time.time()) - days_behind * DAY
+    entry = merged_entry(ws, "1d", [end - 2 * DAY, end - DAY, end], [1.0, 2.0, 3.0], rng="max")
+    assert entry.tail_range(rng) == expected
+
+
+def test_intraday_tail_range_is_one_day(ws):
+    now = int(ws.time.time())
+    entry = merged_entry(ws, "5m", [now - 900, now - 600], [1.0, 2.0], rng="1mo")
+    assert entry.tail_range("1mo") == "1d"
+
+
+def test_tail_range_without_bars_is_the_requested_range(ws):
+    assert ws.SeriesEntry("1d", "TEST-EMPTY.KS").tail_range("1y") == "1y"
@@ -0,0 +1,104 @@
+import threading
+import time
+
+
+def age_entries(ws, fn, seconds):
+    # fn 캐시의 모든 항목을 seconds만큼 과거에 받은 것으로 만든다
+    state = ws.get_swr_registry()["states"][fn.__wrapped__.__qualname__]
+    with state.lock:
+        for key, (value, fetched_at) in list(state.entries.items()):
+            state.entries[key] = (value, fetched_at - seconds)
+
+
+def test_failed_fetch_is_cached_only_briefly(ws):
+    calls = []
+    results = [None, {"ok": 1}]
+
+    @ws.swr_cache(ttl=lambda symbol: ws.CLOSED_TTL_MAX)
+    def fetch(symbol):
+        calls.append(symbol)
+        return results[len(calls) - 1]
+
+    assert fetch("AAPL") is None
+    assert fetch("AAPL") is None  # NEGATIVE_TTL 안에서는 실패도 캐시
+    assert len(calls) == 1
+
+    age_entries(ws, fetch, ws.NEGATIVE_TTL + 1)
+    assert fetch("AAPL") == {"ok": 1}  # 장 밖 6시간 TTL이 아니라 짧은 TTL 뒤 재요청
+    assert len(calls) == 2
+
+    age_entries(ws, fetch, ws.NEGATIVE_TTL + 1)
+    assert fetch("AAPL") == {"ok": 1}  # 성공값은 원래 TTL
+    assert len(calls) == 2
+
+
+def test_concurrent_misses_share_one_upstream_call(ws):
+    calls, release = [], threading.Event()
+
+    @ws.swr_cache(ttl=60)
+    def fetch(symbol):
+        calls.append(symbol)
+        release.wait(5)
+        return {"symbol": symbol}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetch("005930.KS"))) for _ in range(16)]
+    for t in threads: t.start()
+    time.sleep(0.2)  # 모두 같은 flight에 붙을 시간
+    release.set()
+    for t in threads: t.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 16 and all(r is results[0] for r in results)
+
+
+class HeldPool:
+    # 제출된 작업을 바로 돌리지 않는 풀 (워커가 모두 바쁜 상황)
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, fn, *args):
+        self.tasks.append((fn, args))
+
+    def drain(self):
+        tasks, self.tasks = self.tasks, []
+        for fn, args in tasks: fn(*args)
+
+
+def test_stale_hits_queue_a_single_revalidation(ws, monkeypatch):
+    pool = HeldPool()
+    monkeypatch.setattr(ws, "get_fetch_pool", lambda: pool)
+    calls = []
+
+    @ws.swr_cache(ttl=60, stale_ttl=300)
+    def fetch(symbol):
+        calls.append(symbol)
+        return len(calls)
+
+    assert fetch("AAPL") == 1
+    age_entries(ws, fetch, 61)
+    assert [fetch("AAPL") for _ in range(20)] == [1] * 20  # stale 값을 즉시 반환
+    assert len(pool.tasks) == 1
+
+    pool.drain()
+    assert len(calls) == 2
+    assert fetch("AAPL") == 2
+
+
+def test_queued_revalidation_skips_when_already_refreshed(ws, monkeypatch):
+    pool = HeldPool()
+    monkeypatch.setattr(ws, "get_fetch_pool", lambda: pool)
+    calls = []
+
+    @ws.swr_cache(ttl=60, stale_ttl=300)
+    def fetch(symbol):
+        calls.append(symbol)
+        return len(calls)
+
+    fetch("AAPL")
+    age_entries(ws, fetch, 61)
+    fetch("AAPL")
+    with ws.swr_bypass():
+        assert fetch("AAPL") == 2  # 줄 선 작업보다 먼저 다른 경로가 갱신
+    pool.drain()
+    assert len(calls) == 2
@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def index(ws):
+    import csv
+    with open(ws.SYMBOLS_FILE, encoding="utf-8") as f:
+        return ws.SymbolIndex(list(csv.DictReader(f)))
+
+
+@pytest.mark.parametrize("query", ["GME", "AMC", "APP", "QQQM", "SPYG"])
+def test_unlisted_tickers_are_left_to_remote_search(index, query):
+    # 시드에 없는 실제 티커가 GM / MC.PA / AAPL / QQQ / SPY 로 바뀌면 안 된다
+    assert index.lookup(query) is None
+    assert index.suggest(query) is None
+
+
+@pytest.mark.parametrize("query, symbol", [("AAPL", "AAPL"), ("aapl", "AAPL"), ("삼성전자", "005930.KS"), ("삼전", "005930.KS")])
+def test_exact_hits_resolve_locally(index, query, symbol):
+    assert index.lookup(query)["symbol"] == symbol
+
+
+@pytest.mark.parametrize("query, symbol", [("삼성젼자", "005930.KS"), ("하이닉", "000660.KS")])
+def test_name_queries_fall_back_to_prefix_and_typo_matching(index, query, symbol):
+    assert index.lookup(query) is None
+    assert index.suggest(query)["symbol"] == symbol
@@ -1,747 +1,2868 @@
-import streamlit as st
-import requests
-import re
-import time
-import math
-from datetime import datetime, timedelta, timezone
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import xml.etree.ElementTree as ET
-import urllib.parse
-from bs4 import BeautifulSoup
-from collections import defaultdict
-
-KST = timezone(timedelta(hours=9))
-
-st.set_page_config(page_title="CEO 글로벌 터미널", page_icon="🌍", layout="wide")
-
-st.markdown("""
-    <style>
-    .news-card { background: #f8f9fa; border-left: 4px solid #00b4d8; padding: 15px; border-radius: 5px; margin-bottom: 10px; }
-    .news-title { font-size: 16px; font-weight: bold; color: #1E88E5 !important; text-decoration: none; }
-    .delisted-alert { color: white; background-color: #ff4b4b; padding: 20px; border-radius: 10px; text-align: center; font-size: 24px; font-weight: bold; margin: 20px 0; }
-    .badge { color: white; padding: 3px 8px; border-radius: 12px; font-size: 14px; font-weight: bold; margin-left: 10px; vertical-align: middle; }
-    .closed-badge { background-color: #555; color: white; padding: 3px 8px; border-radius: 12px; font-size: 14px; font-weight: bold; margin-left: 10px; vertical-align: middle; }
-    </style>
-""", unsafe_allow_html=True)
-
-vip_dict = {
-    "현대자동차": "005380.KS", "네이버": "035420.KS", "카카오": "035720.KS",
-    "삼성전자": "005930.KS", "엔비디아": "NVDA", "테슬라": "TSLA",
-    "애플": "AAPL", "마이크로소프트": "MSFT",
-    "토요타 (일본)": "7203.T", "토요타 (미국)": "TM",
-    "TSMC (대만)": "2330.TW", "TSMC (미국)": "TSM",
-    "소니 (일본)": "6758.T", "소니 (미국)": "SONY",
-    "알리바바 (홍콩)": "9988.HK", "알리바바 (미국)": "BABA",
-    "ASML (네덜란드)": "ASML.AS", "ASML (미국)": "ASML",
-    "루이비통 (프랑스)": "MC.PA", "루이비통 (미국)": "LVMUY"
-}
-
-# ==========================================
-# 🚀 [엔진 1] 야후 파이낸스 & API 로직
-# ==========================================
-@st.cache_data(ttl=10, show_spinner=False)
-def get_cached_json(url):
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    try:
-        res = requests.get(url, headers=headers, timeout=5)
-        if res.status_code == 200:
-            return res.json()
-    except Exception:
-        return None
-    return None
-
-@st.cache_data(ttl=86400, show_spinner=False)
-def translate_to_english(text):
-    if re.match(r'^[a-zA-Z0-9\.\-\s]+$', text.strip()):
-        return text, True
-    try:
-        url = f"https://translate.googleapis.com/translate_a/single?client=gtx&sl=ko&tl=en&dt=t&q={text}"
-        res = requests.get(url, timeout=3)
-        if res.status_code == 200:
-            return res.json()[0][0][0], True
-    except:
-        pass
-    return text, False
-
-@st.cache_data(ttl=10, show_spinner=False)
-def get_quick_quote(symbol):
-    url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=5d&interval=1d"
-    res = get_cached_json(url)
-    if res and res.get('chart') and res['chart'].get('result'):
-        result = res['chart']['result'][0]
-        meta = result['meta']
-        quotes = result['indicators']['quote'][0]
-        valid_closes = [p for p in quotes.get('close', []) if p is not None]
-        price = meta.get('regularMarketPrice', valid_closes[-1] if valid_closes else 0)
-        prev = valid_closes[-2] if len(valid_closes) >= 2 else meta.get('previousClose', price)
-        return price, ((price - prev) / prev * 100) if prev else 0
-    return 0, 0
-
-# ==========================================
-# 🇰🇷 [엔진 2] 네이버 증권 실시간 엔진
-# ==========================================
-@st.cache_data(ttl=10, show_spinner=False)
-def get_naver_stock_data(code):
-    url = f"https://finance.naver.com/item/sise.naver?code={code}"
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36'}
-    try:
-        res = requests.get(url, headers=headers, timeout=5)
-        soup = BeautifulSoup(res.text, 'html.parser')
-        price_str = re.sub(r'[^\d]', '', soup.select_one('#_nowVal').text)
-        rate_str = re.sub(r'[^\d\.\-]', '', soup.select_one('#_rate').text)
-        vol_str = re.sub(r'[^\d]', '', soup.select_one('#_quant').text)
-        amount_str = re.sub(r'[^\d]', '', soup.select_one('#_amount').text)
-        return {
-            "price": float(price_str),
-            "rate": float(rate_str),
-            "volume": int(vol_str),
-            "amount": int(amount_str) * 1000000
-        }
-    except Exception:
-        return None
-
-# ==========================================
-# 🧠 뉴스 및 차트 지표 계산 로직
-# ==========================================
-@st.cache_data(ttl=300, show_spinner=False)
-def get_cached_news(original_name):
-    clean_search_term = original_name.split('(')[0].strip()
-    encoded_query = urllib.parse.quote(f"{clean_search_term} 주식")
-    news_url = f"https://news.google.com/rss/search?q={encoded_query}+when:7d&hl=ko&gl=KR&ceid=KR:ko"
-    news_list = []
-    try:
-        res = requests.get(news_url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=5)
-        if res.status_code == 200:
-            root = ET.fromstring(res.content)
-            for item in root.findall('.//item')[:5]:
-                title = item.find('title').text
-                link = item.find('link').text
-                source_elem = item.find('source')
-                source = source_elem.text if source_elem is not None else "구글 뉴스"
-                if " - " in title: title = " - ".join(title.split(" - ")[:-1])
-                news_list.append({"title": title, "link": link, "source": source})
-    except Exception:
-        pass
-    return news_list, clean_search_term
-
-def calc_ma(prices, window):
-    ma = []
-    for i in range(len(prices)):
-        if i < window - 1: ma.append(None)
-        else: ma.append(sum(prices[i-window+1:i+1]) / window)
-    return ma
-
-def calc_ema(prices, days):
-    ema = [None] * len(prices)
-    if not prices or len(prices) < days: return ema
-    k = 2 / (days + 1)
-    ema[days-1] = sum(prices[:days]) / days
-    for i in range(days, len(prices)): ema[i] = prices[i] * k + ema[i-1] * (1 - k)
-    return ema
-
-def calc_macd(prices):
-    ema12 = calc_ema(prices, 12)
-    ema26 = calc_ema(prices, 26)
-    macd = []
-    for e12, e26 in zip(ema12, ema26):
-        if e12 is not None and e26 is not None: macd.append(e12 - e26)
-        else: macd.append(None)
-    valid_idx = [i for i, m in enumerate(macd) if m is not None]
-    signal = [None] * len(prices)
-    if valid_idx and len(valid_idx) >= 9:
-        first_idx = valid_idx[0]
-        signal[first_idx+8] = sum(macd[first_idx:first_idx+9]) / 9
-        k = 2 / (9 + 1)
-        for i in range(first_idx+9, len(prices)): signal[i] = macd[i] * k + signal[i-1] * (1 - k)
-    return macd, signal
-
-def calc_rsi(prices, period=14):
-    rsi = [None] * len(prices)
-    if len(prices) < period + 1: return rsi
-    gains, losses = [], []
-    for i in range(1, len(prices)):
-        change = prices[i] - prices[i-1]
-        gains.append(change if change > 0 else 0)
-        losses.append(-change if change < 0 else 0)
-    avg_gain = sum(gains[:period]) / period
-    avg_loss = sum(losses[:period]) / period
-    for i in range(period, len(prices)):
-        if i > period:
-            change = prices[i] - prices[i-1]
-            gain = change if change > 0 else 0
-            loss = -change if change < 0 else 0
-            avg_gain = (avg_gain * (period - 1) + gain) / period
-            avg_loss = (avg_loss * (period - 1) + loss) / period
-        if avg_loss == 0: rsi[i] = 100
-        else:
-            rs = avg_gain / avg_loss
-            rsi[i] = 100 - (100 / (1 + rs))
-    return rsi
-
-def calc_bb(prices, window=20, num_std=2):
-    upper, mid, lower = [], [], []
-    for i in range(len(prices)):
-        if i < window - 1:
-            upper.append(None); mid.append(None); lower.append(None)
-        else:
-            subset = prices[i-window+1:i+1]
-            m = sum(subset) / window
-            std = (sum((x - m) ** 2 for x in subset) / window) ** 0.5
-            mid.append(m)
-            upper.append(m + num_std * std)
-            lower.append(m - num_std * std)
-    return upper, mid, lower
-
-# ✅ [추가] 월봉 → 연봉 집계
-def aggregate_to_yearly(clean_data):
-    yearly = defaultdict(list)
-    for row in clean_data:
-        yearly[row[0].year].append(row)
-    result = []
-    for year in sorted(yearly.keys()):
-        rows = sorted(yearly[year], key=lambda x: x[0])
-        if not rows: continue
-        o = rows[0][1]
-        h = max(r[2] for r in rows)
-        l = min(r[3] for r in rows)
-        c = rows[-1][4]
-        v = sum(r[5] for r in rows)
-        result.append((rows[0][0], o, h, l, c, v))
-    return result
-
-def format_abbrev(val, sym):
-    if val == 0: return f"{sym}0"
-    if val >= 1_000_000_000_000: return f"{sym}{val/1_000_000_000_000:.2f}T"
-    if val >= 1_000_000_000: return f"{sym}{val/1_000_000_000:.2f}B"
-    if val >= 1_000_000: return f"{sym}{val/1_000_000:.2f}M"
-    if val >= 1_000: return f"{sym}{val/1_000:.2f}K"
-    return f"{sym}{val:.2f}"
-
-@st.cache_data(ttl=172800, show_spinner=False)
-def get_financial_data(symbol):
-    try:
-        is_kr = symbol.endswith(".KS") or symbol.endswith(".KQ")
-        if not is_kr:
-            return None
-        code = symbol.split('.')[0]
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36'}
-        result = {}
-
-        try:
-            int_url = f"https://m.stock.naver.com/api/stock/{code}/integration"
-            int_res = requests.get(int_url, headers=headers, timeout=8)
-            int_data = int_res.json()
-            total_infos = {item['key']: item['value'] for item in int_data.get('totalInfos', [])}
-            result['시가총액'] = total_infos.get('시총', 'N/A')
-            result['PER'] = total_infos.get('PER', 'N/A')
-            result['PBR'] = total_infos.get('PBR', 'N/A')
-            result['EPS'] = total_infos.get('EPS', 'N/A')
-            result['배당수익률'] = total_infos.get('배당수익률', 'N/A')
-        except:
-            result['시가총액'] = 'N/A'
-
-        url = f"https://m.stock.naver.com/api/stock/{code}/finance/annual"
-        res = requests.get(url, headers=headers, timeout=8)
-        data = res.json()
-
-        title_list = data['financeInfo']['trTitleList']
-        actual_keys = [t['key'] for t in title_list if t.get('isConsensus', 'N') == 'N']
-        if not actual_keys:
-            return None
-
-        latest_key = actual_keys[-1]
-        prev_key = actual_keys[-2] if len(actual_keys) >= 2 else None
-
-        def get_val(row, key):
-            try:
-                return float(str(row['columns'][key]['value']).replace(',', ''))
-            except:
-                return None
-
-        def calc_pct(now, prev_val):
-            if now is None or prev_val is None: return 'N/A'
-            if prev_val < 0 and now >= 0: return '흑자전환'
-            if prev_val >= 0 and now < 0: return '적자전환'
-            if prev_val < 0 and now < 0: return '적자지속'
-            if prev_val != 0:
-                pct = ((now - prev_val) / abs(prev_val)) * 100
-                return f"{pct:+.1f}%"
-            return 'N/A'
-
-        row_list = data['financeInfo']['rowList']
-        title_map = {
-            '매출액': ('매출', '매출_증감'),
-            '영업이익': ('영업이익', '영업이익_증감'),
-            '당기순이익': ('순이익', '순이익_증감'),
-        }
-
-        for row in row_list:
-            t = row.get('title', '')
-            if t in title_map:
-                key_now, key_pct = title_map[t]
-                val_now = get_val(row, latest_key)
-                val_prev = get_val(row, prev_key) if prev_key else None
-                if val_now is not None:
-                    result[key_now] = f"{int(val_now):,}억원"
-                    result[key_pct] = calc_pct(val_now, val_prev)
-
-        result.setdefault('매출', 'N/A')
-        result.setdefault('영업이익', 'N/A')
-        result.setdefault('순이익', 'N/A')
-        result.setdefault('매출_증감', 'N/A')
-        result.setdefault('영업이익_증감', 'N/A')
-        result.setdefault('순이익_증감', 'N/A')
-        result.setdefault('시가총액', 'N/A')
-        result.setdefault('PER', 'N/A')
-        result.setdefault('PBR', 'N/A')
-        result.setdefault('EPS', 'N/A')
-        result.setdefault('배당수익률', 'N/A')
-
-        return result
-    except Exception:
-        return None
-
-# ==========================================
-# 🖥️ UI 및 메인 실행부
-# ==========================================
-with st.sidebar:
-    st.header("⚡ 라이트 터미널")
-    st.write("불필요한 데이터 통신을 줄여 실시간 반응 속도를 극대화한 버전입니다.")
-    st.markdown("---")
-    st.caption("CEO 터미널 V13.9 (라이브모드 차트 포함 + 연봉/월봉/축레이블 패치)")
-
-st.title("🌍 글로벌 주식 터미널")
-
-if "search_input" not in st.session_state: st.session_state.search_input = "삼성전자"
-if "vip_dropdown" not in st.session_state: st.session_state.vip_dropdown = "🔽 주요 종목 선택"
-
-def apply_vip_search():
-    if st.session_state.vip_dropdown != "🔽 주요 종목 선택":
-        st.session_state.search_input = st.session_state.vip_dropdown
-        st.session_state.vip_dropdown = "🔽 주요 종목 선택"
-
-col1, col2, col3 = st.columns([4, 2, 2])
-with col1: search_term = st.text_input("🔍 직접 검색 (종목명/티커 입력 후 Enter)", key="search_input")
-with col2: st.selectbox("⭐ 빠른 검색", ["🔽 주요 종목 선택"] + list(vip_dict.keys()), key="vip_dropdown", on_change=apply_vip_search)
-with col3:
-    st.write("")
-    dark_mode = False
-    live_mode = st.toggle("🔴 라이브 모드 (10초 갱신)")
-    use_candle = True
-    show_bb = st.toggle("📐 볼린저 밴드", value=False)
-    bottom_indicator = "MACD"
-
-timeframe = st.radio("⏳ 조회 기간 선택", ["분봉", "일봉", "월봉", "연봉"], horizontal=True, index=1)
-st.markdown("---")
-
-original_name = search_term.strip()
-symbol = ""
-official_name = original_name
-
-if original_name in vip_dict:
-    symbol = vip_dict[original_name]
-else:
-    english_name, trans_success = translate_to_english(original_name)
-    quotes = []  # ← 이 한 줄 추가!
-    if trans_success:
-        search_res = get_cached_json(f"https://query2.finance.yahoo.com/v1/finance/search?q={english_name}")
-        if search_res and search_res.get('quotes') and len(search_res['quotes']) > 0:
-            quotes = search_res['quotes']  # ← 들여쓰기도 수정
-    # 한국어 검색이면 .KS/.KQ 우선
-    if quotes and not re.match(r'^[a-zA-Z0-9\.\-\s]+$', original_name.strip()):
-        kr_quotes = [q for q in quotes if q.get('symbol','').endswith('.KS') or q.get('symbol','').endswith('.KQ')]
-        if kr_quotes:
-            quotes = kr_quotes
-    if quotes:
-        symbol = quotes[0]['symbol']
-        official_name = quotes[0].get('shortname', english_name)
-
-if not symbol:
-    st.markdown(f'<div class="delisted-alert">🚨 상장폐지 또는 검색 불가 ({original_name})<br><span style="font-size: 16px; font-weight: normal;">야후 파이낸스에서 완전히 삭제되었거나 종목명을 잘못 입력했습니다.</span></div>', unsafe_allow_html=True)
-    st.stop()
-
-# ✅ [변경] 라이브 모드 10초 + 차트/뉴스까지 전부 포함
-@st.fragment(run_every=10 if live_mode else None)
-def render_all(target_symbol, target_name, _timeframe, _use_candle, _show_bb, _bottom_indicator):
-
-    m1, m2, m3, m4 = st.columns(4)
-    indices = [("나스닥", "^IXIC", ""), ("S&P 500", "^GSPC", ""), ("코스피", "^KS11", ""), ("원/달러", "USDKRW=X", "₩")]
-    for col, (name, sym, sign) in zip([m1, m2, m3, m4], indices):
-        p, pct = get_quick_quote(sym)
-        with col:
-            if p > 0: st.metric(label=name, value=f"{sign}{p:,.2f}" if name != "코스피" else f"{p:,.2f}", delta=f"{pct:+.2f}%")
-            else: st.metric(label=name, value="로딩중", delta="-")
-    st.markdown("---")
-
-    res_1y_data = get_cached_json(f"https://query1.finance.yahoo.com/v8/finance/chart/{target_symbol}?range=1y&interval=1d")
-    if not res_1y_data or 'chart' not in res_1y_data or not res_1y_data['chart']['result']:
-        st.markdown(f'<div class="delisted-alert">🚨 상장폐지 또는 검색 불가 ({target_symbol})</div>', unsafe_allow_html=True)
-        return
-
-    result_1y = res_1y_data['chart']['result'][0]
-    meta = result_1y['meta']
-
-    last_trade_ts = meta.get('regularMarketTime', 0)
-    if last_trade_ts == 0 and result_1y.get('timestamp'):
-        last_trade_ts = result_1y['timestamp'][-1]
-
-    is_dead = False
-    if last_trade_ts > 0:
-        last_trade_date = datetime.fromtimestamp(last_trade_ts, KST)
-        days_dead = (datetime.now(KST) - last_trade_date).days
-        if days_dead > 7:
-            is_dead = True
-            st.markdown(f'<div class="delisted-alert">🚨 상장폐지 / 거래정지 됨 ({target_symbol}) <br><span style="font-size: 16px; font-weight: normal;">마지막 거래일: {last_trade_date.strftime("%Y-%m-%d")}</span></div>', unsafe_allow_html=True)
-
-    market_state = meta.get('marketState', 'REGULAR')
-    if is_dead: closed_html = '<span class="badge" style="background-color: #000000;">💀 영구 휴장(상폐)</span>'
-    elif market_state == 'REGULAR': closed_html = ''
-    elif market_state == 'PRE': closed_html = '<span class="badge" style="background-color: #ff9900;">🌅 프리마켓</span>'
-    elif market_state in ['POST', 'POSTPOST']: closed_html = '<span class="badge" style="background-color: #9933cc;">🌃 애프터마켓</span>'
-    else: closed_html = '<span class="closed-badge">💤 장 휴장일</span>'
-
-    quotes_1y = result_1y['indicators']['quote'][0]
-    valid_closes = [p for p in quotes_1y.get('close', []) if p is not None]
-    valid_highs = [h for h in quotes_1y.get('high', []) if h is not None]
-    valid_lows = [l for l in quotes_1y.get('low', []) if l is not None]
-
-    price = meta.get('regularMarketPrice', valid_closes[-1] if valid_closes else 0)
-    prev_close = meta.get('previousClose', valid_closes[-2] if len(valid_closes) >= 2 else price)
-    today_volume = meta.get('regularMarketVolume', 0)
-    day_change_pct = ((price - prev_close) / prev_close) * 100 if prev_close else 0
-    currency = meta.get('currency', 'USD')
-
-    naver_amount = None
-    is_kr_stock = target_symbol.endswith(".KS") or target_symbol.endswith(".KQ")
-    if is_kr_stock:
-        naver_code = target_symbol.split('.')[0]
-        naver_data = get_naver_stock_data(naver_code)
-        if naver_data:
-            price = naver_data["price"]
-            day_change_pct = naver_data["rate"]
-            today_volume = naver_data["volume"]
-            naver_amount = naver_data["amount"]
-
-    c_sym_st = "₩" if currency == "KRW" else "\\$" if currency == "USD" else "€" if currency == "EUR" else "¥" if currency == "JPY" else f"{currency} "
-    high_52 = max(max(valid_highs) if valid_highs else 0, price)
-    low_52 = min(min(valid_lows) if valid_lows else 0, price) if valid_lows else price
-
-    price_str = f"{c_sym_st}{int(price):,}" if currency in ["KRW", "JPY"] else f"{c_sym_st}{price:,.2f}"
-    highlow_str = f"{c_sym_st}{int(high_52):,} / {c_sym_st}{int(low_52):,}" if currency in ["KRW", "JPY"] else f"{c_sym_st}{high_52:,.2f} / {c_sym_st}{low_52:,.2f}"
-
-    st.markdown(f"<h3>{target_name} ({target_symbol}) {closed_html}</h3>", unsafe_allow_html=True)
-
-    kpi1, kpi2, kpi3, kpi4 = st.columns(4)
-    with kpi1: st.metric(label=f"💰 {'마지막 가격' if is_dead else '현재가'}", value=price_str, delta=f"{day_change_pct:+.2f}%")
-    with kpi2:
-        if is_kr_stock and naver_amount is not None:
-            st.metric(label="💸 거래대금", value=format_abbrev(naver_amount, "₩"))
-        elif currency != "KRW":
-            ex_rate_res = get_cached_json(f"https://query1.finance.yahoo.com/v8/finance/chart/{currency}KRW=X")
-            if ex_rate_res and ex_rate_res.get('chart') and ex_rate_res['chart'].get('result'):
-                curr_rate = ex_rate_res['chart']['result'][0]['meta']['regularMarketPrice']
-                st.metric(label="🇰🇷 원화 환산가", value=f"약 ₩{int(price * curr_rate):,}")
-            else: st.empty()
-        else: st.empty()
-    with kpi3: st.metric(label="⚖️ 52주 최고/최저", value=highlow_str)
-    with kpi4:
-        try:
-            if is_kr_stock:
-                if today_volume is None or str(today_volume).strip() == "" or str(today_volume) == "nan":
-                    volume_str = "데이터 없음"
-                else:
-                    volume_str = format_abbrev(today_volume, "")
-                st.metric(label="📊 거래량", value=volume_str)
-            else:
-                trading_value = price * today_volume if today_volume else 0
-                st.metric(label="💸 거래대금", value=format_abbrev(trading_value, "$" if currency == "USD" else c_sym_st))
-        except Exception:
-            st.metric(label="📊 거래량", value="에러")
-
-    # 52주 프로그레스 바
-    if high_52 > low_52:
-        progress_pct = int(max(0, min(100, (price - low_52) / (high_52 - low_52) * 100)))
-        bar_color = "#ff4b4b" if progress_pct >= 80 else "#ff9900" if progress_pct >= 50 else "#00b4d8"
-        st.markdown(f"""
-            <div style="margin: 12px 0 4px 0; font-size: 13px; color: #888;">
-                📍 52주 위치 &nbsp;<b style="color:{bar_color}">{progress_pct}%</b>
-                &nbsp;|&nbsp; 저가 {c_sym_st}{int(low_52):,} ↔ 고가 {c_sym_st}{int(high_52):,}
-            </div>
-            <div style="background:#e0e0e0; border-radius:6px; height:10px; margin-bottom:8px;">
-                <div style="background:{bar_color}; width:{progress_pct}%; height:10px; border-radius:6px;"></div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    if is_dead:
-        return
-
-    st.write("")
-    st.markdown("---")
-
-    # ✅ [변경] fetch range/interval - 월봉 max, 연봉 월봉데이터로 집계
-    fetch_range_map = {
-        "분봉": "30d",
-        "일봉": "5y",
-        "월봉": "max",
-        "연봉": "max",
-    }
-    interval_map = {
-        "분봉": "5m",
-        "일봉": "1d",
-        "월봉": "1mo",
-        "연봉": "1mo",
-    }
-
-    chart_url = f"https://query1.finance.yahoo.com/v8/finance/chart/{target_symbol}?range={fetch_range_map[_timeframe]}&interval={interval_map[_timeframe]}"
-    chart_res_json = get_cached_json(chart_url)
-
-    if chart_res_json and chart_res_json['chart']['result']:
-        chart_res = chart_res_json['chart']['result'][0]
-
-        chart_currency = chart_res['meta'].get('currency', 'USD')
-        c_sym_plot = "₩" if chart_currency == "KRW" else "$" if chart_currency == "USD" else "€" if chart_currency == "EUR" else "¥" if chart_currency == "JPY" else f"{chart_currency} "
-
-        ex_rate_for_chart = 1.0
-        if chart_currency != "KRW":
-            ex_rate_req = get_cached_json(f"https://query1.finance.yahoo.com/v8/finance/chart/{chart_currency}KRW=X?range=1d&interval=1d")
-            if ex_rate_req and ex_rate_req.get('chart') and ex_rate_req['chart'].get('result'):
-                ex_rate_for_chart = ex_rate_req['chart']['result'][0]['meta']['regularMarketPrice']
-
-        has_split = False
-        if 'events' in chart_res and 'splits' in chart_res['events']:
-            has_split = True
-
-        split_html = '<span class="badge" style="background-color: #ff9900;">✂️ 액면분할 됨</span>' if has_split else ''
-
-        dt_objects = [datetime.fromtimestamp(ts, KST) for ts in chart_res.get('timestamp', [])]
-        quote = chart_res['indicators']['quote'][0]
-        opens = quote.get('open', [])
-        highs = quote.get('high', [])
-        lows = quote.get('low', [])
-        closes = quote.get('close', [])
-        volumes = quote.get('volume', [])
-
-        clean_data = []
-        for i in range(len(dt_objects)):
-            if i < len(closes) and closes[i] is not None:
-                v = volumes[i] if (i < len(volumes) and volumes[i] is not None) else 0
-                o = opens[i] if i < len(opens) else closes[i]
-                h = highs[i] if i < len(highs) else closes[i]
-                l = lows[i] if i < len(lows) else closes[i]
-                clean_data.append((dt_objects[i], o, h, l, closes[i], v))
-
-        # ✅ [추가] 연봉이면 월봉 데이터를 연봉으로 집계
-        if _timeframe == "연봉":
-            clean_data = aggregate_to_yearly(clean_data)
-
-        full_prices = [row[4] for row in clean_data]
-        ma3_full = calc_ma(full_prices, 3)
-        ma20_full = calc_ma(full_prices, 20)
-        ma60_full = calc_ma(full_prices, 60)
-        ma120_full = calc_ma(full_prices, 120)
-        ma480_full = calc_ma(full_prices, 480)
-        rsi_full = calc_rsi(full_prices, 14)
-        macd_full, macd_signal_full = calc_macd(full_prices)
-
-        f_dates, f_opens, f_highs, f_lows, f_closes, f_volumes = [], [], [], [], [], []
-        f_ma3, f_ma20, f_ma60, f_ma120, f_ma480, f_rsi, f_macd, f_signal = [], [], [], [], [], [], [], []
-
-        if _timeframe == "분봉" and len(clean_data) > 0:
-            session_start_idx = 0
-            for i in range(len(clean_data) - 1, 0, -1):
-                if (clean_data[i][0] - clean_data[i-1][0]).total_seconds() > 4 * 3600:
-                    session_start_idx = i
-                    break
-            for i in range(session_start_idx, len(clean_data)):
-                f_dates.append(clean_data[i][0])
-                f_opens.append(clean_data[i][1])
-                f_highs.append(clean_data[i][2])
-                f_lows.append(clean_data[i][3])
-                f_closes.append(clean_data[i][4])
-                f_volumes.append(clean_data[i][5])
-                f_ma3.append(ma3_full[i])
-                f_ma20.append(ma20_full[i])
-                f_ma60.append(ma60_full[i])
-                f_ma120.append(ma120_full[i])
-                f_ma480.append(ma480_full[i])
-                f_rsi.append(rsi_full[i])
-                f_macd.append(macd_full[i])
-                f_signal.append(macd_signal_full[i])
-
-        elif _timeframe != "분봉":
-            cutoff_days = {
-                "일봉": 365, "월봉": 365*100, "연봉": 365*100, "5년": 365*5, "10년": 365*10
-            }.get(_timeframe, 365)
-            cutoff_date = datetime.now(KST) - timedelta(days=cutoff_days)
-            for i in range(len(clean_data)):
-                if clean_data[i][0] >= cutoff_date:
-                    f_dates.append(clean_data[i][0])
-                    f_opens.append(clean_data[i][1])
-                    f_highs.append(clean_data[i][2])
-                    f_lows.append(clean_data[i][3])
-                    f_closes.append(clean_data[i][4])
-                    f_volumes.append(clean_data[i][5])
-                    f_ma3.append(ma3_full[i])
-                    f_ma20.append(ma20_full[i])
-                    f_ma60.append(ma60_full[i])
-                    f_ma120.append(ma120_full[i])
-                    f_ma480.append(ma480_full[i])
-                    f_rsi.append(rsi_full[i])
-                    f_macd.append(macd_full[i])
-                    f_signal.append(macd_signal_full[i])
-
-        # ✅ [추가] 분봉 장마감 안내
-        if _timeframe == "분봉" and f_dates:
-            last_dt = f_dates[-1]
-            today_kst = datetime.now(KST).date()
-            if last_dt.date() < today_kst:
-                st.info(f"💤 현재 장 휴장 중 | 마지막 거래일 ({last_dt.strftime('%Y-%m-%d')}) 데이터 표시 중")
-
-        if _show_bb and len(f_closes) >= 20:
-            f_bb_upper, f_bb_mid, f_bb_lower = calc_bb(f_closes)
-        else:
-            f_bb_upper = f_bb_mid = f_bb_lower = [None] * len(f_closes)
-
-        f_dates_str = [
-            d.strftime('%Y-%m-%d %H:%M') + '\u200b' if _timeframe == '분봉'
-            else d.strftime('%Y-%m-%d') + '\u200b'
-            for d in f_dates
-        ]
-
-        formatted_tvals = []
-        for c, v in zip(f_closes, f_volumes):
-            orig_str = format_abbrev(c * v, c_sym_plot)
-            if chart_currency != "KRW" and ex_rate_for_chart != 1.0:
-                krw_str = format_abbrev(c * v * ex_rate_for_chart, "₩")
-                formatted_tvals.append(f"약 {krw_str} ({orig_str})")
-            else:
-                formatted_tvals.append(orig_str)
-
-        fig = make_subplots(
-            rows=2, cols=1, shared_xaxes=True,
-            vertical_spacing=0.03, row_heights=[0.75, 0.25],
-            specs=[[{"secondary_y": True}], [{"secondary_y": False}]]
-        )
-
-        is_kr = target_symbol.endswith(".KS") or target_symbol.endswith(".KQ")
-        up_color = '#ff4b4b' if is_kr else '#00cc96'
-        down_color = '#00b4d8' if is_kr else '#ff4b4b'
-
-        if _use_candle and len(f_dates_str) > 0:
-            fig.add_trace(go.Candlestick(
-                x=f_dates_str, open=f_opens, high=f_highs, low=f_lows, close=f_closes,
-                increasing_line_color=up_color, decreasing_line_color=down_color, name='캔들'
-            ), row=1, col=1, secondary_y=False)
-        elif len(f_dates_str) > 0:
-            fig.add_trace(go.Scatter(
-                x=f_dates_str, y=f_closes, mode='lines', name='주가', line=dict(color='#00b4d8', width=3)
-            ), row=1, col=1, secondary_y=False)
-
-        if _timeframe == "분봉" and len(f_dates_str) > 0:
-            fig.add_trace(go.Scatter(x=f_dates_str, y=f_ma3, mode='lines', name='3선', line=dict(color='#ff4b4b', width=1.5)), row=1, col=1)
-            fig.add_trace(go.Scatter(x=f_dates_str, y=f_ma120, mode='lines', name='120선', line=dict(color='#ff9900', width=1.5, dash='dash')), row=1, col=1)
-        elif _timeframe in ["일봉", "월봉", "연봉", "5년", "10년"] and len(f_dates_str) > 0:
-            fig.add_trace(go.Scatter(x=f_dates_str, y=f_ma3, mode='lines', name='3선', line=dict(color='#ff4b4b', width=1.5)), row=1, col=1)
-            fig.add_trace(go.Scatter(x=f_dates_str, y=f_ma20, mode='lines', name='20선', line=dict(color='#ff9900', width=1.5, dash='dash')), row=1, col=1)
-            fig.add_trace(go.Scatter(x=f_dates_str, y=f_ma120, mode='lines', name='120선', line=dict(color='#00cc96', width=1.5, dash='dash')), row=1, col=1)
-            fig.add_trace(go.Scatter(x=f_dates_str, y=f_ma480, mode='lines', name='480선', line=dict(color='#9933cc', width=1.5, dash='dash')), row=1, col=1)
- 
-        if _show_bb and len(f_dates_str) > 0 and any(v is not None for v in f_bb_upper):
-            fig.add_trace(go.Scatter(x=f_dates_str, y=f_bb_upper, mode='lines', name='BB 상단', line=dict(color='#ccaa00', width=1.5)), row=1, col=1)
-
-        vol_colors = []
-        f_trading_values = [c * v for c, v in zip(f_closes, f_volumes)]
-        for i in range(len(f_closes)):
-            if i > 0 and f_closes[i] < f_closes[i-1]: vol_colors.append(down_color)
-            else: vol_colors.append(up_color)
-
-        if len(f_dates_str) > 0:
-           fig.add_trace(go.Bar(
-               x=f_dates_str, y=f_trading_values, name='거래대금', marker_color=vol_colors, opacity=0.3,
-               customdata=list(zip(formatted_tvals, f_volumes)),
-               hovertemplate="<b>거래대금:</b> %{customdata[0]}<br><b>거래량:</b> %{customdata[1]:,.0f}<extra></extra>"
-            ), row=1, col=1, secondary_y=True)
-           
-        if _bottom_indicator == "RSI":
-                fig.add_trace(go.Scatter(x=f_dates_str, y=f_rsi, mode='lines', name='RSI', line=dict(color='#9c27b0', width=1.5)), row=2, col=1)
-                fig.add_hline(y=70, line_dash="dot", line_color="red", row=2, col=1)
-                fig.add_hline(y=30, line_dash="dot", line_color="blue", row=2, col=1)
-                fig.update_yaxes(range=[0, 100], row=2, col=1)
-        else:
-                fig.add_trace(go.Scatter(x=f_dates_str, y=f_macd, mode='lines', name='MACD', line=dict(color='#00b4d8', width=1.5)), row=2, col=1)
-                fig.add_trace(go.Scatter(x=f_dates_str, y=f_signal, mode='lines', name='Signal', line=dict(color='#ff9900', width=1.5)), row=2, col=1)
-                macd_hist = []
-                hist_colors = []
-                for m, s in zip(f_macd, f_signal):
-                    if m is not None and s is not None:
-                        macd_hist.append(m - s)
-                        hist_colors.append('#ff4b4b' if m > s else '#00b4d8')
-                    else:
-                        macd_hist.append(0)
-                        hist_colors.append('#00b4d8')
-                fig.add_trace(go.Bar(x=f_dates_str, y=macd_hist, marker_color=hist_colors, name='Histogram'), row=2, col=1)
-
-        st.markdown(f"<h4>📈 {target_name} 차트 & 보조지표 {split_html}</h4>", unsafe_allow_html=True)
-
-        fig.update_layout(
-            hovermode="x unified", height=700, margin=dict(l=0, r=0, t=20, b=0),
-            xaxis_rangeslider_visible=False,
-            template="plotly_dark" if dark_mode else "plotly"
-        )
-
-        fig.update_xaxes(type='category', nticks=15, row=1, col=1)
-        fig.update_xaxes(type='category', nticks=15, row=2, col=1)
-
-        f_trading_values = [c * v for c, v in zip(f_closes, f_volumes)]
-        max_tv = max(f_trading_values) if f_trading_values else 0
-        fig.update_yaxes(showgrid=False, range=[0, max_tv * 4 if max_tv > 0 else 100], row=1, col=1, secondary_y=True, fixedrange=True)
-
-        # ✅ [추가] 축 레이블
-        fig.update_yaxes(title_text="📈 주가", title_font=dict(size=11, color="#888888"), row=1, col=1, secondary_y=False)
-        fig.update_yaxes(title_text="💸 거래대금", title_font=dict(size=11, color="#888888"), row=1, col=1, secondary_y=True)
-        fig.update_yaxes(title_text=f"📉 {_bottom_indicator}", title_font=dict(size=11, color="#888888"), row=2, col=1)
-
-        st.plotly_chart(fig, use_container_width=True)
-
-    st.markdown("---")
-    news_col, fin_col = st.columns(2)
-
-    with news_col:
-        st.markdown(f"### 📰 {original_name} 최신 뉴스")
-        news_list, _ = get_cached_news(original_name)
-        if news_list:
-            for news in news_list:
-                st.markdown(f"""
-                    <div class="news-card">
-                        <a class="news-title" href="{news['link']}" target="_blank">📰 {news['title']}</a>
-                        <div style="font-size: 13px; color: #666; margin-top: 5px;">🏢 출처: {news['source']}</div>
-                    </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.info("💡 뉴스를 불러올 수 없습니다.")
-
-    with fin_col:
-        st.markdown("### 📊 재무제표")
-        fin_data = get_financial_data(target_symbol)
-        if fin_data:
-            st.markdown("**기본 정보**")
-            st.metric("시가총액", fin_data["시가총액"])
-            f1, f2 = st.columns(2)
-            with f1:
-                st.metric("PER", fin_data["PER"])
-                st.metric("EPS", fin_data["EPS"])
-            with f2:
-                st.metric("PBR", fin_data["PBR"])
-                st.metric("배당수익률", fin_data["배당수익률"])
-            st.markdown("---")
-            st.markdown("**손익계산서 (최근 연간)**")
-            f3, f4, f5 = st.columns(3)
-            with f3: st.metric("매출", fin_data["매출"], delta=fin_data["매출_증감"])
-            with f4: st.metric("영업이익", fin_data["영업이익"], delta=fin_data["영업이익_증감"])
-            with f5: st.metric("순이익", fin_data["순이익"], delta=fin_data["순이익_증감"])
-        else:
-            st.info("💡 재무 데이터를 불러올 수 없습니다.")
-
-
-render_all(symbol, official_name, timeframe, use_candle, show_bb, bottom_indicator)
\ No newline at end of file
+import streamlit as st
+import requests
+from requests.adapters import HTTPAdapter
+import re
+import os
+import json
+import csv
+import difflib
+import unicodedata
+import sqlite3
+import threading
+import time
+import math
+import bisect
+import base64
+import hashlib
+import io
+import random
+import functools
+import weakref
+import numpy as np
+from datetime import datetime, timedelta, timezone
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import xml.etree.ElementTree as ET
+import urllib.parse
+from bs4 import BeautifulSoup
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+
+KST = timezone(timedelta(hours=9))
+
+st.set_page_config(page_title="CEO 글로벌 터미널", page_icon="🌍", layout="wide")
+
+st.markdown("""
+    <style>
+    .news-card { background: #f8f9fa; border-left: 4px solid #00b4d8; padding: 15px; border-radius: 5px; margin-bottom: 10px; }
+    .news-title { font-size: 16px; font-weight: bold; color: #1E88E5 !important; text-decoration: none; }
+    .delisted-alert { color: white; background-color: #ff4b4b; padding: 20px; border-radius: 10px; text-align: center; font-size: 24px; font-weight: bold; margin: 20px 0; }
+    .badge { color: white; padding: 3px 8px; border-radius: 12px; font-size: 14px; font-weight: bold; margin-left: 10px; vertical-align: middle; }
+    .closed-badge { background-color: #555; color: white; padding: 3px 8px; border-radius: 12px; font-size: 14px; font-weight: bold; margin-left: 10px; vertical-align: middle; }
+    </style>
+""", unsafe_allow_html=True)
+
+vip_dict = {
+    "현대자동차": "005380.KS", "네이버": "035420.KS", "카카오": "035720.KS",
+    "삼성전자": "005930.KS", "엔비디아": "NVDA", "테슬라": "TSLA",
+    "애플": "AAPL", "마이크로소프트": "MSFT",
+    "토요타 (일본)": "7203.T", "토요타 (미국)": "TM",
+    "TSMC (대만)": "2330.TW", "TSMC (미국)": "TSM",
+    "소니 (일본)": "6758.T", "소니 (미국)": "SONY",
+    "알리바바 (홍콩)": "9988.HK", "알리바바 (미국)": "BABA",
+    "ASML (네덜란드)": "ASML.AS", "ASML (미국)": "ASML",
+    "루이비통 (프랑스)": "MC.PA", "루이비통 (미국)": "LVMUY"
+}
+
+# ==========================================
+# 🩺 [엔진 14] 계측 (구간 타이밍 + 캐시 적중 + 호스트별 업스트림 지연/상태/바이트)
+# ==========================================
+# 락 1번 + perf_counter 2번 수준이라 운영에서도 켜 둔다. METRICS_FILE 이면 Prometheus 텍스트를
+# 주기적으로 파일에 쓰고, METRICS_PORT 면 http://0.0.0.0:<port>/metrics 로 노출한다.
+METRICS_FILE = os.environ.get("METRICS_FILE")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", 5))
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = defaultdict(lambda: [0, 0.0, 0.0])        # 이름 → [횟수, 합, 최대]
+        self.cache = defaultdict(int)                           # (캐시, hit|stale|miss) → 횟수
+        self.upstream = defaultdict(lambda: [0, 0.0, 0])        # 호스트 → [요청, 지연 합, 바이트]
+        self.statuses = defaultdict(int)                        # (호스트, 상태) → 횟수
+        self.flushed_at = 0.0
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        with self.lock:
+            row = self.spans[name]
+            row[0] += 1
+            row[1] += seconds
+            if seconds > row[2]: row[2] = seconds
+
+    def cache_event(self, name, result):
+        with self.lock: self.cache[(name, result)] += 1
+
+    def upstream_event(self, host, status, seconds, nbytes):
+        with self.lock:
+            row = self.upstream[host]
+            row[0] += 1
+            row[1] += seconds
+            row[2] += nbytes
+            # HTTP 코드(int)와 예외 이름(str)이 섞이므로 라벨은 문자열로 통일 (정렬 가능하게)
+            self.statuses[(host, str(status))] += 1
+
+    def snapshot(self):
+        with self.lock:
+            spans = {k: list(v) for k, v in self.spans.items()}
+            cache = dict(self.cache)
+            for (name, result), count in list(cache.items()):
+                if result == "call":
+                    del cache[(name, result)]
+                    cache[(name, "hit")] = count - cache.get((name, "miss"), 0)
+            upstream = {k: list(v) for k, v in self.upstream.items()}
+            statuses = dict(self.statuses)
+        return spans, cache, upstream, statuses
+
+    def prometheus(self):
+        spans, cache, upstream, statuses = self.snapshot()
+        lines = ["# TYPE stock_span_seconds summary"]
+        for name, (count, total, peak) in sorted(spans.items()):
+            lines += [f'stock_span_seconds_count{{span="{name}"}} {count}',
+                      f'stock_span_seconds_sum{{span="{name}"}} {total:.6f}',
+                      f'stock_span_seconds_max{{span="{name}"}} {peak:.6f}']
+        lines.append("# TYPE stock_cache_requests_total counter")
+        for (name, result), count in sorted(cache.items()):
+            lines.append(f'stock_cache_requests_total{{cache="{name}",result="{result}"}} {count}')
+        lines.append("# TYPE stock_upstream_requests_total counter")
+        for (host, status), count in sorted(statuses.items()):
+            lines.append(f'stock_upstream_requests_total{{host="{host}",status="{status}"}} {count}')
+        lines.append("# TYPE stock_upstream_seconds summary")
+        for host, (count, total, nbytes) in sorted(upstream.items()):
+            lines += [f'stock_upstream_seconds_count{{host="{host}"}} {count}',
+                      f'stock_upstream_seconds_sum{{host="{host}"}} {total:.6f}',
+                      f'stock_upstream_bytes_total{{host="{host}"}} {nbytes}']
+        lines.append("# TYPE stock_cache_resident_bytes gauge")
+        for name, nbytes in sorted(cache_footprint().items()):
+            lines.append(f'stock_cache_resident_bytes{{cache="{name}"}} {nbytes}')
+        return "\n".join(lines) + "\n"
+
+    def flush(self, path):
+        # 렌더마다 불려도 METRICS_FLUSH_SECONDS에 한 번만 쓴다 (임시 파일 → rename)
+        now = time.time()
+        with self.lock:
+            if now - self.flushed_at < METRICS_FLUSH_SECONDS: return
+            self.flushed_at = now
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.prometheus())
+            os.replace(tmp, path)
+        except Exception:
+            pass  # 계측 내보내기 실패가 화면을 깨뜨리면 안 된다
+
+def _serve_metrics(metrics, port):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.prometheus().encode()
+            self.send_response(200 if self.path == "/metrics" else 404)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.end_headers()
+            if self.path == "/metrics": self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+
+@st.cache_resource(show_spinner=False)
+def get_metrics():
+    metrics = Metrics()
+    if METRICS_PORT:
+        try:
+            _serve_metrics(metrics, METRICS_PORT)
+        except OSError:
+            pass
+    return metrics
+
+def span(name):
+    return get_metrics().span(name)
+
+def metered_cache(cache):
+    # st.cache_data 래퍼: 본문이 실행되면 miss, 호출 수 - miss = hit
+    def decorator(fn):
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        def miss(*args, **kwargs):
+            get_metrics().cache_event(name, "miss")
+            return fn(*args, **kwargs)
+        cached = cache(miss)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            metrics = get_metrics()
+            metrics.cache_event(name, "call")
+            with metrics.span(f"fetch:{name}"):
+                return cached(*args, **kwargs)
+        wrapper.clear = getattr(cached, "clear", None)
+        return wrapper
+    return decorator
+
+# ==========================================
+# 🌐 [엔진 0] 공용 HTTP 클라이언트 (호스트별 커넥션 풀 + keep-alive)
+# ==========================================
+DEFAULT_UA = 'Mozilla/5.0'
+BROWSER_UA = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36'
+
+# 호스트별 통일 설정 (지정 안 된 호스트는 기본값)
+HTTP_DEFAULT_TIMEOUT = 5
+HOST_TIMEOUTS = {"translate.googleapis.com": 3, "m.stock.naver.com": 8}
+HOST_HEADERS = {
+    "finance.naver.com": {'User-Agent': BROWSER_UA},
+    "m.stock.naver.com": {'User-Agent': BROWSER_UA},
+}
+
+# ✅ [추가] 녹화/재생: HTTP_CASSETTE=record|replay, 저장 위치 HTTP_CASSETTE_DIR (URL별 JSON 1개)
+# 재생 지연은 HTTP_REPLAY_LATENCY_MS ("50" 고정 또는 "20-200" 균등분포)
+HTTP_CASSETTE = os.environ.get("HTTP_CASSETTE", "")
+HTTP_CASSETTE_DIR = os.environ.get("HTTP_CASSETTE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cassettes"))
+HTTP_REPLAY_LATENCY_MS = os.environ.get("HTTP_REPLAY_LATENCY_MS", "0")
+
+class CassetteStore:
+    def __init__(self, path, latency_ms="0"):
+        self.path = path
+        low, _, high = latency_ms.partition("-")
+        self.latency = (float(low) / 1000, float(high or low) / 1000)
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, url):
+        return os.path.join(self.path, hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+    def record(self, url, res):
+        entry = {"url": url, "status": res.status_code, "headers": dict(res.headers),
+                 "body": base64.b64encode(res.content).decode()}
+        # 압축은 이미 풀린 본문이라 재생 시 헤더와 어긋나지 않게 뺀다
+        for h in ("Content-Encoding", "Transfer-Encoding", "Content-Length"):
+            entry["headers"].pop(h, None)
+        tmp = self._file(url) + f".{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._file(url))
+
+    def replay(self, url):
+        delay = random.uniform(*self.latency)
+        if delay: time.sleep(delay)
+        try:
+            with open(self._file(url), encoding="utf-8") as f:
+                entry = json.load(f)
+        except OSError:
+            raise requests.ConnectionError(f"no cassette for {url}")
+        body = base64.b64decode(entry["body"])
+        res = requests.Response()
+        res.status_code = entry["status"]
+        res.headers = requests.structures.CaseInsensitiveDict(entry["headers"])
+        res.headers["Content-Length"] = str(len(body))
+        res._content = body
+        res._content_consumed = True
+        res.raw = io.BytesIO(body)
+        res.url = url
+        res.encoding = requests.utils.get_encoding_from_headers(res.headers)
+        return res
+
+class HttpClient:
+    def __init__(self, pool_hosts=16, pool_maxsize=32, cassette=None, mode=""):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({'User-Agent': DEFAULT_UA, 'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+        self.lock = threading.Lock()
+        self.requests_by_host = defaultdict(int)
+        self.errors_by_host = defaultdict(int)
+        self.cassette = cassette
+        self.mode = mode
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        host = urllib.parse.urlsplit(url).hostname or ""
+        merged = dict(HOST_HEADERS.get(host, {}))
+        if headers: merged.update(headers)
+        with self.lock: self.requests_by_host[host] += 1
+        start = time.perf_counter()
+        try:
+            if self.mode == "replay":
+                res = self.cassette.replay(url)
+            else:
+                res = self.session.get(url, headers=merged, timeout=timeout or HOST_TIMEOUTS.get(host, HTTP_DEFAULT_TIMEOUT), **kwargs)
+                if self.mode == "record": self.cassette.record(url, res)
+        except Exception as e:
+            with self.lock: self.errors_by_host[host] += 1
+            get_metrics().upstream_event(host, type(e).__name__, time.perf_counter() - start, 0)
+            raise
+        # 스트리밍 응답은 본문을 읽지 않도록 Content-Length만 센다
+        nbytes = int(res.headers.get('Content-Length') or 0) if kwargs.get("stream") else len(res.content)
+        get_metrics().upstream_event(host, res.status_code, time.perf_counter() - start, nbytes)
+        return res
+
+    def stats(self):
+        # urllib3 풀 카운터: 새 커넥션 수 vs 처리 요청 수 → 차이가 재사용 횟수
+        pools = {}
+        for adapter in set(self.session.adapters.values()):
+            manager = adapter.poolmanager
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is None: continue
+                row = pools.setdefault(pool.host, {"connections": 0, "pooled_requests": 0})
+                row["connections"] += pool.num_connections
+                row["pooled_requests"] += pool.num_requests
+        with self.lock:
+            hosts = set(self.requests_by_host) | set(pools)
+            result = {}
+            for host in sorted(hosts):
+                row = pools.get(host, {"connections": 0, "pooled_requests": 0})
+                result[host] = {
+                    "requests": self.requests_by_host.get(host, 0),
+                    "errors": self.errors_by_host.get(host, 0),
+                    "connections": row["connections"],
+                    "reused": max(0, row["pooled_requests"] - row["connections"]),
+                }
+        return result
+
+@st.cache_resource(show_spinner=False)
+def get_http_client():
+    if HTTP_CASSETTE in ("record", "replay"):
+        return HttpClient(cassette=CassetteStore(HTTP_CASSETTE_DIR, HTTP_REPLAY_LATENCY_MS), mode=HTTP_CASSETTE)
+    return HttpClient()
+
+def http_get(url, headers=None, timeout=None, **kwargs):
+    return get_http_client().get(url, headers=headers, timeout=timeout, **kwargs)
+
+# ==========================================
+# 🕰️ [엔진 17] 거래소 세션 달력 → 캐시 TTL / 라이브 갱신 주기
+# ==========================================
+# 장중엔 짧은 TTL, 장 밖(야간/주말/휴장일/상폐)엔 다음 개장까지 긴 TTL + 라이브 갱신 정지.
+# ✅ [변경] 음력 휴장일처럼 달력에 없는 날은 차트 meta로 판단한다 (v8 meta엔 marketState가 없다):
+#   currentTradingPeriod.regular가 오늘이 아닌 날을 가리키면 거래소 전체가 오늘 휴장,
+#   개장 후 HOLIDAY_PROBE_MINUTES가 지나도 마지막 체결이 오늘이 아니면 그 종목만 오늘 닫힌 것으로 본다 (거래정지 종목이 거래소 전체를 멈추지 않게).
+OPEN_TTL = 10
+CLOSED_TTL_MIN, CLOSED_TTL_MAX = 60, 6 * 3600
+DEAD_TTL = 6 * 3600
+# 실패(None) 결과는 장 상태와 무관하게 이 시간만 기억 (장 밖 긴 TTL 동안 일시 오류가 굳지 않게)
+NEGATIVE_TTL = OPEN_TTL
+# 마감 직후 종가 확정(동시호가/정산)까지 장중으로 취급
+SESSION_GRACE_MINUTES = 15
+# 개장 후 이만큼 체결이 없어야 마지막 체결일로 휴장을 판단 (개장 직후 첫 체결 지연 대비)
+HOLIDAY_PROBE_MINUTES = 30
+
+# 거래소: (IANA 시간대, zoneinfo가 없을 때 고정 오프셋, [(개장, 마감)], 고정 휴장일 "MM-DD")
+EXCHANGES = {
+    "KRX": ("Asia/Seoul", 9, [((9, 0), (15, 30))], {"01-01", "03-01", "05-01", "05-05", "06-06", "08-15", "10-03", "10-09", "12-25", "12-31"}),
+    "US": ("America/New_York", -5, [((9, 30), (16, 0))], {"01-01", "06-19", "07-04", "12-25"}),
+    "TSE": ("Asia/Tokyo", 9, [((9, 0), (11, 30)), ((12, 30), (15, 30))], {"01-01", "01-02", "01-03", "12-31"}),
+    "HKEX": ("Asia/Hong_Kong", 8, [((9, 30), (12, 0)), ((13, 0), (16, 0))], {"01-01", "07-01", "10-01", "12-25", "12-26"}),
+    "TWSE": ("Asia/Taipei", 8, [((9, 0), (13, 30))], {"01-01", "02-28", "10-10"}),
+    "EURONEXT": ("Europe/Paris", 1, [((9, 0), (17, 30))], {"01-01", "05-01", "12-25", "12-26"}),
+    # 환율은 평일 24시간 (뉴욕 기준 일요일 17시 ~ 금요일 17시를 평일 전체로 근사)
+    "FX": ("America/New_York", -5, [((0, 0), (24, 0))], {"12-25", "01-01"}),
+}
+
+def _nth_weekday(year, month, weekday, n):
+    # n번째(음수면 뒤에서) weekday(월=0)인 날짜
+    if n > 0:
+        first = datetime(year, month, 1).date()
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (datetime(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)).date()
+    return last - timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+
+def _easter(year):
+    # 그레고리력 부활절 (Anonymous Gregorian algorithm)
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime(year, month, day + 1).date()
+
+def _us_holidays(year):
+    # NYSE: 월요일 공휴일 + 성금요일 + 추수감사절, 고정 휴일이 주말이면 금/월 대체 (1/1이 토요일이면 대체 없음)
+    days = {_nth_weekday(year, 1, 0, 3), _nth_weekday(year, 2, 0, 3), _easter(year) - timedelta(days=2),
+            _nth_weekday(year, 5, 0, -1), _nth_weekday(year, 9, 0, 1), _nth_weekday(year, 11, 3, 4)}
+    for month, day in ((1, 1), (6, 19), (7, 4), (12, 25)):
+        fixed = datetime(year, month, day).date()
+        if fixed.weekday() == 5 and (month, day) != (1, 1): days.add(fixed - timedelta(days=1))
+        elif fixed.weekday() == 6: days.add(fixed + timedelta(days=1))
+    return days
+
+def _easter_holidays(year):
+    # 성금요일 + 부활절 월요일 (유로넥스트, 홍콩)
+    easter = _easter(year)
+    return {easter - timedelta(days=2), easter + timedelta(days=1)}
+
+# 해마다 날짜가 바뀌는 휴장일 규칙 (고정 "MM-DD"는 EXCHANGES에)
+HOLIDAY_RULES = {"US": _us_holidays, "EURONEXT": _easter_holidays, "HKEX": _easter_holidays}
+
+@functools.lru_cache(maxsize=64)
+def floating_holidays(name, year):
+    rule = HOLIDAY_RULES.get(name)
+    return frozenset(rule(year)) if rule else frozenset()
+
+def is_holiday(name, day):
+    return day.strftime("%m-%d") in EXCHANGES[name][3] or day in floating_holidays(name, day.year)
+
+SUFFIX_EXCHANGE = {".KS": "KRX", ".KQ": "KRX", ".T": "TSE", ".HK": "HKEX", ".TW": "TWSE", ".AS": "EURONEXT", ".PA": "EURONEXT"}
+INDEX_EXCHANGE = {"^KS11": "KRX", "^KQ11": "KRX", "^N225": "TSE", "^HSI": "HKEX", "^TWII": "TWSE"}
+
+def _exchange_tz(name):
+    tz_name, offset, _, _ = EXCHANGES[name]
+    try:
+        return ZoneInfo(tz_name)
+    except Exception:
+        return timezone(timedelta(hours=offset))
+
+def exchange_of(symbol):
+    if symbol.endswith("=X"): return "FX"
+    if symbol in INDEX_EXCHANGE: return INDEX_EXCHANGE[symbol]
+    for suffix, name in SUFFIX_EXCHANGE.items():
+        if symbol.endswith(suffix): return name
+    return "US"
+
+class FreshnessState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.dead = set()
+        self.closed_days = {}   # 거래소 또는 종목 → 차트 meta로 휴장을 확인한 현지 날짜
+
+@st.cache_resource(show_spinner=False)
+def get_freshness_state():
+    return FreshnessState()
+
+def closed_today(symbol, meta, last_trade_ts, now=None):
+    # 달력상 장중인데 meta가 오늘 장이 없다고 말하면 (닫힌 대상, 그 날짜). 대상은 거래소 이름 또는 종목.
+    now = now if now is not None else time.time()
+    if not session_state(symbol, now, use_observed=False)[0]: return None
+    name = exchange_of(symbol)
+    tz = _exchange_tz(name)
+    today = datetime.fromtimestamp(now, tz).date()
+    if meta.get('marketState') == 'CLOSED': return name, today
+    regular = (meta.get('currentTradingPeriod') or {}).get('regular') or {}
+    if regular.get('start'):
+        if datetime.fromtimestamp(regular['start'], tz).date() != today: return name, today
+    (oh, om), _ = EXCHANGES[name][2][0]
+    probe = datetime(today.year, today.month, today.day, oh, om, tzinfo=tz) + timedelta(minutes=HOLIDAY_PROBE_MINUTES)
+    if last_trade_ts and now >= probe.timestamp() and datetime.fromtimestamp(last_trade_ts, tz).date() < today:
+        return symbol, today
+    return None
+
+def note_market_state(symbol, meta, last_trade_ts, is_dead=False):
+    # 렌더에서 본 meta를 기록: 상폐 종목, 달력엔 없는 휴장일
+    state = get_freshness_state()
+    closed = None if is_dead else closed_today(symbol, meta, last_trade_ts)
+    with state.lock:
+        if is_dead: state.dead.add(symbol)
+        else: state.dead.discard(symbol)
+        if closed: state.closed_days[closed[0]] = closed[1]
+
+def session_state(symbol, now=None, use_observed=True):
+    # (장중 여부, 상태가 바뀔 때까지 남은 초)
+    name = exchange_of(symbol)
+    _, _, sessions, _ = EXCHANGES[name]
+    tz = _exchange_tz(name)
+    local = datetime.fromtimestamp(now if now is not None else time.time(), tz)
+    observed_closed = set()
+    if use_observed:
+        state = get_freshness_state()
+        with state.lock: observed_closed = {state.closed_days.get(name), state.closed_days.get(symbol)}
+    grace = timedelta(minutes=SESSION_GRACE_MINUTES)
+    for day_offset in range(0, 10):
+        day = (local + timedelta(days=day_offset)).date()
+        if day.weekday() >= 5 or is_holiday(name, day) or day in observed_closed: continue
+        midnight = datetime(day.year, day.month, day.day, tzinfo=tz)
+        for (oh, om), (ch, cm) in sessions:
+            start = midnight + timedelta(hours=oh, minutes=om)
+            end = midnight + timedelta(hours=ch, minutes=cm) + grace
+            if local < start: return False, (start - local).total_seconds()
+            if local < end: return True, (end - local).total_seconds()
+    return False, CLOSED_TTL_MAX
+
+def market_ttl(symbol):
+    state = get_freshness_state()
+    with state.lock:
+        if symbol in state.dead: return DEAD_TTL
+    is_open, remaining = session_state(symbol)
+    if is_open: return OPEN_TTL
+    return max(CLOSED_TTL_MIN, min(CLOSED_TTL_MAX, remaining))
+
+CHART_URL_SYMBOL_RE = re.compile(r'/v8/finance/chart/([^?/]+)')
+
+def url_ttl(url):
+    m = CHART_URL_SYMBOL_RE.search(url)
+    return market_ttl(urllib.parse.unquote(m.group(1))) if m else OPEN_TTL
+
+# ==========================================
+# 🔀 [엔진 6] 요청 합치기 (single-flight) + stale-while-revalidate 캐시
+# ==========================================
+# 세션이 달라도 같은 키의 동시 미스는 업스트림 1건만 보내고 결과를 공유.
+# TTL이 지난 값은 stale_ttl 동안 즉시 돌려주고 갱신은 백그라운드에서 1건만 수행.
+# 반환값은 세션 간 공유 객체이므로 호출부에서 수정하지 않는다.
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class SwrState:
+    def __init__(self, max_entries, max_bytes=None, sizeof=None):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.inflight = {}
+        # 백그라운드 갱신이 풀에 제출돼 아직 시작 전인 키 (inflight는 작업이 시작돼야 잡힌다)
+        self.queued = set()
+        self.max_entries = max_entries
+        # 바이트 예산 (sizeof가 있으면 항목 크기를 재서 합계가 max_bytes를 넘지 않게 LRU 축출)
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.sizes = {}
+        self.nbytes = 0
+
+    def store(self, key, value):
+        # state.lock을 잡은 상태에서 호출
+        size = self.sizeof(value) if self.sizeof else 0
+        self.nbytes += size - self.sizes.get(key, 0)
+        self.sizes[key] = size
+        self.entries[key] = (value, time.time())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries or (self.max_bytes and self.nbytes > self.max_bytes and len(self.entries) > 1):
+            old, _ = self.entries.popitem(last=False)
+            self.nbytes -= self.sizes.pop(old, 0)
+
+@st.cache_resource(show_spinner=False)
+def get_swr_registry():
+    return {"lock": threading.Lock(), "states": {}}
+
+def _swr_state(name, max_entries, max_bytes=None, sizeof=None):
+    registry = get_swr_registry()
+    with registry["lock"]:
+        state = registry["states"].get(name)
+        if state is None:
+            state = registry["states"][name] = SwrState(max_entries, max_bytes, sizeof)
+    return state
+
+def _single_flight(state, key, fn, args):
+    with state.lock:
+        flight = state.inflight.get(key)
+        leader = flight is None
+        if leader: flight = state.inflight[key] = _Flight()
+    if not leader:
+        flight.event.wait()
+        if flight.error is not None: raise flight.error
+        return flight.value
+    try:
+        flight.value = fn(*args)
+        with state.lock:
+            # 갱신 실패(None)는 기존 값을 덮어쓰지 않는다
+            if flight.value is not None or key not in state.entries:
+                state.store(key, flight.value)
+        return flight.value
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with state.lock: state.inflight.pop(key, None)
+        flight.event.set()
+
+def _revalidate(state, key, seen_at, fn, args):
+    # 풀에서 기다리는 사이 다른 경로가 이미 갱신했으면 (fetched_at이 바뀜) 다시 받지 않는다
+    with state.lock:
+        state.queued.discard(key)
+        hit = state.entries.get(key)
+        if hit is not None and hit[1] != seen_at: return
+    _single_flight(state, key, fn, args)
+
+# 백그라운드 갱신기처럼 "지금 새로 받아서 캐시를 채워야 하는" 스레드용 우회 스위치
+_swr_local = threading.local()
+
+@contextmanager
+def swr_bypass():
+    _swr_local.force = True
+    try:
+        yield
+    finally:
+        _swr_local.force = False
+
+# ttl은 초 또는 인자를 받아 초를 돌려주는 함수 (장 상태별 TTL)
+def swr_cache(ttl, stale_ttl=300, max_entries=512, max_bytes=None, sizeof=None):
+    def decorator(fn):
+        name = fn.__qualname__
+
+        def wrapper(*args):
+            state = _swr_state(name, max_entries, max_bytes, sizeof)
+            metrics = get_metrics()
+            now = time.time()
+            with state.lock:
+                hit = None if getattr(_swr_local, "force", False) else state.entries.get(args)
+                if hit is not None:
+                    state.entries.move_to_end(args)
+                    value, fetched_at = hit
+                    age = now - fetched_at
+                    fresh_for = ttl(*args) if callable(ttl) else ttl
+                    if value is None: fresh_for = min(fresh_for, NEGATIVE_TTL)
+                    if age < fresh_for:
+                        metrics.cache_event(fn.__name__, "hit")
+                        return value
+                    # 실패값은 stale로 내주지 않고 바로 다시 받는다
+                    if value is not None and age < fresh_for + stale_ttl:
+                        # 제출 여부는 락 안에서 queued로 표시 → 풀이 밀려 있어도 같은 키 갱신은 1건만 줄 선다
+                        if args not in state.inflight and args not in state.queued:
+                            state.queued.add(args)
+                            get_fetch_pool().submit(_revalidate, state, args, fetched_at, fn, args)
+                        metrics.cache_event(fn.__name__, "stale")
+                        return value
+            metrics.cache_event(fn.__name__, "miss")
+            with metrics.span(f"fetch:{fn.__name__}"):
+                return _single_flight(state, args, fn, args)
+
+        wrapper.__wrapped__ = fn
+        wrapper.__name__ = fn.__name__
+        return wrapper
+    return decorator
+
+# ==========================================
+# 🚀 [엔진 1] 야후 파이낸스 & API 로직
+# ==========================================
+# 차트는 get_chart_bars(파싱본)로 받으므로 원본 JSON 캐시엔 검색/spark 같은 작은 응답만 남는다
+@swr_cache(ttl=url_ttl, max_entries=128)
+def get_cached_json(url):
+    try:
+        res = http_get(url)
+        if res.status_code == 200:
+            return res.json()
+    except Exception:
+        return None
+    return None
+
+@metered_cache(st.cache_data(ttl=86400, show_spinner=False))
+def translate_to_english(text):
+    if re.match(r'^[a-zA-Z0-9\.\-\s]+$', text.strip()):
+        return text, True
+    try:
+        url = f"https://translate.googleapis.com/translate_a/single?client=gtx&sl=ko&tl=en&dt=t&q={text}"
+        res = http_get(url)
+        if res.status_code == 200:
+            return res.json()[0][0][0], True
+    except:
+        pass
+    return text, False
+
+@swr_cache(ttl=market_ttl)
+def get_quick_quote(symbol):
+    # 원화 환율 타일도 환율 서비스 한 표에서 읽는다
+    fx = re.match(r'^([A-Z]{3})KRW=X$', symbol)
+    if fx: return fx_quote(fx.group(1))
+    chart = get_chart_bars(symbol, "5d", "1d")
+    if chart is not None:
+        meta = chart.meta
+        valid_closes = chart.columns["close"].tolist()
+        price = meta.get('regularMarketPrice', valid_closes[-1] if valid_closes else 0)
+        prev = valid_closes[-2] if len(valid_closes) >= 2 else meta.get('previousClose', price)
+        return price, ((price - prev) / prev * 100) if prev else 0
+    return 0, 0
+
+# ==========================================
+# 💱 [엔진 16] 환율 서비스 (기준 통화쌍 1회 일괄 조회 → 교차환율은 로컬 계산)
+# ==========================================
+# 기준쌍은 spark 한 번으로 함께 받는다. 모든 환율은 USD를 경유해 계산: X→KRW = (X→USD) × USDKRW
+FX_TTL = 60
+FX_BASE_PAIRS = {
+    "USDKRW=X": ("USD", "KRW"), "EURUSD=X": ("EUR", "USD"), "USDJPY=X": ("USD", "JPY"),
+    "USDHKD=X": ("USD", "HKD"), "USDTWD=X": ("USD", "TWD"), "GBPUSD=X": ("GBP", "USD"),
+    "USDCNY=X": ("USD", "CNY"),
+}
+# 모든 원화 환산의 분모 - 이게 빠진 표는 실패로 보고 이전 표를 계속 쓴다
+FX_REQUIRED = ("KRW",)
+
+def _fx_last_two(closes, meta):
+    valid = [c for c in closes if c is not None]
+    price = meta.get('regularMarketPrice') or (valid[-1] if valid else None)
+    prev = valid[-2] if len(valid) >= 2 else meta.get('previousClose') or meta.get('chartPreviousClose') or price
+    return price, prev
+
+@swr_cache(ttl=FX_TTL, stale_ttl=3600)
+def get_fx_table():
+    # {통화: (현재 USD 환산, 전일 USD 환산)}
+    # 실패(None)를 돌려줘야 SWR이 직전 표를 유지한다 (USD만 든 표로 덮으면 전부 통화쌍 개별 조회로 샌다)
+    series = parse_spark(get_cached_json(spark_url(list(FX_BASE_PAIRS), "5d", "1d")))
+    if not series: return None
+    table = {"USD": (1.0, 1.0)}
+    for pair, (base, quote) in FX_BASE_PAIRS.items():
+        if pair not in series: continue
+        price, prev = _fx_last_two(*series[pair])
+        if not price or not prev: continue
+        if base == "USD": table[quote] = (1 / price, 1 / prev)
+        else: table[base] = (price, prev)
+    if any(c not in table for c in FX_REQUIRED): return None
+    return table
+
+@swr_cache(ttl=FX_TTL, stale_ttl=3600)
+def _fx_direct(currency):
+    # 기준쌍으로 만들 수 없는 통화만 직접 조회 (USD 환산으로 바꿔 같은 표 형식으로)
+    chart = get_chart_bars(f"{currency}USD=X", "5d", "1d")
+    if chart is None: return None
+    price, prev = _fx_last_two(chart.columns["close"].tolist(), chart.meta)
+    return (price, prev) if price and prev else None
+
+def _to_usd(currency):
+    table = get_fx_table() or {"USD": (1.0, 1.0)}
+    return table.get(currency) or _fx_direct(currency)
+
+def fx_quote(currency, target="KRW"):
+    # (환율, 전일 대비 %) - 지수 타일용
+    src, dst = _to_usd(currency), _to_usd(target)
+    if not src or not dst: return 0, 0
+    price, prev = src[0] / dst[0], src[1] / dst[1]
+    return price, ((price - prev) / prev * 100) if prev else 0
+
+def fx_rate(currency, target="KRW"):
+    if currency == target: return 1.0
+    price, _ = fx_quote(currency, target)
+    return price or None
+
+# ==========================================
+# 📦 [엔진 5] 차트 시계열 저장소 (보유 봉 + 꼬리 구간만 재요청해 병합)
+# ==========================================
+DAY_SECONDS = 86400
+RANGE_SECONDS = {
+    "1d": DAY_SECONDS, "5d": 5 * DAY_SECONDS, "30d": 30 * DAY_SECONDS, "1mo": 31 * DAY_SECONDS,
+    "3mo": 92 * DAY_SECONDS, "6mo": 183 * DAY_SECONDS, "1y": 366 * DAY_SECONDS, "2y": 731 * DAY_SECONDS,
+    "5y": 1827 * DAY_SECONDS, "10y": 3653 * DAY_SECONDS, "max": float("inf"),
+}
+TAIL_RANGES = ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "max"]
+INTERVAL_SECONDS = {"5m": 300, "1d": DAY_SECONDS, "1mo": 31 * DAY_SECONDS}
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+
+def chart_api_url(symbol, rng, interval):
+    return f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range={rng}&interval={interval}"
+
+def _bar_bucket(ts, interval, gmtoffset):
+    # 야후는 진행 중인 일/월봉의 타임스탬프를 마지막 체결 시각으로 주므로 거래소 현지 날짜/월 단위로 중복 판정
+    local = ts + gmtoffset
+    if interval == "1d": return local // DAY_SECONDS
+    if interval in ("1mo", "1y"):
+        d = datetime.fromtimestamp(local, timezone.utc)
+        return d.year if interval == "1y" else d.year * 12 + d.month
+    return ts // INTERVAL_SECONDS.get(interval, 60)
+
+# ✅ [변경] 파싱된 차트는 원본 JSON 대신 타입 고정 NumPy 컬럼으로 보관 (봉당 48바이트, 결측은 NaN)
+CHART_CACHE_BYTES = int(os.environ.get("CHART_CACHE_MB", 32)) * 1024 * 1024
+SERIES_CACHE_BYTES = int(os.environ.get("SERIES_CACHE_MB", 64)) * 1024 * 1024
+
+def _float_column(values, n):
+    arr = np.full(n, np.nan)
+    m = min(len(values or []), n)
+    if m: arr[:m] = np.array(values[:m], dtype=np.float64)
+    return arr
+
+def _json_column(arr):
+    # NaN → None (야후 원본 JSON과 같은 모양)
+    return [None if v != v else v for v in arr.tolist()]
+
+class ChartData:
+    __slots__ = ("meta", "events", "columns", "nbytes", "__weakref__")
+
+    def __init__(self, meta, events, columns):
+        self.meta, self.events, self.columns = meta, events, columns
+        self.nbytes = sum(c.nbytes for c in columns.values()) + len(json.dumps(meta)) + len(json.dumps(events))
+
+    @classmethod
+    def from_result(cls, result):
+        quote = result['indicators']['quote'][0]
+        ts = np.asarray(result.get('timestamp') or [], dtype=np.int64)
+        n = len(ts)
+        columns = {"timestamp": ts}
+        columns.update({f: _float_column(quote.get(f), n) for f in BAR_FIELDS})
+        # 종가 없는 봉은 버린다
+        keep = ~np.isnan(columns["close"])
+        return cls(result.get('meta', {}), result.get('events') or {}, {k: v[keep] for k, v in columns.items()})
+
+@swr_cache(ttl=lambda symbol, rng, interval: market_ttl(symbol), max_bytes=CHART_CACHE_BYTES,
+           sizeof=lambda chart: chart.nbytes if chart is not None else 0)
+def get_chart_bars(symbol, rng, interval):
+    try:
+        res = http_get(chart_api_url(symbol, rng, interval))
+        if res.status_code != 200: return None
+        result = (res.json().get('chart') or {}).get('result')
+        return ChartData.from_result(result[0]) if result else None
+    except Exception:
+        return None
+
+# ✅ [추가] 과거 봉 영구 저장소 (SQLite, 종목×주기 키, clean_data와 같은 (ts, o, h, l, c, v) 행)
+DATA_DIR = os.environ.get("STOCK_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+PERSIST_INTERVALS = ("1d", "1mo")
+
+class BarStore:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS bars (
+                symbol TEXT, interval TEXT, ts INTEGER, open REAL, high REAL, low REAL, close REAL, volume INTEGER,
+                PRIMARY KEY (symbol, interval, ts)) WITHOUT ROWID""")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS series_meta (
+                symbol TEXT, interval TEXT, loaded_range TEXT, meta TEXT, events TEXT,
+                PRIMARY KEY (symbol, interval))""")
+
+    def read(self, symbol, interval, start=None, end=None):
+        sql = "SELECT ts, open, high, low, close, volume FROM bars WHERE symbol=? AND interval=?"
+        args = [symbol, interval]
+        if start is not None: sql += " AND ts >= ?"; args.append(start)
+        if end is not None: sql += " AND ts < ?"; args.append(end)
+        with self.lock:
+            return self.conn.execute(sql + " ORDER BY ts", args).fetchall()
+
+    def read_meta(self, symbol, interval):
+        with self.lock:
+            row = self.conn.execute("SELECT loaded_range, meta, events FROM series_meta WHERE symbol=? AND interval=?", (symbol, interval)).fetchone()
+        if not row: return None
+        return row[0], json.loads(row[1]), json.loads(row[2])
+
+    def append(self, symbol, interval, rows, replace_from=None, loaded_range=None, meta=None, events=None):
+        # replace_from 이후 봉은 지우고 새 행으로 교체 (진행 중인 마지막 봉 수정 반영)
+        with self.lock, self.conn:
+            if replace_from is not None:
+                self.conn.execute("DELETE FROM bars WHERE symbol=? AND interval=? AND ts >= ?", (symbol, interval, replace_from))
+            self.conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  [(symbol, interval, *row) for row in rows])
+            if loaded_range is not None:
+                self.conn.execute("INSERT OR REPLACE INTO series_meta VALUES (?, ?, ?, ?, ?)",
+                                  (symbol, interval, loaded_range, json.dumps(meta or {}), json.dumps(events or {})))
+
+@st.cache_resource(show_spinner=False)
+def get_bar_store():
+    try:
+        return BarStore(os.path.join(DATA_DIR, "bars.sqlite3"))
+    except Exception:
+        return None
+
+class SeriesEntry:
+    def __init__(self, interval, symbol=None):
+        self.symbol = symbol
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.meta = {}
+        self.events = {}
+        self.loaded_range = None
+        self.bars = {"timestamp": np.empty(0, dtype=np.int64)}
+        self.bars.update({f: np.empty(0) for f in BAR_FIELDS})
+        self.nbytes = 0
+        # 마지막으로 병합한 ChartData (SWR 캐시 히트는 같은 객체를 돌려주므로 다시 병합/저장하지 않는다)
+        self.merged = None
+
+    def _resize(self):
+        self.nbytes = sum(c.nbytes for c in self.bars.values()) + len(json.dumps(self.meta)) + len(json.dumps(self.events))
+
+    def load(self, bar_store):
+        # 재시작/다른 사용자: 디스크의 과거 봉을 먼저 올리고 이후엔 빠진 꼬리만 요청
+        saved = bar_store.read_meta(self.symbol, self.interval)
+        if not saved: return
+        rows = bar_store.read(self.symbol, self.interval)
+        if not rows: return
+        self.loaded_range, self.meta, self.events = saved
+        columns = list(zip(*rows))
+        self.bars["timestamp"] = np.array(columns[0], dtype=np.int64)
+        for f, col in zip(BAR_FIELDS, columns[1:]):
+            self.bars[f] = np.array([np.nan if v is None else v for v in col], dtype=np.float64)
+        self._resize()
+
+    def covers(self, rng):
+        return self.loaded_range is not None and RANGE_SECONDS[self.loaded_range] >= RANGE_SECONDS[rng]
+
+    def merge(self, chart, rng):
+        new_bars = chart.columns
+        with self.lock:
+            if self.merged is not None and self.merged() is chart: return
+            self.merged = weakref.ref(chart)
+            self.meta = chart.meta or self.meta
+            for kind, items in chart.events.items():
+                self.events.setdefault(kind, {}).update(items)
+            if self.loaded_range is None or RANGE_SECONDS[rng] > RANGE_SECONDS[self.loaded_range]:
+                self.loaded_range = rng
+            stamps = self.bars["timestamp"]
+            if len(new_bars["timestamp"]):
+                gmtoffset = self.meta.get('gmtoffset', 0)
+                first = int(new_bars["timestamp"][0])
+                cut = _bar_bucket(first, self.interval, gmtoffset)
+                # 꼬리 구간 첫 봉 이후의 보유 봉은 새 값으로 교체 (마지막 봉 수정/중복 제거)
+                keep = len(stamps)
+                while keep > 0 and _bar_bucket(int(stamps[keep - 1]), self.interval, gmtoffset) >= cut:
+                    keep -= 1
+                replace_from = int(stamps[keep]) if keep < len(stamps) else first
+                for f in ("timestamp",) + BAR_FIELDS:
+                    self.bars[f] = np.concatenate((self.bars[f][:keep], new_bars[f]))
+                bar_store = get_bar_store() if self.interval in PERSIST_INTERVALS else None
+                if bar_store is not None:
+                    try:
+                        volume = [None if v != v else int(v) for v in new_bars["volume"].tolist()]
+                        columns = [new_bars["timestamp"].tolist()] + [_json_column(new_bars[f]) for f in BAR_FIELDS[:-1]] + [volume]
+                        bar_store.append(self.symbol, self.interval, list(zip(*columns)), replace_from=min(replace_from, first),
+                                         loaded_range=self.loaded_range, meta=self.meta, events=self.events)
+                    except Exception:
+                        pass
+            horizon = RANGE_SECONDS[self.loaded_range]
+            if horizon != float("inf") and len(self.bars["timestamp"]):
+                drop = int(np.searchsorted(self.bars["timestamp"], time.time() - horizon, side='left'))
+                if drop:
+                    for f in ("timestamp",) + BAR_FIELDS: self.bars[f] = self.bars[f][drop:].copy()
+            self._resize()
+
+    def view(self, rng):
+        # rng 구간의 컬럼 슬라이스 (복사 없음 - merge는 배열을 제자리 수정하지 않고 새로 만든다)
+        with self.lock:
+            stamps = self.bars["timestamp"]
+            start = 0
+            if RANGE_SECONDS[rng] != float("inf"):
+                start = int(np.searchsorted(stamps, time.time() - RANGE_SECONDS[rng], side='left'))
+            columns = {f: c[start:] for f, c in self.bars.items()}
+            return ChartData(dict(self.meta), {k: dict(v) for k, v in self.events.items()}, columns)
+
+    def tail_range(self, rng):
+        stamps = self.bars["timestamp"]
+        if not len(stamps): return rng
+        gap = time.time() - int(stamps[-1]) + INTERVAL_SECONDS.get(self.interval, DAY_SECONDS)
+        for candidate in TAIL_RANGES:
+            if RANGE_SECONDS[candidate] >= RANGE_SECONDS[rng]: return rng
+            if RANGE_SECONDS[candidate] >= gap: return candidate
+        return rng
+
+# ✅ [변경] 항목 수가 아니라 상주 바이트 예산으로 LRU 축출
+@st.cache_resource(show_spinner=False)
+def get_series_store():
+    return {"lock": threading.Lock(), "entries": OrderedDict(), "max_bytes": SERIES_CACHE_BYTES}
+
+def _series_entry(symbol, interval):
+    store = get_series_store()
+    key = (symbol, interval)
+    with store["lock"]:
+        entry = store["entries"].get(key)
+        if entry is None:
+            entry = SeriesEntry(interval, symbol)
+            bar_store = get_bar_store() if interval in PERSIST_INTERVALS else None
+            if bar_store is not None:
+                try:
+                    entry.load(bar_store)
+                except Exception:
+                    pass
+            store["entries"][key] = entry
+        store["entries"].move_to_end(key)
+    return entry
+
+def series_store_bytes():
+    store = get_series_store()
+    with store["lock"]:
+        return sum(entry.nbytes for entry in store["entries"].values())
+
+def _trim_series_store():
+    store = get_series_store()
+    with store["lock"]:
+        total = sum(entry.nbytes for entry in store["entries"].values())
+        while total > store["max_bytes"] and len(store["entries"]) > 1:
+            _, entry = store["entries"].popitem(last=False)
+            total -= entry.nbytes
+
+def get_series_chart(symbol, rng, interval):
+    entry = _series_entry(symbol, interval)
+    fetch_range = entry.tail_range(rng) if entry.covers(rng) else rng
+    chart = get_chart_bars(symbol, fetch_range, interval)
+    if chart is not None:
+        entry.merge(chart, fetch_range)
+        _trim_series_store()
+    elif not entry.covers(rng):
+        return None
+    return entry.view(rng)
+
+def cache_footprint():
+    # 바이트 예산이 걸린 캐시들의 현재 상주 크기
+    footprint = {"series": series_store_bytes()}
+    registry = get_swr_registry()
+    with registry["lock"]:
+        states = dict(registry["states"])
+    for name, state in states.items():
+        if state.sizeof is not None:
+            with state.lock: footprint[name] = state.nbytes
+    return footprint
+
+# ==========================================
+# 🇰🇷 [엔진 2] 네이버 증권 실시간 엔진
+# ==========================================
+# ✅ [변경] 전체 DOM 파싱 대신 필요한 4개 요소만 바이트 정규식으로 훑고, 다 찾으면 즉시 중단
+NAVER_FIELD_RE = re.compile(rb'<(\w+)[^>]*\bid="(_nowVal|_rate|_quant|_amount)"[^>]*>(.*?)</\1>', re.S)
+NAVER_TAG_RE = re.compile(rb'<[^>]+>')
+NAVER_FIELDS = ("_nowVal", "_rate", "_quant", "_amount")
+
+def scan_naver_fields(content):
+    found = {}
+    for m in NAVER_FIELD_RE.finditer(content):
+        found.setdefault(m.group(2).decode(), NAVER_TAG_RE.sub(b'', m.group(3)))
+        if len(found) == len(NAVER_FIELDS): break
+    return found
+
+def _soup_naver_fields(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    return {f: soup.select_one(f'#{f}').text.encode() for f in NAVER_FIELDS}
+
+def parse_naver_quote(content):
+    fields = scan_naver_fields(content)
+    if len(fields) < len(NAVER_FIELDS):
+        # 페이지 구조가 바뀌었을 때만 느린 경로로 폴백
+        fields = _soup_naver_fields(content)
+    digits = lambda raw: re.sub(rb'[^\d]', b'', raw)
+    return {
+        "price": float(digits(fields["_nowVal"])),
+        "rate": float(re.sub(rb'[^\d\.\-]', b'', fields["_rate"])),
+        "volume": int(digits(fields["_quant"])),
+        "amount": int(digits(fields["_amount"])) * 1000000
+    }
+
+@swr_cache(ttl=lambda code: market_ttl(f"{code}.KS"))
+def get_naver_stock_data(code):
+    url = f"https://finance.naver.com/item/sise.naver?code={code}"
+    try:
+        res = http_get(url)
+        return parse_naver_quote(res.content)
+    except Exception:
+        return None
+
+# ==========================================
+# 🧠 뉴스 및 차트 지표 계산 로직
+# ==========================================
+# ✅ [변경] 뉴스: 정규화한 검색어 단위 캐시 + ETag/If-Modified-Since 조건부 요청 + 앞 N개만 스트리밍 파싱
+# "토요타 (일본)"과 "토요타 (미국)"은 같은 검색어 → 요청 1건. 인기 검색어는 백그라운드 갱신기가 미리 갱신
+NEWS_LIMIT = 5
+NEWS_TTL = 300
+
+def news_search_term(original_name):
+    return " ".join(original_name.split('(')[0].split())
+
+class NewsStore:
+    def __init__(self, max_entries=512):
+        self.lock = threading.Lock()
+        self.validators = OrderedDict()     # 검색어 → (ETag, Last-Modified, 기사 목록)
+        self.demand = {}                     # 검색어 → (조회 수, 마지막 조회 시각)
+        self.max_entries = max_entries
+
+    def touch(self, term):
+        with self.lock:
+            count, _ = self.demand.get(term, (0, 0))
+            self.demand[term] = (count + 1, time.time())
+
+    def popular(self, n, within=3600):
+        cutoff = time.time() - within
+        with self.lock:
+            recent = [(count, term) for term, (count, seen) in self.demand.items() if seen >= cutoff]
+            for term in [t for t, (_, seen) in self.demand.items() if seen < cutoff]:
+                del self.demand[term]
+        return [term for _, term in sorted(recent, reverse=True)[:n]]
+
+    def get(self, term):
+        with self.lock:
+            return self.validators.get(term)
+
+    def put(self, term, etag, last_modified, items):
+        with self.lock:
+            self.validators[term] = (etag, last_modified, items)
+            self.validators.move_to_end(term)
+            while len(self.validators) > self.max_entries:
+                self.validators.popitem(last=False)
+
+@st.cache_resource(show_spinner=False)
+def get_news_store():
+    return NewsStore()
+
+def parse_news_stream(chunks, limit=NEWS_LIMIT):
+    # 청크를 받는 대로 파서에 넣고 <item> N개가 닫히면 나머지 피드는 읽지 않는다
+    parser = ET.XMLPullParser(events=("end",))
+    news_list = []
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            if elem.tag != "item": continue
+            title = elem.findtext('title') or ""
+            source_elem = elem.find('source')
+            source = source_elem.text if source_elem is not None else "구글 뉴스"
+            if " - " in title: title = " - ".join(title.split(" - ")[:-1])
+            news_list.append({"title": title, "link": elem.findtext('link'), "source": source})
+            elem.clear()
+            if len(news_list) >= limit: return news_list
+    return news_list
+
+@swr_cache(ttl=NEWS_TTL, stale_ttl=3600)
+def fetch_news(term):
+    encoded_query = urllib.parse.quote(f"{term} 주식")
+    news_url = f"https://news.google.com/rss/search?q={encoded_query}+when:7d&hl=ko&gl=KR&ceid=KR:ko"
+    store = get_news_store()
+    cached = store.get(term)
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag: headers['If-None-Match'] = etag
+        if last_modified: headers['If-Modified-Since'] = last_modified
+    try:
+        res = http_get(news_url, headers=headers, stream=True)
+        try:
+            if res.status_code == 304 and cached:
+                return cached[2]
+            if res.status_code != 200:
+                return cached[2] if cached else []
+            news_list = parse_news_stream(res.iter_content(chunk_size=8192))
+        finally:
+            res.close()
+        store.put(term, res.headers.get('ETag'), res.headers.get('Last-Modified'), news_list)
+        return news_list
+    except Exception:
+        return cached[2] if cached else []
+
+def get_cached_news(original_name):
+    clean_search_term = news_search_term(original_name)
+    get_news_store().touch(clean_search_term)
+    return fetch_news(clean_search_term), clean_search_term
+
+# ✅ [변경] 이동평균/볼린저는 NumPy 누적합·슬라이딩 윈도우로 계산 (앞쪽 window-1개는 기존처럼 None)
+def _pad_none(values, n):
+    return [None] * (n - len(values)) + values
+
+def calc_ma_multi(prices, windows):
+    arr = np.asarray(prices, dtype=np.float64)
+    n = len(arr)
+    if n == 0: return {w: [] for w in windows}
+    # 결측(NaN)은 0으로 누적하고 창 안 결측 개수를 따로 세어 그 창만 NaN (누적합 전체로 번지지 않게)
+    missing = np.isnan(arr)
+    finite = arr[~missing]
+    base = finite[0] if len(finite) else 0.0
+    # 기준값을 빼고 누적합 → 장기 시계열에서도 자릿수 손실 최소화
+    csum = np.concatenate(([0.0], np.cumsum(np.where(missing, 0.0, arr - base))))
+    msum = np.concatenate(([0], np.cumsum(missing))) if len(finite) < n else None
+    result = {}
+    for w in windows:
+        if n < w:
+            result[w] = [None] * n
+            continue
+        ma = (csum[w:] - csum[:-w]) / w + base
+        if msum is not None: ma[(msum[w:] - msum[:-w]) > 0] = np.nan
+        result[w] = _pad_none(ma.tolist(), n)
+    return result
+
+def calc_ma(prices, window):
+    return calc_ma_multi(prices, (window,))[window]
+
+def calc_ema(prices, days):
+    ema = [None] * len(prices)
+    if not prices or len(prices) < days: return ema
+    k = 2 / (days + 1)
+    ema[days-1] = sum(prices[:days]) / days
+    for i in range(days, len(prices)): ema[i] = prices[i] * k + ema[i-1] * (1 - k)
+    return ema
+
+def calc_macd(prices):
+    ema12 = calc_ema(prices, 12)
+    ema26 = calc_ema(prices, 26)
+    macd = []
+    for e12, e26 in zip(ema12, ema26):
+        if e12 is not None and e26 is not None: macd.append(e12 - e26)
+        else: macd.append(None)
+    valid_idx = [i for i, m in enumerate(macd) if m is not None]
+    signal = [None] * len(prices)
+    if valid_idx and len(valid_idx) >= 9:
+        first_idx = valid_idx[0]
+        signal[first_idx+8] = sum(macd[first_idx:first_idx+9]) / 9
+        k = 2 / (9 + 1)
+        for i in range(first_idx+9, len(prices)): signal[i] = macd[i] * k + signal[i-1] * (1 - k)
+    return macd, signal
+
+def calc_rsi(prices, period=14):
+    return _calc_rsi_with_avgs(prices, period)[0]
+
+# Wilder 평균(avg_gain, avg_loss)을 인덱스별로 함께 돌려준다 (증분 상태 초기화용, 마지막 두 개만 보관)
+def _calc_rsi_with_avgs(prices, period=14):
+    rsi = [None] * len(prices)
+    avgs = []
+    if len(prices) < period + 1: return rsi, avgs
+    gains, losses = [], []
+    for i in range(1, len(prices)):
+        change = prices[i] - prices[i-1]
+        gains.append(change if change > 0 else 0)
+        losses.append(-change if change < 0 else 0)
+    avg_gain = sum(gains[:period]) / period
+    avg_loss = sum(losses[:period]) / period
+    for i in range(period, len(prices)):
+        if i > period:
+            change = prices[i] - prices[i-1]
+            gain = change if change > 0 else 0
+            loss = -change if change < 0 else 0
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        rsi[i] = _rsi_value(avg_gain, avg_loss)
+        if i >= len(prices) - 2: avgs.append((avg_gain, avg_loss))
+    return rsi, avgs
+
+def _rsi_value(avg_gain, avg_loss):
+    if avg_loss == 0: return 100
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+def calc_bb(prices, window=20, num_std=2):
+    n = len(prices)
+    if n < window: return [None] * n, [None] * n, [None] * n
+    windows = np.lib.stride_tricks.sliding_window_view(np.asarray(prices, dtype=np.float64), window)
+    m = windows.mean(axis=1)
+    std = windows.std(axis=1)
+    upper = _pad_none((m + num_std * std).tolist(), n)
+    lower = _pad_none((m - num_std * std).tolist(), n)
+    return upper, _pad_none(m.tolist(), n), lower
+
+def format_abbrev(val, sym):
+    if val == 0: return f"{sym}0"
+    if val >= 1_000_000_000_000: return f"{sym}{val/1_000_000_000_000:.2f}T"
+    if val >= 1_000_000_000: return f"{sym}{val/1_000_000_000:.2f}B"
+    if val >= 1_000_000: return f"{sym}{val/1_000_000:.2f}M"
+    if val >= 1_000: return f"{sym}{val/1_000:.2f}K"
+    return f"{sym}{val:.2f}"
+
+# ==========================================
+# 🔁 [엔진 4] 라이브 틱용 증분 지표 상태 (종목×주기별)
+# ==========================================
+# 마지막 봉 수정/새 봉 추가는 O(1): 롤링 합, EMA, Wilder RSI 평균을 "마지막 봉 직전" 기준으로 보관
+MA_WINDOWS = (3, 20, 60, 120, 480)
+BB_WINDOW, BB_STD = 20, 2
+RSI_PERIOD = 14
+
+class IndicatorState:
+    def __init__(self, timestamps, closes):
+        self.lock = threading.Lock()
+        self.rebuild(timestamps, closes)
+
+    def rebuild(self, timestamps, closes):
+        # 배열로 받아도 내부는 파이썬 리스트 (증분 갱신이 append/제자리 수정)
+        self.ts = timestamps.tolist() if isinstance(timestamps, np.ndarray) else list(timestamps)
+        self.closes = closes.tolist() if isinstance(closes, np.ndarray) else list(closes)
+        n = len(self.closes)
+        self.ma = calc_ma_multi(self.closes, MA_WINDOWS)
+        self.ema = {12: calc_ema(self.closes, 12), 26: calc_ema(self.closes, 26)}
+        self.macd, self.signal = calc_macd(self.closes)
+        self.rsi, avgs = _calc_rsi_with_avgs(self.closes, RSI_PERIOD)
+        self.bb_upper, self.bb_mid, self.bb_lower = calc_bb(self.closes, BB_WINDOW, BB_STD)
+        # 마지막 봉을 제외한 (w-1)개 롤링 합
+        self.ma_head = {w: sum(self.closes[max(0, n - w):n - 1]) for w in MA_WINDOWS}
+        self.rsi_avg_prev = avgs[-2] if len(avgs) >= 2 else None
+        self.rsi_avg_last = avgs[-1] if avgs else None
+
+    def sync(self, timestamps, closes, start=0):
+        # ✅ [변경] 꼬리 2~3개만 비교하고 start 이후 구간만 복사 → 라이브 틱 비용이 전체 이력이 아니라 화면 구간에 비례
+        with self.lock:
+            n_old, n_new = len(self.ts), len(timestamps)
+            if n_old >= 2 and n_new == n_old and timestamps[-1] == self.ts[-1] \
+                    and timestamps[-2] == self.ts[-2] and closes[-2] == self.closes[-2]:
+                if closes[-1] != self.closes[-1]: self._revise(float(closes[-1]))
+            elif n_old >= 2 and n_new == n_old + 1 and timestamps[-2] == self.ts[-1] \
+                    and timestamps[-3] == self.ts[-2] and closes[-3] == self.closes[-2]:
+                if closes[-2] != self.closes[-1]: self._revise(float(closes[-2]))
+                self._append(int(timestamps[-1]), float(closes[-1]))
+            else:
+                self.rebuild(timestamps, closes)
+            return self.snapshot(start)
+
+    def snapshot(self, start=0):
+        # 락 안에서 start 이후만 float 배열(None → NaN)로 복사해 넘긴다
+        # (내부 리스트는 다른 세션의 sync/라이브 틱이 제자리에서 늘리고 고친다)
+        return {
+            "ma": {w: _nan_array(v[start:]) for w, v in self.ma.items()},
+            **{k: _nan_array(getattr(self, k)[start:]) for k in ("rsi", "macd", "signal", "bb_upper", "bb_mid", "bb_lower")},
+        }
+
+    def _revise(self, close):
+        self.closes[-1] = close
+        self._compute_last()
+
+    def _append(self, ts, close):
+        # 현재 마지막 봉을 확정 상태로 밀어 넣고 새 봉 계산
+        last = len(self.closes) - 1
+        for w in MA_WINDOWS:
+            drop = self.closes[last - w + 1] if last - w + 1 >= 0 else 0
+            self.ma_head[w] += self.closes[last] - drop
+        self.rsi_avg_prev = self.rsi_avg_last
+        self.ts.append(ts)
+        self.closes.append(close)
+        for series in (*self.ma.values(), *self.ema.values(), self.macd, self.signal, self.rsi,
+                       self.bb_upper, self.bb_mid, self.bb_lower):
+            series.append(None)
+        self._compute_last()
+
+    def _compute_last(self):
+        closes = self.closes
+        n = len(closes)
+        last = n - 1
+        c = closes[last]
+        for w in MA_WINDOWS:
+            self.ma[w][last] = (self.ma_head[w] + c) / w if n >= w else None
+
+        for days, ema in self.ema.items():
+            k = 2 / (days + 1)
+            if last < days - 1: ema[last] = None
+            elif last == days - 1: ema[last] = sum(closes[:days]) / days
+            else: ema[last] = c * k + ema[last - 1] * (1 - k)
+
+        e12, e26 = self.ema[12][last], self.ema[26][last]
+        self.macd[last] = e12 - e26 if e12 is not None and e26 is not None else None
+        first_idx = 26 - 1
+        if last < first_idx + 8: self.signal[last] = None
+        elif last == first_idx + 8: self.signal[last] = sum(self.macd[first_idx:first_idx + 9]) / 9
+        else: self.signal[last] = self.macd[last] * (2 / 10) + self.signal[last - 1] * (1 - 2 / 10)
+
+        if last < RSI_PERIOD:
+            self.rsi[last] = None
+        else:
+            if last == RSI_PERIOD:
+                changes = [closes[i] - closes[i - 1] for i in range(1, RSI_PERIOD + 1)]
+                avg_gain = sum(ch if ch > 0 else 0 for ch in changes) / RSI_PERIOD
+                avg_loss = sum(-ch if ch < 0 else 0 for ch in changes) / RSI_PERIOD
+            else:
+                prev_gain, prev_loss = self.rsi_avg_prev
+                change = c - closes[last - 1]
+                avg_gain = (prev_gain * (RSI_PERIOD - 1) + (change if change > 0 else 0)) / RSI_PERIOD
+                avg_loss = (prev_loss * (RSI_PERIOD - 1) + (-change if change < 0 else 0)) / RSI_PERIOD
+            self.rsi_avg_last = (avg_gain, avg_loss)
+            self.rsi[last] = _rsi_value(avg_gain, avg_loss)
+
+        if n >= BB_WINDOW:
+            window = closes[n - BB_WINDOW:]
+            m = sum(window) / BB_WINDOW
+            std = (sum((x - m) ** 2 for x in window) / BB_WINDOW) ** 0.5
+            self.bb_upper[last], self.bb_mid[last], self.bb_lower[last] = m + BB_STD * std, m, m - BB_STD * std
+
+@st.cache_resource(show_spinner=False)
+def get_indicator_registry():
+    return {"lock": threading.Lock(), "states": OrderedDict(), "max_entries": 256}
+
+def get_indicator_snapshot(symbol, interval_key, timestamps, closes, start=0):
+    registry = get_indicator_registry()
+    key = (symbol, interval_key)
+    with registry["lock"]:
+        state = registry["states"].get(key)
+        if state is None:
+            state = IndicatorState([], [])
+            registry["states"][key] = state
+            while len(registry["states"]) > registry["max_entries"]:
+                registry["states"].popitem(last=False)
+        registry["states"].move_to_end(key)
+    return state.sync(timestamps, closes, start)
+
+# ==========================================
+# 🧾 [엔진 15] 국내 재무 데이터 (두 엔드포인트 동시 요청 + 디스크 저장 + 결산 주기 기반 재검증)
+# ==========================================
+# 연간 실적은 새 결산이 공시될 때만 바뀐다 → 최신 결산월 + 12개월 + 공시기한(90일)이 지나야 다시 확인.
+# 시총/PER 등 integration 값은 주가를 따라 움직이므로 하루 단위로만 재검증.
+FIN_FILING_DAYS = 90
+FIN_RECHECK_SECONDS = DAY_SECONDS
+# 연간 재무표가 없는 종목(ETF·신규 상장)도 "없음"으로 저장하고 이 간격 동안 다시 묻지 않는다 (기존 48시간 캐시와 동일)
+FIN_MISS_SECONDS = 2 * DAY_SECONDS
+FIN_PREFETCH_CONCURRENCY = int(os.environ.get("FIN_PREFETCH_CONCURRENCY", 4))
+FIN_DEFAULTS = ('매출', '영업이익', '순이익', '매출_증감', '영업이익_증감', '순이익_증감', '시가총액', 'PER', 'PBR', 'EPS', '배당수익률')
+
+def parse_integration(int_data):
+    total_infos = {item['key']: item['value'] for item in int_data.get('totalInfos', [])}
+    return {
+        '시가총액': total_infos.get('시총', 'N/A'), 'PER': total_infos.get('PER', 'N/A'),
+        'PBR': total_infos.get('PBR', 'N/A'), 'EPS': total_infos.get('EPS', 'N/A'),
+        '배당수익률': total_infos.get('배당수익률', 'N/A'),
+    }
+
+def parse_annual(data):
+    # (결과, 최신 결산 키 "YYYYMM") - 확정 실적이 없으면 None
+    title_list = data['financeInfo']['trTitleList']
+    actual_keys = [t['key'] for t in title_list if t.get('isConsensus', 'N') == 'N']
+    if not actual_keys:
+        return None
+
+    latest_key = actual_keys[-1]
+    prev_key = actual_keys[-2] if len(actual_keys) >= 2 else None
+
+    def get_val(row, key):
+        try:
+            return float(str(row['columns'][key]['value']).replace(',', ''))
+        except:
+            return None
+
+    def calc_pct(now, prev_val):
+        if now is None or prev_val is None: return 'N/A'
+        if prev_val < 0 and now >= 0: return '흑자전환'
+        if prev_val >= 0 and now < 0: return '적자전환'
+        if prev_val < 0 and now < 0: return '적자지속'
+        if prev_val != 0:
+            pct = ((now - prev_val) / abs(prev_val)) * 100
+            return f"{pct:+.1f}%"
+        return 'N/A'
+
+    result = {}
+    title_map = {
+        '매출액': ('매출', '매출_증감'),
+        '영업이익': ('영업이익', '영업이익_증감'),
+        '당기순이익': ('순이익', '순이익_증감'),
+    }
+    for row in data['financeInfo']['rowList']:
+        t = row.get('title', '')
+        if t in title_map:
+            key_now, key_pct = title_map[t]
+            val_now = get_val(row, latest_key)
+            val_prev = get_val(row, prev_key) if prev_key else None
+            if val_now is not None:
+                result[key_now] = f"{int(val_now):,}억원"
+                result[key_pct] = calc_pct(val_now, val_prev)
+    return result, latest_key
+
+def next_filing_due(period_key):
+    # "202312" → 다음 결산(202412) 공시기한 2025-03-31 무렵의 epoch
+    try:
+        year, month = int(period_key[:4]), int(period_key[4:6])
+    except (TypeError, ValueError):
+        return 0
+    period_end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=KST)
+    return (period_end + timedelta(days=365 + FIN_FILING_DAYS)).timestamp()
+
+class FundamentalsStore:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS fundamentals (
+                code TEXT PRIMARY KEY, integration TEXT, integration_at REAL,
+                annual TEXT, annual_at REAL, period TEXT)""")
+
+    def read(self, code):
+        with self.lock:
+            row = self.conn.execute("SELECT integration, integration_at, annual, annual_at, period FROM fundamentals WHERE code=?", (code,)).fetchone()
+        if not row: return None
+        return {"integration": json.loads(row[0]) if row[0] else None, "integration_at": row[1] or 0,
+                "annual": json.loads(row[2]) if row[2] else None, "annual_at": row[3] or 0, "period": row[4]}
+
+    def write(self, code, record):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO fundamentals VALUES (?, ?, ?, ?, ?, ?)", (
+                code, json.dumps(record["integration"]) if record["integration"] is not None else None, record["integration_at"],
+                json.dumps(record["annual"]) if record["annual"] is not None else None, record["annual_at"], record["period"]))
+
+class FundamentalsService:
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.Lock()
+        self.records = {}
+        self.inflight = {}
+        # 엔드포인트 요청 전용 풀: fetch 풀 스레드가 자기 풀의 작업을 기다리다 막히지 않게 분리
+        self.pool = ThreadPoolExecutor(max_workers=2 * FIN_PREFETCH_CONCURRENCY + 4, thread_name_prefix="fin")
+
+    def _due(self, record, now):
+        # (integration 재검증 필요, annual 재검증 필요)
+        if record is None: return True, True
+        if record["annual"] is None:
+            due = now - record["annual_at"] >= FIN_MISS_SECONDS
+            return due, due
+        integration_due = record["integration"] is None or now - record["integration_at"] >= FIN_RECHECK_SECONDS
+        annual_due = record["annual"] is None or (now >= next_filing_due(record["period"])
+                                                   and now - record["annual_at"] >= FIN_RECHECK_SECONDS)
+        return integration_due, annual_due
+
+    def _record(self, code):
+        with self.lock:
+            record = self.records.get(code)
+        if record is None and self.store is not None:
+            try:
+                record = self.store.read(code)
+            except Exception:
+                record = None
+            if record is not None:
+                with self.lock: self.records[code] = record
+        return record
+
+    def get(self, code):
+        # 저장본이 있으면 즉시 반환하고 재검증은 백그라운드, 없을 때만 렌더 경로에서 기다린다
+        record = self._record(code)
+        if record is None:
+            record = self.refresh(code)
+        elif any(self._due(record, time.time())):
+            self.refresh_async(code)
+        return self.merge(record) if record["annual"] is not None else None
+
+    def refresh_async(self, code):
+        with self.lock:
+            if code in self.inflight: return
+            self.inflight[code] = True
+        get_fetch_pool().submit(self._refresh_quietly, code, True)
+
+    def _refresh_quietly(self, code, claimed=False):
+        try:
+            self.refresh(code, claimed=claimed)
+        except Exception:
+            pass
+
+    def refresh(self, code, claimed=False):
+        try:
+            record = self._record(code)
+            now = time.time()
+            integration_due, annual_due = self._due(record, now)
+            record = dict(record) if record else {"integration": None, "integration_at": 0, "annual": None, "annual_at": 0, "period": None}
+            pool = self.pool
+            # ✅ [변경] 두 엔드포인트를 순차가 아니라 동시에 요청
+            int_future = pool.submit(self._fetch_integration, code) if integration_due else None
+            annual_future = pool.submit(self._fetch_annual, code) if annual_due else None
+            if int_future is not None:
+                integration = int_future.result()
+                if integration is not None or record["integration"] is None:
+                    record["integration"] = integration or {'시가총액': 'N/A'}
+                record["integration_at"] = now
+            if annual_future is not None:
+                parsed = annual_future.result()
+                if parsed is not None:
+                    record["annual"], record["period"] = parsed
+                record["annual_at"] = now
+            # 연간표가 없어도 저장 (annual=None + annual_at = 부재 기록)
+            with self.lock: self.records[code] = record
+            if self.store is not None:
+                try:
+                    self.store.write(code, record)
+                except Exception:
+                    pass
+            return record
+        finally:
+            if claimed:
+                with self.lock: self.inflight.pop(code, None)
+
+    def prefetch(self, codes, concurrency=FIN_PREFETCH_CONCURRENCY):
+        # 유니버스 일괄 워밍: 재검증이 필요한 종목만, 동시 요청 수는 concurrency로 제한
+        now = time.time()
+        due = [code for code in codes if any(self._due(self._record(code), now))]
+        if not due: return 0
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fin-prefetch") as pool:
+            list(pool.map(self._refresh_quietly, due))
+        return len(due)
+
+    @staticmethod
+    def merge(record):
+        result = dict(record["integration"] or {})
+        result.update(record["annual"])
+        for key in FIN_DEFAULTS:
+            result.setdefault(key, 'N/A')
+        return result
+
+    @staticmethod
+    def _fetch_integration(code):
+        try:
+            return parse_integration(http_get(f"https://m.stock.naver.com/api/stock/{code}/integration").json())
+        except Exception:
+            return None
+
+    @staticmethod
+    def _fetch_annual(code):
+        try:
+            return parse_annual(http_get(f"https://m.stock.naver.com/api/stock/{code}/finance/annual").json())
+        except Exception:
+            return None
+
+@st.cache_resource(show_spinner=False)
+def get_fundamentals():
+    try:
+        store = FundamentalsStore(os.path.join(DATA_DIR, "fundamentals.sqlite3"))
+    except Exception:
+        store = None
+    return FundamentalsService(store)
+
+def get_financial_data(symbol):
+    is_kr = symbol.endswith(".KS") or symbol.endswith(".KQ")
+    if not is_kr:
+        return None
+    try:
+        with span("fetch:get_financial_data"):
+            return get_fundamentals().get(symbol.split('.')[0])
+    except Exception:
+        return None
+
+def kr_universe_codes():
+    # 로컬 종목 인덱스의 코스피/코스닥 종목 (KOSPI200/KOSDAQ150 대용)
+    return [row["symbol"].split('.')[0] for row in get_symbol_index().rows if row.get("market") in ("KOSPI", "KOSDAQ")]
+
+# ==========================================
+# ⚡ [엔진 3] 동시 수집 플래너 (콜드 렌더 = 가장 느린 요청 1건)
+# ==========================================
+INDEX_TILES = [("나스닥", "^IXIC", ""), ("S&P 500", "^GSPC", ""), ("코스피", "^KS11", ""), ("원/달러", "USDKRW=X", "₩")]
+
+FETCH_RANGE_MAP = {"분봉": "30d", "일봉": "5y", "월봉": "max", "연봉": "max"}
+INTERVAL_MAP = {"분봉": "5m", "일봉": "1d", "월봉": "1mo", "연봉": "1mo"}
+
+# 심볼 접미사로 통화를 미리 추정해 환율 요청도 첫 파동에 함께 띄운다
+SUFFIX_CURRENCY = {".KS": "KRW", ".KQ": "KRW", ".T": "JPY", ".HK": "HKD", ".TW": "TWD", ".AS": "EUR", ".PA": "EUR"}
+
+def guess_currency(symbol):
+    for suffix, cur in SUFFIX_CURRENCY.items():
+        if symbol.endswith(suffix): return cur
+    return "USD"
+
+@st.cache_resource(show_spinner=False)
+def get_fetch_pool():
+    return ThreadPoolExecutor(max_workers=16, thread_name_prefix="fetch")
+
+def plan_fetches(target_symbol, news_name, _timeframe):
+    pool = get_fetch_pool()
+    plan = {}
+    refresher = get_market_refresher()
+    for _, sym, _ in INDEX_TILES:
+        # 백그라운드 갱신기가 들고 있는 스냅샷이 있으면 대기 없이 바로 사용
+        snap = refresher.quote(sym) if refresher else None
+        plan[f"quote:{sym}"] = _done_future(snap) if snap else pool.submit(get_quick_quote, sym)
+    plan["1y"] = pool.submit(get_series_chart, target_symbol, "1y", "1d")
+    plan["chart"] = pool.submit(get_series_chart, target_symbol, FETCH_RANGE_MAP[_timeframe], INTERVAL_MAP[_timeframe])
+    if target_symbol.endswith(".KS") or target_symbol.endswith(".KQ"):
+        plan["naver"] = pool.submit(get_naver_stock_data, target_symbol.split('.')[0])
+    plan_fx(plan, guess_currency(target_symbol))
+    plan["news"] = pool.submit(get_cached_news, news_name)
+    plan["fin"] = pool.submit(get_financial_data, target_symbol)
+    return plan
+
+def plan_fx(plan, currency):
+    # 추정 통화가 틀렸으면 meta 확인 직후 올바른 환율만 다시 계산 (표가 데워져 있으면 로컬 조회)
+    if currency == "KRW" or plan.get("fx_currency") == currency: return
+    plan["fx_currency"] = currency
+    plan["fx"] = get_fetch_pool().submit(fx_rate, currency)
+
+def plan_result(plan, key):
+    # 렌더 스레드가 업스트림을 기다린 시간 (키별)
+    future = plan.get(key)
+    if future is None: return None
+    with span(f"wait:{key.split(':')[0]}"):
+        return future.result()
+
+def _done_future(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+# ==========================================
+# ⏱️ [엔진 7] 공용 시세 백그라운드 갱신기 (지수 타일 + VIP 종목)
+# ==========================================
+# 그룹별 주기(초)는 환경변수 REFRESH_EVERY_<그룹명 대문자> 로 덮어쓸 수 있다
+REFRESH_GROUPS = {
+    "indices": {"symbols": [sym for _, sym, _ in INDEX_TILES], "every": 10, "quotes": True, "charts": ()},
+    # 1y/5y 일봉은 같은 SeriesEntry(심볼, 1d)를 공유하고 꼬리 요청도 같으므로 5y 하나만 갱신해도 1y까지 따뜻하다
+    "vip": {"symbols": list(vip_dict.values()), "every": 60, "quotes": False, "charts": (("5y", "1d"),)},
+    # 최근 1시간 인기 뉴스 검색어 상위 N개 (조건부 요청이라 대부분 304)
+    "news": {"symbols": (), "every": 240, "quotes": False, "charts": (), "popular_news": 20},
+    # 국내 유니버스 재무 데이터 일괄 워밍 (재검증 대상만 요청하므로 평소엔 거의 0건)
+    "fundamentals": {"symbols": (), "every": 6 * 3600, "quotes": False, "charts": (), "prefetch_fundamentals": True},
+}
+
+class MarketRefresher:
+    def __init__(self, groups):
+        self.groups = {}
+        for name, group in groups.items():
+            every = float(os.environ.get(f"REFRESH_EVERY_{name.upper()}", group["every"]))
+            self.groups[name] = dict(group, every=every)
+        self.lock = threading.Lock()
+        self.quotes = {}
+        self.next_due = {name: 0.0 for name in self.groups}
+        self.symbol_due = {}
+        self.thread = threading.Thread(target=self._run, name="market-refresher", daemon=True)
+        self.thread.start()
+
+    def quote(self, symbol):
+        # 주기의 2배 이상 묵은 스냅샷은 무시하고 세션이 직접 가져오게 둔다
+        with self.lock:
+            hit = self.quotes.get(symbol)
+        if hit is None: return None
+        value, fetched_at, every = hit
+        return value if time.time() - fetched_at < every * 2 else None
+
+    def _run(self):
+        while True:
+            now = time.time()
+            for name, group in self.groups.items():
+                if now >= self.next_due[name]:
+                    self.next_due[name] = now + group["every"]
+                    for sym in group["symbols"]:
+                        # 장 밖 종목은 다음 개장(최대 CLOSED_TTL_MAX)까지 건너뛴다
+                        if now < self.symbol_due.get((name, sym), 0): continue
+                        self.symbol_due[(name, sym)] = now + max(group["every"], market_ttl(sym))
+                        get_fetch_pool().submit(self._refresh_symbol, sym, group)
+                    for term in get_news_store().popular(group.get("popular_news", 0)):
+                        get_fetch_pool().submit(self._refresh_news, term)
+                    if group.get("prefetch_fundamentals"):
+                        threading.Thread(target=self._prefetch_fundamentals, name="fin-prefetch", daemon=True).start()
+            time.sleep(1)
+
+    def _refresh_symbol(self, symbol, group):
+        try:
+            with swr_bypass():
+                self._refresh_symbol_now(symbol, group)
+        except Exception:
+            pass
+
+    def _prefetch_fundamentals(self):
+        try:
+            get_fundamentals().prefetch(kr_universe_codes())
+        except Exception:
+            pass
+
+    def _refresh_news(self, term):
+        try:
+            with swr_bypass():
+                fetch_news(term)
+        except Exception:
+            pass
+
+    def _refresh_symbol_now(self, symbol, group):
+        if group["quotes"]:
+            value = get_quick_quote(symbol)
+            if value and value[0] > 0:
+                with self.lock: self.quotes[symbol] = (value, time.time(), max(group["every"], market_ttl(symbol)))
+        for rng, interval in group["charts"]:
+            get_series_chart(symbol, rng, interval)
+        if symbol.endswith(".KS") or symbol.endswith(".KQ"):
+            get_naver_stock_data(symbol.split('.')[0])
+
+@st.cache_resource(show_spinner=False)
+def get_market_refresher():
+    if os.environ.get("MARKET_REFRESHER", "1") == "0": return None
+    return MarketRefresher(REFRESH_GROUPS)
+
+# ==========================================
+# 🧱 [엔진 10] 컬럼형 봉 컨테이너 (clean_data 튜플 / f_* 리스트 대체)
+# ==========================================
+def _chart_column(values, n, fill):
+    # 야후 배열이 타임스탬프보다 짧으면 모자란 뒤쪽은 fill(종가 등)로 채운다
+    arr = np.empty(n, dtype=np.float64)
+    m = min(len(values or []), n)
+    arr[:m] = np.array(values[:m], dtype=np.float64) if m else arr[:m]
+    arr[m:] = fill[m:] if isinstance(fill, np.ndarray) else fill
+    return arr
+
+# 4시간 넘게 비는 곳 = 세션 경계
+SESSION_GAP_SECONDS = 4 * 3600
+
+class Bars:
+    __slots__ = ("ts", "open", "high", "low", "close", "volume", "columns")
+
+    def __init__(self, ts, open_, high, low, close, volume, columns=None):
+        self.ts = ts
+        self.open, self.high, self.low, self.close = open_, high, low, close
+        self.volume = volume
+        self.columns = columns if columns is not None else {}
+
+    @classmethod
+    def from_chart(cls, result):
+        ts = np.asarray(result.get('timestamp') or [], dtype=np.int64)
+        quote = result['indicators']['quote'][0]
+        n = len(ts)
+        close = _chart_column(quote.get('close'), n, np.nan)
+        open_, high, low = (_chart_column(quote.get(f), n, close) for f in ("open", "high", "low"))
+        volume = np.nan_to_num(_chart_column(quote.get('volume'), n, 0.0)).astype(np.int64)
+        keep = ~np.isnan(close)
+        return cls(ts[keep], open_[keep], high[keep], low[keep], close[keep], volume[keep])
+
+    @classmethod
+    def from_columns(cls, columns):
+        # ChartData/SeriesEntry 컬럼(종가 없는 봉은 이미 제거됨)에서 바로 만든다 - 봉별 객체 없음
+        volume = np.nan_to_num(columns["volume"]).astype(np.int64)
+        return cls(columns["timestamp"], columns["open"], columns["high"], columns["low"], columns["close"], volume)
+
+    def __len__(self):
+        return len(self.ts)
+
+    def slice(self, start, stop=None):
+        # NumPy 슬라이스라 복사 없이 뷰만 만든다
+        return Bars(self.ts[start:stop], self.open[start:stop], self.high[start:stop], self.low[start:stop],
+                    self.close[start:stop], self.volume[start:stop],
+                    {k: v[start:stop] for k, v in self.columns.items()})
+
+    def session_start(self, gap_seconds=SESSION_GAP_SECONDS):
+        # 4시간 넘게 비는 곳 = 세션 경계 → 마지막 세션 시작 인덱스
+        gaps = np.flatnonzero(np.diff(self.ts) > gap_seconds)
+        return int(gaps[-1]) + 1 if len(gaps) else 0
+
+    def index_at(self, ts):
+        return int(np.searchsorted(self.ts, ts, side='left'))
+
+# ✅ [추가] 월봉 → 연봉 집계
+def aggregate_to_yearly(bars):
+    if len(bars) == 0: return bars
+    years = (bars.ts + 9 * 3600).astype('datetime64[s]').astype('datetime64[Y]').astype(np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(years)) + 1))
+    ends = np.append(starts[1:], len(bars))
+    return Bars(bars.ts[starts], bars.open[starts],
+                np.fmax.reduceat(bars.high, starts), np.fmin.reduceat(bars.low, starts),
+                bars.close[ends - 1], np.add.reduceat(bars.volume, starts))
+
+# ==========================================
+# ⏲️ [엔진 18] 분봉 로컬 리샘플링 (5분봉 1회 수집 → 15/30/60분봉은 로컬 집계)
+# ==========================================
+# 야후 1분봉은 최근 7일까지라 30일 분봉 화면의 가장 촘촘한 원본은 5분봉.
+# ✅ [변경] 버킷은 거래소 시간표(EXCHANGES)의 개장 시각에 맞춘다 → 첫 봉이 늦게 찍혀도 09:00/09:30 경계 유지,
+#   점심 휴장이 있는 도쿄/홍콩은 오후장 개장(12:30, 13:00)부터 다시 자른다. 거래소를 모르면 세션 첫 봉 기준.
+INTRADAY_BASE_MINUTES = 5
+INTRADAY_RESOLUTIONS = {"5분": 5, "15분": 15, "30분": 30, "60분": 60}
+
+def _scheduled_anchors(ts, first, session_id, exchange):
+    # 거래일(세션)마다 시간표상 개장 시각들 → 각 봉은 자신보다 늦지 않은 마지막 개장에, 개장 전 봉은 그날 첫 개장에 맞춘다
+    tz = _exchange_tz(exchange)
+    opens, day_floor = [], []
+    for t in ts[first]:
+        day = datetime.fromtimestamp(int(t), tz).date()
+        day_floor.append(len(opens))
+        opens.extend(datetime(day.year, day.month, day.day, oh, om, tzinfo=tz).timestamp() for (oh, om), _ in EXCHANGES[exchange][2])
+    opens = np.asarray(opens, dtype=np.int64)
+    idx = np.maximum(np.searchsorted(opens, ts, side='right') - 1, np.asarray(day_floor)[session_id])
+    return opens[idx]
+
+def resample_intraday(bars, minutes, exchange=None, gap_seconds=SESSION_GAP_SECONDS):
+    n = len(bars)
+    if n == 0 or minutes <= INTRADAY_BASE_MINUTES: return bars
+    width = minutes * 60
+    new_session = np.ones(n, dtype=bool)
+    new_session[1:] = np.diff(bars.ts) > gap_seconds
+    session_id = np.cumsum(new_session) - 1
+    if exchange is None:
+        anchor = bars.ts[new_session][session_id]
+    else:
+        anchor = _scheduled_anchors(bars.ts, new_session, session_id, exchange)
+    slot = (bars.ts - anchor) // width
+    boundary = np.ones(n, dtype=bool)
+    boundary[1:] = (anchor[1:] != anchor[:-1]) | (slot[1:] != slot[:-1])
+    starts = np.flatnonzero(boundary)
+    ends = np.append(starts[1:], n)
+    return Bars(anchor[starts] + slot[starts] * width, bars.open[starts],
+                np.fmax.reduceat(bars.high, starts), np.fmin.reduceat(bars.low, starts),
+                bars.close[ends - 1], np.add.reduceat(bars.volume, starts))
+
+@st.cache_resource(show_spinner=False)
+def get_intraday_cache():
+    return {"lock": threading.Lock(), "entries": OrderedDict(), "max_entries": 64}
+
+def intraday_bars(symbol, bars, minutes):
+    # (종목, 간격)별로 원본 5분봉 서명이 같으면 집계 결과 재사용 (라이브 틱이면 서명이 바뀌어 재계산)
+    if minutes <= INTRADAY_BASE_MINUTES or len(bars) == 0: return bars
+    signature = (len(bars), int(bars.ts[0]), int(bars.ts[-1]), float(bars.close[-1]), int(bars.volume[-1]))
+    cache = get_intraday_cache()
+    key = (symbol, minutes)
+    with cache["lock"]:
+        hit = cache["entries"].get(key)
+        if hit is not None and hit[0] == signature:
+            cache["entries"].move_to_end(key)
+            return hit[1]
+    resampled = resample_intraday(bars, minutes, exchange_of(symbol))
+    with cache["lock"]:
+        cache["entries"][key] = (signature, resampled)
+        cache["entries"].move_to_end(key)
+        while len(cache["entries"]) > cache["max_entries"]:
+            cache["entries"].popitem(last=False)
+    return resampled
+
+# ==========================================
+# 📉 [엔진 9] 긴 차트 다운샘플링 (캔들/거래대금: OHLC 버킷 집계, 선 지표: LTTB)
+# ==========================================
+# 차트 폭(px) 기준 포인트 예산. 카테고리 축이라 모든 트레이스가 같은 버킷 경계/라벨을 공유한다
+CHART_WIDTH_PX = int(os.environ.get("CHART_WIDTH_PX", 1200))
+CHART_POINTS_PER_PX = float(os.environ.get("CHART_POINTS_PER_PX", 0.5))
+CHART_POINT_BUDGET = max(50, int(CHART_WIDTH_PX * CHART_POINTS_PER_PX))
+
+def _nan_array(values):
+    return np.array(values, dtype=np.float64)
+
+def bucket_starts(n, budget):
+    return np.unique(np.linspace(0, n, budget + 1)[:-1].astype(np.int64))
+
+def lttb_select(y, starts, n):
+    ends = np.append(starts[1:], n)
+    picked = np.empty(len(starts), dtype=np.int64)
+    picked[0], picked[-1] = starts[0], n - 1
+    valid = ~np.isnan(y)
+    counts = np.add.reduceat(valid.astype(np.int64), starts)
+    sums = np.add.reduceat(np.where(valid, y, 0.0), starts)
+    means = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    centers = (starts + ends - 1) / 2
+    for k in range(1, len(starts) - 1):
+        s, e = starts[k], ends[k]
+        seg = y[s:e]
+        ax = picked[k - 1]
+        ay, cx, cy = y[ax], centers[k + 1], means[k + 1]
+        if ay != ay or cy != cy or counts[k] == 0:
+            # 앞 구간이 비어 있는 지표(이평 초반 등)는 버킷의 첫 유효값
+            first = np.flatnonzero(valid[s:e])
+            picked[k] = s + (first[0] if len(first) else 0)
+            continue
+        area = np.abs((ax - cx) * (seg - ay) - (ax - np.arange(s, e)) * (cy - ay))
+        picked[k] = s + int(np.nanargmax(area))
+    return picked
+
+# 합산해야 하는 컬럼 (나머지 지표 컬럼은 LTTB)
+SUM_COLUMNS = ("tvalue",)
+
+def downsample_bars(bars, budget):
+    n = len(bars)
+    starts = bucket_starts(n, budget)
+    ends = np.append(starts[1:], n)
+    columns = {}
+    for name, y in bars.columns.items():
+        columns[name] = np.add.reduceat(y, starts) if name in SUM_COLUMNS else y[lttb_select(y, starts, n)]
+    return Bars(
+        bars.ts[starts], bars.open[starts],
+        np.fmax.reduceat(bars.high, starts), np.fmin.reduceat(bars.low, starts),
+        bars.close[ends - 1], np.add.reduceat(bars.volume, starts), columns)
+
+# ==========================================
+# 🔎 [엔진 8] 오프라인 종목 인덱스 (한글명/영문명/티커/별칭 → 심볼)
+# ==========================================
+SYMBOLS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "symbols.csv")
+HANGUL_RE = re.compile(r'[가-힣]')
+
+# 티커 모양 (AAPL, QQQM, 005930.KS, BRK-B, ^KS11, KRW=X) - 정확 일치 외에는 원격 검색에 맡긴다
+TICKER_SHAPE_RE = re.compile(r'^\^?[A-Za-z0-9]{1,6}([\.\-=][A-Za-z0-9]{1,4})?$')
+
+def _norm_name(text):
+    return re.sub(r"[\s\.\-_&'(),]", "", text).lower()
+
+def _jamo(text):
+    return unicodedata.normalize("NFD", text)
+
+class SymbolIndex:
+    def __init__(self, rows):
+        self.rows = rows
+        self.exact = {}
+        for rank, row in enumerate(rows):
+            names = [row["symbol"], row["symbol"].split('.')[0], row["name_ko"], row["name_en"]]
+            names += [a for a in row.get("aliases", "").split("|") if a]
+            for name in names:
+                key = _norm_name(name)
+                # 파일 순서(대표 종목 우선)가 곧 우선순위
+                if key: self.exact.setdefault(key, rank)
+        self.keys = sorted(self.exact)
+
+    def lookup(self, text):
+        # 정확히 일치할 때만 (시드에 없는 실제 티커를 비슷한 종목으로 바꿔치기하지 않도록)
+        rank = self.exact.get(_norm_name(text))
+        return self.rows[rank] if rank is not None else None
+
+    def suggest(self, text):
+        # 원격 검색이 비었을 때만 쓰는 이름 전용 보정 (접두어 → 오타). 티커 모양 입력은 보정하지 않는다
+        if TICKER_SHAPE_RE.match(text.strip()): return None
+        key = _norm_name(text)
+        if not key: return None
+        rank = self._prefix(key)
+        if rank is None and len(key) >= 3:
+            # 한글은 자모 단위로 비교해야 한 글자 오타(삼성젼자)가 유사도 기준을 넘는다
+            close = difflib.get_close_matches(_jamo(key), self.fuzzy_keys, n=1, cutoff=0.8)
+            if close: rank = self.exact[self.fuzzy_keys[close[0]]]
+        return self.rows[rank] if rank is not None else None
+
+    @functools.cached_property
+    def fuzzy_keys(self):
+        return {_jamo(key): key for key in self.keys}
+
+    def _prefix(self, key):
+        # 영문은 3자, 한글은 2자 이상일 때만 접두어 매칭
+        if len(key) < (2 if HANGUL_RE.search(key) else 3): return None
+        best = None
+        i = bisect.bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i].startswith(key):
+            rank = self.exact[self.keys[i]]
+            if best is None or rank < best: best = rank
+            i += 1
+        return best
+
+@st.cache_resource(show_spinner=False)
+def get_symbol_index():
+    try:
+        with open(SYMBOLS_FILE, encoding="utf-8") as f:
+            return SymbolIndex(list(csv.DictReader(f)))
+    except OSError:
+        return SymbolIndex([])
+
+# ==========================================
+# 🖼️ [엔진 11] 차트 Figure 캐시 (데이터 버전 키 + 바뀐 꼬리 봉만 패치)
+# ==========================================
+FIGURE_CACHE_SIZE = 32
+# 뒤쪽에서 이보다 많은 봉이 바뀌면 패치 대신 새로 그린다
+FIGURE_PATCH_MAX = 8
+
+# 선 트레이스 이름 → Bars 컬럼
+LINE_TRACE_COLUMNS = {
+    '3선': 'ma3', '20선': 'ma20', '120선': 'ma120', '480선': 'ma480', 'BB 상단': 'bb_upper',
+    'RSI': 'rsi', 'MACD': 'macd', 'Signal': 'signal',
+}
+
+# 봉 색은 0/1 인덱스 + 2색 컬러스케일로 넘겨 색 문자열 리스트를 만들지 않는다
+def _two_color(low_color, high_color):
+    return dict(colorscale=[[0, low_color], [1, high_color]], cmin=0, cmax=1)
+
+def chart_labels(ts, timeframe):
+    # strftime 루프 대신 datetime64 → 문자열 일괄 변환 (KST 고정 +9h)
+    local = (np.asarray(ts, dtype=np.int64) + 9 * 3600).astype('datetime64[s]')
+    labels = np.datetime_as_string(local, unit='m' if timeframe == '분봉' else 'D')
+    if timeframe == '분봉':
+        labels = np.char.replace(labels, 'T', ' ')
+    return np.char.add(labels, '\u200b').tolist()
+
+ABBREV_STEPS = np.array([1_000, 1_000_000, 1_000_000_000, 1_000_000_000_000], dtype=np.float64)
+ABBREV_SUFFIX = np.array(["", "K", "M", "B", "T"], dtype=object)
+
+def abbrev_parts(values):
+    # format_abbrev의 배열판: (단위로 나눈 값, 접미사) → 호버 템플릿이 %{..:.2f}로 찍는다
+    values = np.asarray(values, dtype=np.float64)
+    step = np.searchsorted(ABBREV_STEPS, values, side='right')
+    scale = np.concatenate(([1.0], ABBREV_STEPS))[step]
+    return values / scale, ABBREV_SUFFIX[step]
+
+def chart_hover(tvalues, volumes, money):
+    c_sym_plot, chart_currency, ex_rate = money
+    value, suffix = abbrev_parts(tvalues)
+    tv_text = c_sym_plot + "%{customdata[0]:.2f}%{customdata[1]}"
+    columns = [value, suffix]
+    if chart_currency != "KRW" and ex_rate != 1.0:
+        columns += abbrev_parts(np.asarray(tvalues) * ex_rate)
+        tv_text = "약 ₩%{customdata[2]:.2f}%{customdata[3]} (" + tv_text + ")"
+    columns.append(volumes)
+    vol_idx = len(columns) - 1
+    template = f"<b>거래대금:</b> {tv_text}<br><b>거래량:</b> %{{customdata[{vol_idx}]:,.0f}}<extra></extra>"
+    return list(zip(*(np.asarray(c).tolist() for c in columns))), template
+
+def chart_vol_colors(closes):
+    down = np.zeros(len(closes), dtype=np.int8)
+    down[1:] = closes[1:] < closes[:-1]
+    return down
+
+def chart_macd_hist(macd, signal):
+    valid = ~(np.isnan(macd) | np.isnan(signal))
+    return np.where(valid, macd - signal, 0.0), (valid & (macd > signal)).astype(np.int8)
+
+def _first_change(old, new):
+    # 두 봉 묶음이 처음 달라지는 인덱스 (NaN == NaN 취급), 앞쪽이 밀렸으면 None
+    if len(new) < len(old) or (len(old) and len(new) and old.ts[0] != new.ts[0]): return None
+    m = len(old)
+    diff = np.zeros(m, dtype=bool)
+    for a, b in ((old.ts, new.ts[:m]), (old.open, new.open[:m]), (old.high, new.high[:m]),
+                 (old.low, new.low[:m]), (old.close, new.close[:m]), (old.volume, new.volume[:m])):
+        diff |= (a != b) & ~((a != a) & (b != b))
+    changed = np.flatnonzero(diff)
+    return int(changed[0]) if len(changed) else m
+
+class ChartFigure:
+    # x 레이블 / 거래대금 호버 / 거래대금 색은 봉별 결과를 보관해 두고 바뀐 꼬리 봉만 다시 만든다
+    __slots__ = ("lock", "fig", "bars", "money", "x", "hover", "hovertemplate", "vol_colors")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.fig = self.bars = self.money = None
+        self.x = self.hover = self.hovertemplate = self.vol_colors = None
+
+    def update_parts(self, view, money, timeframe, k, hover_from):
+        # [k:] 봉의 레이블/색, [hover_from:] 봉의 호버만 새로 계산해 앞부분 보관본에 이어 붙인다
+        labels = chart_labels(view.ts[k:], timeframe)
+        colors = chart_vol_colors(view.close[max(k - 1, 0):])
+        hover, self.hovertemplate = chart_hover(view.columns['tvalue'][hover_from:], view.volume[hover_from:], money)
+        self.x = self.x[:k] + labels if k else labels
+        self.vol_colors = np.concatenate((self.vol_colors[:k], colors[1:])) if k else colors
+        self.hover = self.hover[:hover_from] + hover if hover_from else hover
+
+def chart_max_tv(tvalues):
+    return float(np.nanmax(tvalues)) if len(tvalues) else 0
+
+def build_chart_figure(entry, view, opts):
+    timeframe, use_candle, has_bb, bottom_indicator, dark_mode, up_color, down_color = opts
+    f_dates_str = entry.x
+    fig = make_subplots(
+        rows=2, cols=1, shared_xaxes=True,
+        vertical_spacing=0.03, row_heights=[0.75, 0.25],
+        specs=[[{"secondary_y": True}], [{"secondary_y": False}]]
+    )
+    cols = view.columns
+
+    if use_candle and len(f_dates_str) > 0:
+        fig.add_trace(go.Candlestick(
+            x=f_dates_str, open=view.open, high=view.high, low=view.low, close=view.close,
+            increasing_line_color=up_color, decreasing_line_color=down_color, name='캔들'
+        ), row=1, col=1, secondary_y=False)
+    elif len(f_dates_str) > 0:
+        fig.add_trace(go.Scatter(
+            x=f_dates_str, y=view.close, mode='lines', name='주가', line=dict(color='#00b4d8', width=3)
+        ), row=1, col=1, secondary_y=False)
+
+    if timeframe == "분봉" and len(f_dates_str) > 0:
+        fig.add_trace(go.Scatter(x=f_dates_str, y=cols['ma3'], mode='lines', name='3선', line=dict(color='#ff4b4b', width=1.5)), row=1, col=1)
+        fig.add_trace(go.Scatter(x=f_dates_str, y=cols['ma120'], mode='lines', name='120선', line=dict(color='#ff9900', width=1.5, dash='dash')), row=1, col=1)
+    elif timeframe in ["일봉", "월봉", "연봉", "5년", "10년"] and len(f_dates_str) > 0:
+        fig.add_trace(go.Scatter(x=f_dates_str, y=cols['ma3'], mode='lines', name='3선', line=dict(color='#ff4b4b', width=1.5)), row=1, col=1)
+        fig.add_trace(go.Scatter(x=f_dates_str, y=cols['ma20'], mode='lines', name='20선', line=dict(color='#ff9900', width=1.5, dash='dash')), row=1, col=1)
+        fig.add_trace(go.Scatter(x=f_dates_str, y=cols['ma120'], mode='lines', name='120선', line=dict(color='#00cc96', width=1.5, dash='dash')), row=1, col=1)
+        fig.add_trace(go.Scatter(x=f_dates_str, y=cols['ma480'], mode='lines', name='480선', line=dict(color='#9933cc', width=1.5, dash='dash')), row=1, col=1)
+
+    if has_bb:
+        fig.add_trace(go.Scatter(x=f_dates_str, y=cols['bb_upper'], mode='lines', name='BB 상단', line=dict(color='#ccaa00', width=1.5)), row=1, col=1)
+
+    if len(f_dates_str) > 0:
+        fig.add_trace(go.Bar(
+            x=f_dates_str, y=cols['tvalue'], name='거래대금', opacity=0.3,
+            marker=dict(color=entry.vol_colors, **_two_color(up_color, down_color)),
+            customdata=entry.hover, hovertemplate=entry.hovertemplate
+        ), row=1, col=1, secondary_y=True)
+
+    if bottom_indicator == "RSI":
+        fig.add_trace(go.Scatter(x=f_dates_str, y=cols['rsi'], mode='lines', name='RSI', line=dict(color='#9c27b0', width=1.5)), row=2, col=1)
+        fig.add_hline(y=70, line_dash="dot", line_color="red", row=2, col=1)
+        fig.add_hline(y=30, line_dash="dot", line_color="blue", row=2, col=1)
+        fig.update_yaxes(range=[0, 100], row=2, col=1)
+    else:
+        fig.add_trace(go.Scatter(x=f_dates_str, y=cols['macd'], mode='lines', name='MACD', line=dict(color='#00b4d8', width=1.5)), row=2, col=1)
+        fig.add_trace(go.Scatter(x=f_dates_str, y=cols['signal'], mode='lines', name='Signal', line=dict(color='#ff9900', width=1.5)), row=2, col=1)
+        macd_hist, hist_up = chart_macd_hist(cols['macd'], cols['signal'])
+        fig.add_trace(go.Bar(x=f_dates_str, y=macd_hist, marker=dict(color=hist_up, **_two_color('#00b4d8', '#ff4b4b')), name='Histogram'), row=2, col=1)
+
+    fig.update_layout(
+        hovermode="x unified", height=700, margin=dict(l=0, r=0, t=20, b=0),
+        xaxis_rangeslider_visible=False,
+        template="plotly_dark" if dark_mode else "plotly"
+    )
+
+    fig.update_xaxes(type='category', nticks=15, row=1, col=1)
+    fig.update_xaxes(type='category', nticks=15, row=2, col=1)
+
+    max_tv = chart_max_tv(cols['tvalue'])
+    fig.update_yaxes(showgrid=False, range=[0, max_tv * 4 if max_tv > 0 else 100], row=1, col=1, secondary_y=True, fixedrange=True)
+
+    # ✅ [추가] 축 레이블
+    fig.update_yaxes(title_text="📈 주가", title_font=dict(size=11, color="#888888"), row=1, col=1, secondary_y=False)
+    fig.update_yaxes(title_text="💸 거래대금", title_font=dict(size=11, color="#888888"), row=1, col=1, secondary_y=True)
+    fig.update_yaxes(title_text=f"📉 {bottom_indicator}", title_font=dict(size=11, color="#888888"), row=2, col=1)
+    return fig
+
+def patch_chart_figure(entry, view):
+    fig, cols = entry.fig, view.columns
+    with fig.batch_update():
+        for tr in fig.data:
+            tr.x = entry.x
+            if tr.name == '캔들':
+                tr.open, tr.high, tr.low, tr.close = view.open, view.high, view.low, view.close
+            elif tr.name == '주가':
+                tr.y = view.close
+            elif tr.name == '거래대금':
+                tr.y = cols['tvalue']
+                tr.customdata, tr.hovertemplate = entry.hover, entry.hovertemplate
+                tr.marker.color = entry.vol_colors
+            elif tr.name == 'Histogram':
+                tr.y, tr.marker.color = chart_macd_hist(cols['macd'], cols['signal'])
+            elif tr.name in LINE_TRACE_COLUMNS:
+                tr.y = cols[LINE_TRACE_COLUMNS[tr.name]]
+        max_tv = chart_max_tv(cols['tvalue'])
+        fig.update_yaxes(range=[0, max_tv * 4 if max_tv > 0 else 100], row=1, col=1, secondary_y=True)
+
+class FigureCache:
+    def __init__(self, max_entries=FIGURE_CACHE_SIZE):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = ChartFigure()
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+            else:
+                self.entries.move_to_end(key)
+            return entry
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    return FigureCache()
+
+# 반환된 항목은 entry.lock을 잡은 채로 그려야 다른 세션의 패치와 겹치지 않는다
+def chart_figure(symbol, view, timeframe, use_candle, show_bb, bottom_indicator, dark_mode, money, minutes=None):
+    is_kr = symbol.endswith(".KS") or symbol.endswith(".KQ")
+    up_color = '#ff4b4b' if is_kr else '#00cc96'
+    down_color = '#00b4d8' if is_kr else '#ff4b4b'
+    has_bb = show_bb and len(view) > 0 and bool(np.isfinite(view.columns['bb_upper']).any())
+    opts = (timeframe, use_candle, has_bb, bottom_indicator, dark_mode, up_color, down_color)
+    entry = get_figure_cache().get((symbol, minutes) + opts)
+    with entry.lock:
+        k = _first_change(entry.bars, view) if entry.fig is not None else None
+        if k == len(view) and entry.money == money:
+            return entry
+        if k is None or len(view) - k > FIGURE_PATCH_MAX:
+            k = 0
+            entry.fig = None
+        # 환율/통화가 바뀌면 호버 문구만 전 구간 다시 (레이블/색은 꼬리만)
+        entry.update_parts(view, money, timeframe, k, k if entry.money == money else 0)
+        entry.bars, entry.money = view, money
+        if entry.fig is None:
+            entry.fig = build_chart_figure(entry, view, opts)
+        else:
+            patch_chart_figure(entry, view)
+    return entry
+
+def chart_view(symbol, bars, timeframe, show_bb, minutes=INTRADAY_BASE_MINUTES):
+    # 화면 구간 뷰 + 지표/거래대금 컬럼 (라이브 틱마다 다시 불려도 지표는 증분 갱신, 복사는 화면 구간만)
+    interval_key = f"{minutes}m" if timeframe == "분봉" else timeframe if timeframe == "연봉" else INTERVAL_MAP[timeframe]
+    if timeframe == "분봉":
+        f_start = bars.session_start()
+    else:
+        cutoff_days = {
+            "일봉": 365, "월봉": 365*100, "연봉": 365*100, "5년": 365*5, "10년": 365*10
+        }.get(timeframe, 365)
+        f_start = bars.index_at((datetime.now(KST) - timedelta(days=cutoff_days)).timestamp())
+    indicators = get_indicator_snapshot(symbol, interval_key, bars.ts, bars.close, f_start)
+    view = bars.slice(f_start)
+    for w in MA_WINDOWS:
+        view.columns[f"ma{w}"] = indicators["ma"][w]
+    for k in ("rsi", "macd", "signal"):
+        view.columns[k] = indicators[k]
+
+    for k in ("bb_upper", "bb_mid", "bb_lower"):
+        if show_bb and len(view) >= BB_WINDOW:
+            # 화면 구간 밖 봉이 섞이는 앞쪽 window-1개는 기존처럼 비워둔다
+            view.columns[k] = indicators[k]
+            view.columns[k][:BB_WINDOW - 1] = np.nan
+        else:
+            view.columns[k] = np.full(len(view), np.nan)
+    view.columns["tvalue"] = view.close * view.volume
+
+    # ✅ [추가] 포인트 예산을 넘는 긴 시계열은 모양을 유지한 채 다운샘플링
+    if len(view) > CHART_POINT_BUDGET:
+        view = downsample_bars(view, CHART_POINT_BUDGET)
+    return view
+
+def prepare_chart(symbol, bars, timeframe, use_candle, show_bb, bottom_indicator, dark_mode, money, minutes=INTRADAY_BASE_MINUTES):
+    if timeframe == "분봉":
+        # 원본은 항상 5분봉 (라이브 틱도 5분봉에 반영) → 선택한 간격으로 로컬 집계
+        with span("render:resample"):
+            bars = intraday_bars(symbol, bars, minutes)
+    with span("render:indicators"):
+        view = chart_view(symbol, bars, timeframe, show_bb, minutes)
+    # ✅ [변경] 데이터가 그대로면 만든 Figure를 재사용, 꼬리 봉만 바뀌면 해당 구간만 패치
+    with span("render:figure"):
+        return chart_figure(symbol, view, timeframe, use_candle, show_bb, bottom_indicator, dark_mode, money,
+                            minutes if timeframe == "분봉" else None)
+
+def draw_chart(symbol, bars, timeframe, use_candle, show_bb, bottom_indicator, dark_mode, money, minutes=INTRADAY_BASE_MINUTES):
+    chart = prepare_chart(symbol, bars, timeframe, use_candle, show_bb, bottom_indicator, dark_mode, money, minutes)
+    with chart.lock, span("render:plotly_chart"):
+        st.plotly_chart(chart.fig, use_container_width=True)
+
+def format_price(price, currency, c_sym_st):
+    return f"{c_sym_st}{int(price):,}" if currency in ["KRW", "JPY"] else f"{c_sym_st}{price:,.2f}"
+
+# ==========================================
+# 📡 [엔진 12] 라이브 시세 버스 (종목별 업스트림 1회 폴링 → 구독 세션에 틱 발행)
+# ==========================================
+# 세션 수와 무관하게 종목당 폴러 1개. 값이 바뀐 경우에만 seq를 올려 발행하므로
+# 체결이 없으면 세션 쪽 작업도 없다. QUOTE_FEED_REPLAY=<jsonl> 이면 녹화된 틱을 재생,
+# QUOTE_FEED_RECORD=<jsonl> 이면 발행한 틱을 같은 형식으로 기록한다.
+QUOTE_POLL_SECONDS = float(os.environ.get("QUOTE_POLL_SECONDS", 5))
+# 세션 쪽 확인 주기 (버스 조회뿐이라 업스트림 요청 없음)
+LIVE_CHECK_SECONDS = float(os.environ.get("LIVE_CHECK_SECONDS", 2))
+# 장 밖에서 개장 여부를 다시 보는 최대 간격 (라이브 일시정지 중 유일한 타이머)
+LIVE_RESUME_MAX_SECONDS = 300
+# 이 시간 동안 아무 세션도 확인하지 않은 종목은 폴링 중단
+QUOTE_LEASE_SECONDS = 60
+TICK_FIELDS = ("price", "rate", "volume", "high", "low")
+
+def poll_quote(symbol):
+    # 한국 종목은 네이버, 그 외는 야후 meta (당일 1봉 요청이라 payload가 작다)
+    if symbol.endswith(".KS") or symbol.endswith(".KQ"):
+        data = get_naver_stock_data(symbol.split('.')[0])
+        if not data: return None
+        return {"ts": time.time(), "price": data["price"], "rate": data["rate"], "volume": data["volume"]}
+    chart = get_chart_bars(symbol, "1d", "1d")
+    if chart is None: return None
+    meta = chart.meta
+    price = meta.get('regularMarketPrice')
+    if not price: return None
+    prev = meta.get('previousClose') or meta.get('chartPreviousClose')
+    return {
+        "ts": meta.get('regularMarketTime') or time.time(), "price": price,
+        "rate": (price - prev) / prev * 100 if prev else 0, "volume": meta.get('regularMarketVolume'),
+        "high": meta.get('regularMarketDayHigh'), "low": meta.get('regularMarketDayLow'),
+    }
+
+class ReplayQuoteFeed:
+    # 녹화 파일(JSONL, 한 줄 = {"symbol", "ts", "price", ...})을 종목별로 폴링 1회당 1틱씩 재생
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.ticks = defaultdict(list)
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    tick = json.loads(line)
+                    self.ticks[tick.pop("symbol")].append(tick)
+        self.pos = defaultdict(int)
+
+    def __call__(self, symbol):
+        with self.lock:
+            ticks = self.ticks.get(symbol)
+            if not ticks: return None
+            i = min(self.pos[symbol], len(ticks) - 1)
+            self.pos[symbol] = i + 1
+            return dict(ticks[i])
+
+class QuoteBus:
+    def __init__(self, feed, poll_every=QUOTE_POLL_SECONDS, record_path=None):
+        self.feed = feed
+        self.poll_every = poll_every
+        self.record_path = record_path
+        self.lock = threading.Lock()
+        self.ticks = {}
+        self.leases = {}
+        self.polling = set()
+        self.seq = 0
+        self.thread = threading.Thread(target=self._run, name="quote-bus", daemon=True)
+        self.thread.start()
+
+    def subscribe(self, symbol):
+        with self.lock:
+            self.leases[symbol] = time.time() + QUOTE_LEASE_SECONDS
+
+    def latest(self, symbol):
+        # 확인 자체가 구독 갱신
+        self.subscribe(symbol)
+        with self.lock:
+            return self.ticks.get(symbol)
+
+    def publish(self, symbol, quote):
+        if not quote or not quote.get("price"): return False
+        with self.lock:
+            last = self.ticks.get(symbol)
+            if last is not None and all(last.get(f) == quote.get(f) for f in TICK_FIELDS):
+                return False
+            self.seq += 1
+            self.ticks[symbol] = dict(quote, symbol=symbol, seq=self.seq)
+        if self.record_path:
+            try:
+                with open(self.record_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(dict(quote, symbol=symbol)) + "\n")
+            except OSError:
+                pass
+        return True
+
+    def _run(self):
+        while True:
+            now = time.time()
+            with self.lock:
+                for sym in [s for s, until in self.leases.items() if until < now]:
+                    del self.leases[sym]
+                    self.ticks.pop(sym, None)
+                # 장이 닫힌 종목은 마지막 틱이 있으면 더 묻지 않는다
+                due = [s for s in self.leases if s not in self.polling and (s not in self.ticks or session_state(s)[0])]
+                self.polling.update(due)
+            for sym in due:
+                get_fetch_pool().submit(self._poll, sym)
+            time.sleep(self.poll_every)
+
+    def _poll(self, symbol):
+        try:
+            with swr_bypass():
+                self.publish(symbol, self.feed(symbol))
+        except Exception:
+            pass
+        finally:
+            with self.lock: self.polling.discard(symbol)
+
+@st.cache_resource(show_spinner=False)
+def get_quote_bus():
+    replay = os.environ.get("QUOTE_FEED_REPLAY")
+    feed = ReplayQuoteFeed(replay) if replay else poll_quote
+    return QuoteBus(feed, record_path=os.environ.get("QUOTE_FEED_RECORD"))
+
+# 차트 주기 → 틱이 같은 봉인지 판정할 버킷 단위
+LIVE_BUCKET = {"분봉": "5m", "일봉": "1d", "월봉": "1mo", "연봉": "1y"}
+
+def apply_quote_tick(bars, tick, timeframe, gmtoffset):
+    # 틱을 마지막 봉에 반영 (같은 버킷이면 종가/고저 수정, 다음 버킷이면 새 봉 추가)
+    ts = int(tick["ts"])
+    if len(bars) == 0 or ts < bars.ts[-1]: return bars
+    interval = LIVE_BUCKET[timeframe]
+    price = float(tick["price"])
+    # 네이버/야후 거래량은 당일 누적 → 일봉에만 그대로 쓸 수 있다
+    day_volume = tick.get("volume") if interval == "1d" else None
+    if _bar_bucket(ts, interval, gmtoffset) == _bar_bucket(int(bars.ts[-1]), interval, gmtoffset):
+        high, low, close = bars.high.copy(), bars.low.copy(), bars.close.copy()
+        close[-1] = price
+        high[-1] = max(high[-1], price, tick.get("high") or price)
+        low[-1] = min(low[-1], price, tick.get("low") or price)
+        volume = bars.volume
+        if day_volume:
+            volume = volume.copy()
+            volume[-1] = day_volume
+        return Bars(bars.ts, bars.open, high, low, close, volume)
+    if interval in INTERVAL_SECONDS and interval != "1mo":
+        ts -= (ts + gmtoffset) % INTERVAL_SECONDS[interval]
+    return Bars(np.append(bars.ts, ts), np.append(bars.open, price), np.append(bars.high, price),
+                np.append(bars.low, price), np.append(bars.close, price), np.append(bars.volume, day_volume or 0))
+
+def live_bars(symbol, bars, timeframe, gmtoffset):
+    # 세션별로 틱이 반영된 봉을 보관하고, 새 seq가 있을 때만 다시 계산
+    tick = get_quote_bus().latest(symbol)
+    key = (symbol, timeframe)
+    states = st.session_state.setdefault("live_bars", {})
+    state = states.get(key)
+    if state is None or state["base"] is not bars:
+        state = states[key] = {"base": bars, "bars": bars, "seq": 0}
+    if tick is not None and tick["seq"] > state["seq"]:
+        state["bars"] = apply_quote_tick(state["bars"], tick, timeframe, gmtoffset)
+        state["seq"] = tick["seq"]
+    return state["bars"], tick
+
+# ==========================================
+# 📋 [엔진 13] 워치리스트 스크리너 (야후 spark 다종목 배치 + 받아온 스레드에서 지표 계산)
+# ==========================================
+# spark는 요청 1건에 최대 20종목의 1년 일봉 종가를 준다 → 200종목 = 10건
+# ✅ [변경] 지표 계산은 종목당 0.4ms 안팎이라 spark 왕복보다 훨씬 짧다 → 별도 프로세스 풀 없이 받아온 fetch 스레드에서 바로 계산
+#   (멀티스레드 서버에서 fork하면 잠긴 락을 물려받을 수 있고, 피클링/IPC 비용이 계산보다 컸다)
+SPARK_BATCH = 20
+SCREENER_UNIVERSES = {
+    "⭐ 주요 종목": None,
+    "🇰🇷 코스피": ("KOSPI",),
+    "🇰🇷 코스닥": ("KOSDAQ",),
+    "🇺🇸 미국": ("US",),
+    "🌍 전체": ("KOSPI", "KOSDAQ", "US", "TSE", "HKEX", "TWSE", "EURONEXT", "ETF"),
+}
+
+def spark_url(symbols, rng="1y", interval="1d"):
+    return f"https://query1.finance.yahoo.com/v8/finance/spark?symbols={','.join(symbols)}&range={rng}&interval={interval}"
+
+def parse_spark(res):
+    # 야후 spark 응답은 {"spark": {"result": [...]}} 형과 {심볼: {...}} 평면형 두 가지가 온다
+    series = {}
+    if not res: return series
+    if "spark" in res:
+        for item in (res["spark"] or {}).get("result") or []:
+            response = (item.get("response") or [None])[0]
+            if not response: continue
+            quote = (response.get("indicators", {}).get("quote") or [{}])[0]
+            series[item.get("symbol")] = (quote.get("close") or [], response.get("meta", {}))
+    else:
+        for sym, item in res.items():
+            if isinstance(item, dict) and item.get("close"):
+                series[sym] = (item["close"], {"previousClose": item.get("chartPreviousClose")})
+    return series
+
+@swr_cache(ttl=60)
+def get_spark_batch(symbols):
+    return parse_spark(get_cached_json(spark_url(symbols)))
+
+def macd_state(macd, signal):
+    if len(macd) < 2 or None in (macd[-1], signal[-1], macd[-2], signal[-2]): return "-"
+    now, before = macd[-1] - signal[-1], macd[-2] - signal[-2]
+    if now > 0 >= before: return "골든크로스"
+    if now < 0 <= before: return "데드크로스"
+    return "상승" if now > 0 else "하락"
+
+def screen_batch(items):
+    # items = [(이름, 심볼, 종가 리스트, meta)]
+    rows = []
+    for name, sym, closes, meta in items:
+        closes = [c for c in closes if c is not None]
+        if len(closes) < 2: continue
+        price = meta.get('regularMarketPrice') or closes[-1]
+        prev = closes[-2]
+        high, low = max(max(closes), price), min(min(closes), price)
+        rsi = calc_rsi(closes, RSI_PERIOD)[-1]
+        macd, signal = calc_macd(closes)
+        rows.append({
+            "종목": name, "심볼": sym, "현재가": price,
+            "등락률(%)": round((price - prev) / prev * 100, 2) if prev else 0.0,
+            "52주 위치(%)": round((price - low) / (high - low) * 100, 1) if high > low else None,
+            "RSI": round(rsi, 1) if rsi is not None else None,
+            "MACD": macd_state(macd, signal),
+        })
+    return rows
+
+def _fetch_and_screen(batch):
+    series = get_spark_batch(tuple(sym for _, sym in batch))
+    items = [(name, sym, *series[sym]) for name, sym in batch if sym in series]
+    return screen_batch(items), len(batch)
+
+def screener_universe(name):
+    markets = SCREENER_UNIVERSES[name]
+    if markets is None:
+        pairs = list(vip_dict.items())
+    else:
+        pairs = [(row["name_ko"] or row["name_en"], row["symbol"]) for row in get_symbol_index().rows if row.get("market") in markets]
+    seen, universe = set(), []
+    for name, sym in pairs:
+        if sym not in seen:
+            seen.add(sym)
+            universe.append((name, sym))
+    return universe
+
+def run_screener(universe):
+    # 배치가 끝나는 순서대로 (누적 결과, 처리 종목 수)를 내보낸다
+    pool = get_fetch_pool()
+    futures = [pool.submit(_fetch_and_screen, universe[i:i + SPARK_BATCH]) for i in range(0, len(universe), SPARK_BATCH)]
+    rows, done = [], 0
+    for future in as_completed(futures):
+        try:
+            batch_rows, count = future.result()
+        except Exception:
+            continue
+        rows.extend(batch_rows)
+        done += count
+        yield rows, done
+
+# ==========================================
+# 🖥️ UI 및 메인 실행부
+# ==========================================
+with st.sidebar:
+    st.header("⚡ 라이트 터미널")
+    st.write("불필요한 데이터 통신을 줄여 실시간 반응 속도를 극대화한 버전입니다.")
+    st.markdown("---")
+    st.caption("CEO 터미널 V13.9 (라이브모드 차트 포함 + 연봉/월봉/축레이블 패치)")
+    page_mode = st.radio("🧭 화면", ["📈 종목 터미널", "📋 워치리스트 스크리너"])
+    with st.expander("🔌 연결 재사용 통계"):
+        conn_stats = get_http_client().stats()
+        if conn_stats:
+            st.dataframe([{"호스트": host, **row} for host, row in conn_stats.items()], hide_index=True)
+        else:
+            st.caption("아직 요청 없음")
+    # 사이드바는 본문보다 먼저 그려지므로 직전 렌더까지의 누적값
+    if st.toggle("🩺 성능 계측 패널"):
+        spans, cache_counts, upstream, _ = get_metrics().snapshot()
+        st.dataframe([{"구간": name, "횟수": c, "평균(ms)": round(t / c * 1000, 1), "최대(ms)": round(m * 1000, 1)}
+                      for name, (c, t, m) in sorted(spans.items())], hide_index=True)
+        caches = sorted({name for name, _ in cache_counts})
+        st.dataframe([{"캐시": name, **{r: cache_counts.get((name, r), 0) for r in ("hit", "stale", "miss")}}
+                      for name in caches], hide_index=True)
+        st.dataframe([{"호스트": host, "요청": c, "평균(ms)": round(t / c * 1000, 1), "수신(KB)": round(b / 1024, 1)}
+                      for host, (c, t, b) in sorted(upstream.items())], hide_index=True)
+        st.dataframe([{"캐시": name, "상주(KB)": round(nbytes / 1024, 1)} for name, nbytes in sorted(cache_footprint().items())],
+                     hide_index=True)
+
+st.title("🌍 글로벌 주식 터미널")
+
+def render_screener():
+    universe_name = st.radio("📋 스크리닝 대상", list(SCREENER_UNIVERSES), horizontal=True)
+    universe = screener_universe(universe_name)
+    if not universe:
+        st.info("💡 종목 목록을 불러올 수 없습니다.")
+        return
+    if not st.button(f"▶️ {len(universe)}개 종목 스크리닝 시작", type="primary"):
+        st.caption("가격·등락률·52주 위치·RSI·MACD 상태를 한 번에 계산합니다. 표 머리글을 누르면 정렬됩니다.")
+        return
+    progress = st.progress(0.0)
+    stats = st.empty()
+    table = st.empty()
+    started = time.perf_counter()
+    rows, done = [], 0
+    for rows, done in run_screener(universe):
+        elapsed = time.perf_counter() - started
+        progress.progress(done / len(universe))
+        stats.caption(f"⚙️ {done}/{len(universe)} 종목 처리 · {len(rows)}개 결과 · {done / elapsed if elapsed else 0:.1f} 종목/초")
+        table.dataframe(rows, hide_index=True, use_container_width=True)
+    elapsed = time.perf_counter() - started
+    stats.caption(f"✅ {done}개 종목 {elapsed:.2f}초 · 처리량 {done / elapsed if elapsed else 0:.1f} 종목/초 · 결과 {len(rows)}개")
+
+if page_mode == "📋 워치리스트 스크리너":
+    render_screener()
+    st.stop()
+
+if "search_input" not in st.session_state: st.session_state.search_input = "삼성전자"
+if "vip_dropdown" not in st.session_state: st.session_state.vip_dropdown = "🔽 주요 종목 선택"
+
+def apply_vip_search():
+    if st.session_state.vip_dropdown != "🔽 주요 종목 선택":
+        st.session_state.search_input = st.session_state.vip_dropdown
+        st.session_state.vip_dropdown = "🔽 주요 종목 선택"
+
+col1, col2, col3 = st.columns([4, 2, 2])
+with col1: search_term = st.text_input("🔍 직접 검색 (종목명/티커 입력 후 Enter)", key="search_input")
+with col2: st.selectbox("⭐ 빠른 검색", ["🔽 주요 종목 선택"] + list(vip_dict.keys()), key="vip_dropdown", on_change=apply_vip_search)
+with col3:
+    st.write("")
+    dark_mode = False
+    live_mode = st.toggle("🔴 라이브 모드 (실시간 체결)")
+    use_candle = True
+    show_bb = st.toggle("📐 볼린저 밴드", value=False)
+    bottom_indicator = "MACD"
+
+timeframe = st.radio("⏳ 조회 기간 선택", ["분봉", "일봉", "월봉", "연봉"], horizontal=True, index=1)
+# ✅ [추가] 분봉 간격은 같은 5분봉 원본에서 로컬 집계 → 바꿔도 네트워크 요청 없음
+intraday_minutes = INTRADAY_RESOLUTIONS[st.radio("⏱️ 분봉 간격", list(INTRADAY_RESOLUTIONS), horizontal=True)] if timeframe == "분봉" else INTRADAY_BASE_MINUTES
+st.markdown("---")
+
+original_name = search_term.strip()
+symbol = ""
+official_name = original_name
+
+# ✅ [변경] VIP → 로컬 종목 인덱스 정확 일치(네트워크 없음) → 번역+야후 검색 → 이름 보정(접두어/오타) 순으로 해석
+listed = None if original_name in vip_dict else get_symbol_index().lookup(original_name)
+
+if original_name in vip_dict:
+    symbol = vip_dict[original_name]
+elif listed:
+    symbol = listed["symbol"]
+    official_name = listed["name_ko"] if HANGUL_RE.search(original_name) else listed["name_en"]
+else:
+    english_name, trans_success = translate_to_english(original_name)
+    quotes = []  # ← 이 한 줄 추가!
+    if trans_success:
+        search_res = get_cached_json(f"https://query2.finance.yahoo.com/v1/finance/search?q={english_name}")
+        if search_res and search_res.get('quotes') and len(search_res['quotes']) > 0:
+            quotes = search_res['quotes']  # ← 들여쓰기도 수정
+    # 한국어 검색이면 .KS/.KQ 우선
+    if quotes and not re.match(r'^[a-zA-Z0-9\.\-\s]+$', original_name.strip()):
+        kr_quotes = [q for q in quotes if q.get('symbol','').endswith('.KS') or q.get('symbol','').endswith('.KQ')]
+        if kr_quotes:
+            quotes = kr_quotes
+    if quotes:
+        symbol = quotes[0]['symbol']
+        official_name = quotes[0].get('shortname', english_name)
+    else:
+        suggested = get_symbol_index().suggest(original_name)
+        if suggested:
+            symbol = suggested["symbol"]
+            official_name = suggested["name_ko"] if HANGUL_RE.search(original_name) else suggested["name_en"]
+
+if not symbol:
+    st.markdown(f'<div class="delisted-alert">🚨 상장폐지 또는 검색 불가 ({original_name})<br><span style="font-size: 16px; font-weight: normal;">야후 파이낸스에서 완전히 삭제되었거나 종목명을 잘못 입력했습니다.</span></div>', unsafe_allow_html=True)
+    st.stop()
+
+# ✅ [변경] 라이브 모드는 시세 버스 틱으로 현재가 KPI와 차트 마지막 봉만 갱신 (페이지 전체는 입력이 바뀔 때만)
+@st.fragment(run_every=LIVE_CHECK_SECONDS)
+def live_price_metric(target_symbol, label, price, day_change_pct, currency, c_sym_st):
+    tick = get_quote_bus().latest(target_symbol)
+    if tick is not None:
+        price, day_change_pct = tick["price"], tick["rate"]
+    st.metric(label=label, value=format_price(price, currency, c_sym_st), delta=f"{day_change_pct:+.2f}%")
+
+# 차트는 버스 폴링보다 자주 볼 이유가 없다 (틱이 그보다 빨리 바뀌지 않음)
+@st.fragment(run_every=max(LIVE_CHECK_SECONDS, QUOTE_POLL_SECONDS))
+def live_chart(target_symbol, bars, gmtoffset, _timeframe, _use_candle, _show_bb, _bottom_indicator, money, _minutes):
+    bars, _ = live_bars(target_symbol, bars, _timeframe, gmtoffset)
+    # live_bars는 새 seq가 없으면 같은 객체를 돌려준다 → 뷰/지표/Figure 계산 없이 직전 Figure만 다시 낸다
+    key = (target_symbol, _timeframe, _use_candle, _show_bb, _bottom_indicator, dark_mode, money, _minutes)
+    last = st.session_state.get("live_chart")
+    if last is None or last["key"] != key or last["bars"] is not bars:
+        chart = prepare_chart(target_symbol, bars, _timeframe, _use_candle, _show_bb, _bottom_indicator, dark_mode, money, _minutes)
+        # 공유 Figure는 다른 세션이 패치할 수 있으므로 틱당 1번 세션 사본을 뜬다
+        with chart.lock: fig = go.Figure(chart.fig)
+        last = st.session_state["live_chart"] = {"key": key, "bars": bars, "fig": fig}
+    with span("render:plotly_chart"):
+        st.plotly_chart(last["fig"], use_container_width=True)
+
+def live_resume_timer(target_symbol, until_open):
+    # 일시정지 중엔 라이브 프래그먼트가 없어 개장해도 다시 그릴 주체가 없다 → 개장하면 전체 재실행
+    @st.fragment(run_every=max(LIVE_CHECK_SECONDS, min(until_open, LIVE_RESUME_MAX_SECONDS)))
+    def wait_for_open():
+        if session_state(target_symbol)[0]:
+            st.rerun()
+    wait_for_open()
+
+def render_all(target_symbol, target_name, _timeframe, _use_candle, _show_bb, _bottom_indicator, _minutes=INTRADAY_BASE_MINUTES):
+
+    # ✅ [변경] 모든 업스트림 요청을 먼저 동시에 띄우고, 섹션은 데이터가 도착하는 순서대로 그린다
+    plan = plan_fetches(target_symbol, original_name, _timeframe)
+
+    m1, m2, m3, m4 = st.columns(4)
+    for col, (name, sym, sign) in zip([m1, m2, m3, m4], INDEX_TILES):
+        p, pct = plan_result(plan, f"quote:{sym}")
+        with col:
+            if p > 0: st.metric(label=name, value=f"{sign}{p:,.2f}" if name != "코스피" else f"{p:,.2f}", delta=f"{pct:+.2f}%")
+            else: st.metric(label=name, value="로딩중", delta="-")
+    st.markdown("---")
+
+    # ✅ [변경] 시계열 저장소의 컬럼 슬라이스를 그대로 받는다 (봉별 리스트/None 변환 없음)
+    chart_1y = plan_result(plan, "1y")
+    if chart_1y is None:
+        st.markdown(f'<div class="delisted-alert">🚨 상장폐지 또는 검색 불가 ({target_symbol})</div>', unsafe_allow_html=True)
+        return
+
+    meta = chart_1y.meta
+    stamps_1y = chart_1y.columns["timestamp"]
+
+    last_trade_ts = meta.get('regularMarketTime', 0)
+    if last_trade_ts == 0 and len(stamps_1y):
+        last_trade_ts = int(stamps_1y[-1])
+
+    is_dead = False
+    if last_trade_ts > 0:
+        last_trade_date = datetime.fromtimestamp(last_trade_ts, KST)
+        days_dead = (datetime.now(KST) - last_trade_date).days
+        if days_dead > 7:
+            is_dead = True
+            st.markdown(f'<div class="delisted-alert">🚨 상장폐지 / 거래정지 됨 ({target_symbol}) <br><span style="font-size: 16px; font-weight: normal;">마지막 거래일: {last_trade_date.strftime("%Y-%m-%d")}</span></div>', unsafe_allow_html=True)
+
+    # ✅ [추가] 장 밖/상폐/meta로 확인한 휴장일이면 캐시 TTL을 늘리고 라이브 갱신은 멈춘다
+    note_market_state(target_symbol, meta, last_trade_ts, is_dead)
+    market_open, until_change = session_state(target_symbol)
+    market_state = meta.get('marketState') or ('REGULAR' if market_open else 'CLOSED')
+    live_active = live_mode and not is_dead and market_open
+    if live_mode and not live_active and not is_dead:
+        st.caption(f"💤 장 운영시간 외 - 라이브 갱신 일시정지 (다음 개장까지 약 {until_change / 3600:.1f}시간)")
+        live_resume_timer(target_symbol, until_change)
+    if is_dead: closed_html = '<span class="badge" style="background-color: #000000;">💀 영구 휴장(상폐)</span>'
+    elif market_state == 'REGULAR': closed_html = ''
+    elif market_state == 'PRE': closed_html = '<span class="badge" style="background-color: #ff9900;">🌅 프리마켓</span>'
+    elif market_state in ['POST', 'POSTPOST']: closed_html = '<span class="badge" style="background-color: #9933cc;">🌃 애프터마켓</span>'
+    else: closed_html = '<span class="closed-badge">💤 장 휴장일</span>'
+
+    # 종가 없는 봉은 저장소에 없으므로 종가는 그대로, 고가/저가 결측은 nanmax/nanmin이 건너뛴다
+    closes_1y, highs_1y, lows_1y = (chart_1y.columns[f] for f in ("close", "high", "low"))
+    has_highs, has_lows = bool(np.isfinite(highs_1y).any()), bool(np.isfinite(lows_1y).any())
+
+    price = meta.get('regularMarketPrice', float(closes_1y[-1]) if len(closes_1y) else 0)
+    prev_close = meta.get('previousClose', float(closes_1y[-2]) if len(closes_1y) >= 2 else price)
+    today_volume = meta.get('regularMarketVolume', 0)
+    day_change_pct = ((price - prev_close) / prev_close) * 100 if prev_close else 0
+    currency = meta.get('currency', 'USD')
+    plan_fx(plan, currency)
+
+    naver_amount = None
+    is_kr_stock = target_symbol.endswith(".KS") or target_symbol.endswith(".KQ")
+    if is_kr_stock:
+        naver_data = plan_result(plan, "naver")
+        if naver_data:
+            price = naver_data["price"]
+            day_change_pct = naver_data["rate"]
+            today_volume = naver_data["volume"]
+            naver_amount = naver_data["amount"]
+
+    c_sym_st = "₩" if currency == "KRW" else "\\$" if currency == "USD" else "€" if currency == "EUR" else "¥" if currency == "JPY" else f"{currency} "
+    high_52 = max(float(np.nanmax(highs_1y)) if has_highs else 0, price)
+    low_52 = min(float(np.nanmin(lows_1y)), price) if has_lows else price
+
+    price_str = format_price(price, currency, c_sym_st)
+    highlow_str = f"{c_sym_st}{int(high_52):,} / {c_sym_st}{int(low_52):,}" if currency in ["KRW", "JPY"] else f"{c_sym_st}{high_52:,.2f} / {c_sym_st}{low_52:,.2f}"
+
+    st.markdown(f"<h3>{target_name} ({target_symbol}) {closed_html}</h3>", unsafe_allow_html=True)
+
+    kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+    with kpi1:
+        price_label = f"💰 {'마지막 가격' if is_dead else '현재가'}"
+        if live_active:
+            live_price_metric(target_symbol, price_label, price, day_change_pct, currency, c_sym_st)
+        else:
+            st.metric(label=price_label, value=price_str, delta=f"{day_change_pct:+.2f}%")
+    with kpi2:
+        if is_kr_stock and naver_amount is not None:
+            st.metric(label="💸 거래대금", value=format_abbrev(naver_amount, "₩"))
+        elif currency != "KRW":
+            curr_rate = plan_result(plan, "fx")
+            if curr_rate:
+                st.metric(label="🇰🇷 원화 환산가", value=f"약 ₩{int(price * curr_rate):,}")
+            else: st.empty()
+        else: st.empty()
+    with kpi3: st.metric(label="⚖️ 52주 최고/최저", value=highlow_str)
+    with kpi4:
+        try:
+            if is_kr_stock:
+                if today_volume is None or str(today_volume).strip() == "" or str(today_volume) == "nan":
+                    volume_str = "데이터 없음"
+                else:
+                    volume_str = format_abbrev(today_volume, "")
+                st.metric(label="📊 거래량", value=volume_str)
+            else:
+                trading_value = price * today_volume if today_volume else 0
+                st.metric(label="💸 거래대금", value=format_abbrev(trading_value, "$" if currency == "USD" else c_sym_st))
+        except Exception:
+            st.metric(label="📊 거래량", value="에러")
+
+    # 52주 프로그레스 바
+    if high_52 > low_52:
+        progress_pct = int(max(0, min(100, (price - low_52) / (high_52 - low_52) * 100)))
+        bar_color = "#ff4b4b" if progress_pct >= 80 else "#ff9900" if progress_pct >= 50 else "#00b4d8"
+        st.markdown(f"""
+            <div style="margin: 12px 0 4px 0; font-size: 13px; color: #888;">
+                📍 52주 위치 &nbsp;<b style="color:{bar_color}">{progress_pct}%</b>
+                &nbsp;|&nbsp; 저가 {c_sym_st}{int(low_52):,} ↔ 고가 {c_sym_st}{int(high_52):,}
+            </div>
+            <div style="background:#e0e0e0; border-radius:6px; height:10px; margin-bottom:8px;">
+                <div style="background:{bar_color}; width:{progress_pct}%; height:10px; border-radius:6px;"></div>
+            </div>
+        """, unsafe_allow_html=True)
+
+    if is_dead:
+        return
+
+    st.write("")
+    st.markdown("---")
+
+    # ✅ [변경] fetch range/interval - 월봉 max, 연봉 월봉데이터로 집계 (FETCH_RANGE_MAP / INTERVAL_MAP)
+    chart_res = plan_result(plan, "chart")
+
+    if chart_res is not None:
+        chart_currency = chart_res.meta.get('currency', 'USD')
+        c_sym_plot = "₩" if chart_currency == "KRW" else "$" if chart_currency == "USD" else "€" if chart_currency == "EUR" else "¥" if chart_currency == "JPY" else f"{chart_currency} "
+
+        ex_rate_for_chart = 1.0
+        if chart_currency != "KRW":
+            plan_fx(plan, chart_currency)
+            ex_rate_for_chart = plan_result(plan, "fx") or 1.0
+
+        has_split = bool(chart_res.events.get('splits'))
+
+        split_html = '<span class="badge" style="background-color: #ff9900;">✂️ 액면분할 됨</span>' if has_split else ''
+
+        # ✅ [변경] clean_data 튜플/f_* 복사 루프 대신 컬럼형 Bars (구간은 O(1) 슬라이스 뷰)
+        bars = Bars.from_columns(chart_res.columns)
+
+        # ✅ [추가] 연봉이면 월봉 데이터를 연봉으로 집계
+        if _timeframe == "연봉":
+            bars = aggregate_to_yearly(bars)
+
+        # ✅ [추가] 분봉 장마감 안내
+        if _timeframe == "분봉" and len(bars):
+            last_dt = datetime.fromtimestamp(int(bars.ts[-1]), KST)
+            today_kst = datetime.now(KST).date()
+            if last_dt.date() < today_kst:
+                st.info(f"💤 현재 장 휴장 중 | 마지막 거래일 ({last_dt.strftime('%Y-%m-%d')}) 데이터 표시 중")
+
+        st.markdown(f"<h4>📈 {target_name} 차트 & 보조지표 {split_html}</h4>", unsafe_allow_html=True)
+
+        money = (c_sym_plot, chart_currency, ex_rate_for_chart)
+        if live_active:
+            live_chart(target_symbol, bars, chart_res.meta.get('gmtoffset', 0), _timeframe, _use_candle, _show_bb, _bottom_indicator, money, _minutes)
+        else:
+            draw_chart(target_symbol, bars, _timeframe, _use_candle, _show_bb, _bottom_indicator, dark_mode, money, _minutes)
+
+    st.markdown("---")
+    news_col, fin_col = st.columns(2)
+
+    with news_col:
+        st.markdown(f"### 📰 {original_name} 최신 뉴스")
+        news_list, _ = plan_result(plan, "news")
+        if news_list:
+            for news in news_list:
+                st.markdown(f"""
+                    <div class="news-card">
+                        <a class="news-title" href="{news['link']}" target="_blank">📰 {news['title']}</a>
+                        <div style="font-size: 13px; color: #666; margin-top: 5px;">🏢 출처: {news['source']}</div>
+                    </div>
+                """, unsafe_allow_html=True)
+        else:
+            st.info("💡 뉴스를 불러올 수 없습니다.")
+
+    with fin_col:
+        st.markdown("### 📊 재무제표")
+        fin_data = plan_result(plan, "fin")
+        if fin_data:
+            st.markdown("**기본 정보**")
+            st.metric("시가총액", fin_data["시가총액"])
+            f1, f2 = st.columns(2)
+            with f1:
+                st.metric("PER", fin_data["PER"])
+                st.metric("EPS", fin_data["EPS"])
+            with f2:
+                st.metric("PBR", fin_data["PBR"])
+                st.metric("배당수익률", fin_data["배당수익률"])
+            st.markdown("---")
+            st.markdown("**손익계산서 (최근 연간)**")
+            f3, f4, f5 = st.columns(3)
+            with f3: st.metric("매출", fin_data["매출"], delta=fin_data["매출_증감"])
+            with f4: st.metric("영업이익", fin_data["영업이익"], delta=fin_data["영업이익_증감"])
+            with f5: st.metric("순이익", fin_data["순이익"], delta=fin_data["순이익_증감"])
+        else:
+            st.info("💡 재무 데이터를 불러올 수 없습니다.")
+
+
+with span("render:total"):
+    render_all(symbol, official_name, timeframe, use_candle, show_bb, bottom_indicator, intraday_minutes)
+if METRICS_FILE:
+    get_metrics().flush(METRICS_FILE)
\ No newline at end of file